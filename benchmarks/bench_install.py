@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+"""
+Benchmark installing a package with a large package_data tree.
+
+Compares installing the files by copying them to hardlinking, reflinking
+and copy_file_range().  Unsupported modes are skipped.  The staging root
+is created next to the source tree, so that it is on the same filesystem.
+"""
+
+import argparse
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyproject2setuppy.install import install_linked  # noqa: E402
+
+
+PYPROJECT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "bench-package"
+version = "1"
+description = "benchmark package."
+authors = [{name = "Benchmark", email = "bench@example.com"}]
+
+[tool.flit.module]
+name = "bench_package"
+'''
+
+
+def make_package(topdir, dirs, files, size):
+    """
+    Create a package in topdir with dirs data directories containing
+    files files of size KiB each.
+    """
+    with open(os.path.join(topdir, 'pyproject.toml'), 'w') as f:
+        f.write(PYPROJECT_TOML)
+    pkgdir = os.path.join(topdir, 'bench_package')
+    os.mkdir(pkgdir)
+    with open(os.path.join(pkgdir, '__init__.py'), 'w') as f:
+        f.write('"""benchmark package."""\n__version__ = "1"\n')
+    block = os.urandom(size * 1024)
+    for i in range(dirs):
+        datadir = os.path.join(pkgdir, 'data', 'd{}'.format(i))
+        os.makedirs(datadir)
+        for j in range(files):
+            with open(os.path.join(datadir, 'f{}.bin'.format(j)), 'wb') as f:
+                f.write(block)
+
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__)
+    argp.add_argument('--dirs', type=int, default=50,
+                      help='Number of data directories (default: 50)')
+    argp.add_argument('--files', type=int, default=100,
+                      help='Files per directory (default: 100)')
+    argp.add_argument('--size', type=int, default=64,
+                      help='Size of each file in KiB (default: 64)')
+    args = argp.parse_args()
+
+    try:
+        import tomli as toml
+    except ImportError:
+        import toml
+
+    tmpdir = tempfile.mkdtemp(dir='.')
+    cwd = os.getcwd()
+    try:
+        src = os.path.join(tmpdir, 'src')
+        os.mkdir(src)
+        make_package(src, args.dirs, args.files, args.size)
+        data = toml.loads(PYPROJECT_TOML)
+        total = args.dirs * args.files * args.size / 1024.
+
+        print('{} files, {:.1f} MiB'.format(args.dirs * args.files, total))
+        os.chdir(src)
+        for mode in ('copy', 'copy_file_range', 'reflink', 'hardlink'):
+            root = os.path.join('..', mode)
+            start = time.time()
+            try:
+                install_linked(data, root=root, mode=mode)
+            except EnvironmentError as e:
+                print('{:<16} unsupported ({})'.format(mode, e))
+                continue
+            elapsed = time.time() - start
+            print('{:<16} {:8.3f} s {:10.1f} MiB/s'.format(
+                mode, elapsed, total / elapsed))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+"""
+Benchmark per-project process startup in workspace builds.
+
+Runs a command for a number of small projects serially, starting
+a new interpreter for each, and forking each from the forkserver
+template process with preloaded modules.
+"""
+
+import argparse
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyproject2setuppy.launcher import Launcher  # noqa: E402
+from pyproject2setuppy.workspace import run_project  # noqa: E402
+
+
+PYPROJECT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "bench-{0}"
+version = "1"
+description = "benchmark package."
+authors = [{{name = "Benchmark", email = "bench@example.com"}}]
+
+[tool.flit.module]
+name = "bench_{0}"
+'''
+
+
+def make_projects(topdir, count):
+    """Create count small projects in topdir, returning their paths."""
+    ret = []
+    for i in range(count):
+        path = os.path.join(topdir, 'p{}'.format(i))
+        os.makedirs(os.path.join(path, 'bench_{}'.format(i)))
+        with open(os.path.join(path, 'pyproject.toml'), 'w') as f:
+            f.write(PYPROJECT_TOML.format(i))
+        with open(os.path.join(path, 'bench_{}'.format(i),
+                               '__init__.py'), 'w'):
+            pass
+        ret.append(path)
+    return ret
+
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__)
+    argp.add_argument('--count', type=int, default=20,
+                      help='Number of projects (default: 20)')
+    argp.add_argument('command', nargs='*', default=['plan', '-o', 'plan'],
+                      help='Command to run (default: plan -o plan)')
+    args = argp.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        projects = make_projects(tmpdir, args.count)
+        launcher = Launcher()
+        launcher.start()
+        for name, runner in (('subprocess', run_project),
+                             ('forkserver', launcher.run)):
+            start = time.time()
+            for p in projects:
+                status, output = runner(p, args.command)
+                if status != 0:
+                    sys.stderr.write(output)
+                    raise SystemExit('{} failed in {}'.format(name, p))
+            elapsed = time.time() - start
+            print('{:<12} {:8.3f} s {:8.1f} ms/project'.format(
+                name, elapsed, elapsed * 1000 / args.count))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
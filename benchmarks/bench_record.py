@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+"""
+Benchmark RECORD hashing on a package with large data files.
+
+Compares serial and parallel hashing of the files, and hashing them
+after copying (the traditional approach) to hashing while copying.
+"""
+
+import argparse
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pyproject2setuppy.record import (copy_and_hash, hash_file,  # noqa: E402
+                                      Record)
+
+
+def make_package(topdir, count, size):
+    """Create count data files of size MiB each in topdir."""
+    block = os.urandom(1024 * 1024)
+    for i in range(count):
+        with open(os.path.join(topdir, 'model{}.bin'.format(i)), 'wb') as f:
+            for _ in range(size):
+                f.write(block)
+
+
+def bench(name, func):
+    start = time.time()
+    func()
+    print('{:<28} {:8.3f} s'.format(name, time.time() - start))
+
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__)
+    argp.add_argument('--count', type=int, default=4,
+                      help='Number of data files (default: 4)')
+    argp.add_argument('--size', type=int, default=256,
+                      help='Size of each data file in MiB (default: 256)')
+    argp.add_argument('--jobs', type=int, default=None,
+                      help='Hashing threads (default: CPU count)')
+    args = argp.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        src = os.path.join(tmpdir, 'src')
+        os.mkdir(src)
+        make_package(src, args.count, args.size)
+        files = sorted(os.listdir(src))
+
+        def serial_hash():
+            for f in files:
+                hash_file(os.path.join(src, f))
+
+        def parallel_hash():
+            record = Record()
+            for f in files:
+                record.add(f, os.path.join(src, f))
+            record.hash_all(args.jobs)
+
+        def copy_then_hash():
+            dst = os.path.join(tmpdir, 'copy-then-hash')
+            os.mkdir(dst)
+            for f in files:
+                shutil.copyfile(os.path.join(src, f), os.path.join(dst, f))
+            for f in files:
+                hash_file(os.path.join(dst, f))
+
+        def hash_during_copy():
+            dst = os.path.join(tmpdir, 'hash-during-copy')
+            os.mkdir(dst)
+            record = Record()
+            for f in files:
+                path = os.path.join(dst, f)
+                record.add(f, path, *copy_and_hash(os.path.join(src, f),
+                                                   path))
+            record.hash_all(args.jobs)
+
+        print('{} files of {} MiB'.format(args.count, args.size))
+        bench('serial hash', serial_hash)
+        bench('parallel hash', parallel_hash)
+        bench('copy, then serial hash', copy_then_hash)
+        bench('hash during copy', hash_during_copy)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
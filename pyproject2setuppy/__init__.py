@@ -3,3 +3,13 @@ Build pyproject.toml-based (flit, poetry) projects using setuptools
 """
 
 __version__ = '22'
+
+
+def resolve_many(projects, cache=None):
+    """
+    Resolve metadata for an iterable of (root, data) pairs, yielding
+    (root, setup() arguments) pairs.  See pyproject2setuppy.resolve.
+    """
+
+    from pyproject2setuppy.resolve import resolve_many
+    return resolve_many(projects, cache)
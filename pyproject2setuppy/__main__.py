@@ -12,9 +12,19 @@ except ImportError:
     import toml
     OPEN_FLAGS = 'r'
 
+import os
+import os.path
+import sys
+
 import pyproject2setuppy.flit
 import pyproject2setuppy.poetry
 import pyproject2setuppy.setuptools
+from pyproject2setuppy.counters import count
+from pyproject2setuppy.memory import pop_memory_report_option, record_memory
+from pyproject2setuppy.profiling import pop_profile_options, profiled
+from pyproject2setuppy.timings import (instrumented, phase,
+                                       pop_timings_option, record_timings,
+                                       timed)
 
 
 MODULES = (
@@ -35,22 +45,140 @@ def get_handlers():
     return handlers
 
 
-def main():
+def get_resolvers():
     """
-    Run setuptools' setup() function for pyproject.toml in the current
-    working directory.
+    Get mapping of build-backend values for supported metadata
+    resolvers.
+    """
+
+    resolvers = {}
+    for m in MODULES:
+        resolvers.update(m.get_resolvers())
+    return resolvers
+
+
+def get_commands():
+    """
+    Get mapping of native commands replacing setuptools commands
+    for projects whose metadata can be resolved.  Each command is
+    called with the unserialized pyproject.toml and the command
+    arguments.
+    """
+
+    # imported lazily, as they depend on this module
+    import pyproject2setuppy.cache
+    import pyproject2setuppy.develop
+    import pyproject2setuppy.install
+    import pyproject2setuppy.plan
+    import pyproject2setuppy.sdist
+    import pyproject2setuppy.watch
+
+    commands = {}
+    for m in (pyproject2setuppy.cache, pyproject2setuppy.develop,
+              pyproject2setuppy.install, pyproject2setuppy.plan,
+              pyproject2setuppy.sdist, pyproject2setuppy.watch):
+        commands.update(m.get_commands())
+    return commands
+
+
+def get_global_commands():
+    """
+    Get mapping of global commands, operating on multiple projects
+    rather than pyproject.toml in the current directory.  Each command
+    is called with the command arguments.
+    """
+
+    # imported lazily, as it depends on this module
+    import pyproject2setuppy.workspace
+
+    return pyproject2setuppy.workspace.get_global_commands()
+
+
+def get_backend(data):
+    """
+    Get the build-backend for pyproject.toml unserialized into data.
+    If the project uses pyproject2setuppy itself as the backend,
+    the build system is taken from [tool.pyproject2setuppy] or guessed
+    from the tool tables present.
     """
 
-    with open('pyproject.toml', OPEN_FLAGS) as f:
-        data = toml.load(f)
     backend = data['build-system']['build-backend']
+    if backend != 'pyproject2setuppy.buildapi':
+        return backend
 
-    handler = get_handlers().get(backend)
-    if handler is None:
-        raise NotImplementedError(
-                'Build backend {} unknown'.format(backend))
+    tool = data.get('tool', {})
+    if 'build-backend' in tool.get('pyproject2setuppy', {}):
+        return tool['pyproject2setuppy']['build-backend']
+    if 'poetry' in tool:
+        return 'poetry.core.masonry.api'
+    if 'flit' in tool or 'project' in data:
+        return 'flit_core.buildapi'
+    return 'setuptools.build_meta'
+
+
+@timed('toml-parse')
+def load_pyproject(root='.'):
+    """
+    Read and unserialize pyproject.toml from the root directory.
+    """
+
+    with open(os.path.join(root, 'pyproject.toml'), OPEN_FLAGS) as f:
+        count('toml_bytes', os.fstat(f.fileno()).st_size)
+        return toml.load(f)
+
+
+def run_main():
+    """
+    Run the command from sys.argv for pyproject.toml in the current
+    working directory.
+    """
+
+    if len(sys.argv) > 1:
+        command = get_global_commands().get(sys.argv[1])
+        if command is not None:
+            with phase('global:' + sys.argv[1]):
+                command(sys.argv[2:])
+            return
+
+    data = load_pyproject()
+    with phase('dispatch'):
+        backend = get_backend(data)
+
+        handler = get_handlers().get(backend)
+        if handler is None:
+            raise NotImplementedError(
+                    'Build backend {} unknown'.format(backend))
+
+        command = None
+        if len(sys.argv) > 1 and backend in get_resolvers():
+            command = get_commands().get(sys.argv[1])
+
+    if command is not None:
+        with phase('native:' + sys.argv[1]):
+            command(data, sys.argv[2:])
+        return
+
+    with phase('handler'):
+        handler(data)
+
+
+def main():
+    """
+    Run setuptools' setup() function for pyproject.toml in the current
+    working directory.  If --timings option is passed or the timings
+    environment variable is set, phase timings are reported as well.
+    --profile option enables profiling the whole run,
+    and --memory-report reports memory allocated in each phase.
+    """
 
-    handler(data)
+    profile, profile_output = pop_profile_options(sys.argv)
+    timings = pop_timings_option(sys.argv)
+    memory_report = pop_memory_report_option(sys.argv)
+    with profiled(profile, profile_output):
+        with record_timings(timings):
+            with record_memory(memory_report):
+                with instrumented():
+                    run_main()
 
 
 if __name__ == '__main__':
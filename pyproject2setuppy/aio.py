@@ -0,0 +1,129 @@
+# pyproject2setup.py -- asyncio metadata resolution
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+# Requires Python 3.6+.  pyproject.toml files are read and project trees
+# are scanned in an executor, while modules providing dynamic metadata
+# are imported in subprocesses.
+
+from __future__ import absolute_import
+
+import asyncio
+import functools
+import json
+import sys
+
+from pyproject2setuppy.__main__ import load_pyproject
+from pyproject2setuppy.common import (format_description,
+                                      get_static_metadata, ResolveCache)
+from pyproject2setuppy.resolve import resolve
+
+
+DYNAMIC_METADATA_SCRIPT = '''
+import importlib, json, sys
+modname = sys.argv[1]
+sys.path[:0] = sys.argv[2:]
+mod = importlib.import_module(modname)
+json.dump({'version': mod.__version__, 'description': mod.__doc__},
+          sys.stdout)
+'''
+
+
+async def get_dynamic_metadata_async(modname, root='.', sys_path=None):
+    """
+    Get version and description from module modname, importing it
+    in a subprocess running in root.  sys_path specifies
+    the directories to search (relative to root), defaulting to
+    the project's top directory and src/.
+    """
+
+    if sys_path is None:
+        sys_path = ['.', 'src']
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, '-c', DYNAMIC_METADATA_SCRIPT,
+        modname.replace('/', '.'), *sys_path,
+        cwd=root, stdout=asyncio.subprocess.PIPE)
+    stdout, _ = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError('Importing {} in {} failed with exit status {}'
+                           .format(modname, root, proc.returncode))
+    ret = json.loads(stdout.decode('utf8'))
+    ret['description'] = format_description(ret['description'])
+    return ret
+
+
+async def resolve_async(root, executor=None, cache=None, sys_path=None):
+    """
+    Resolve metadata of the project in root into setup() arguments.
+    Blocking I/O is done via executor (the default executor if None).
+    """
+
+    loop = asyncio.get_event_loop()
+    data = await loop.run_in_executor(executor, load_pyproject, root)
+
+    # defer the module imports that could not be avoided
+    imports = []
+
+    def static_metadata(modname, root, sys_path):
+        ret = get_static_metadata(modname, root, sys_path)
+        if None in ret.values():
+            imports.append((modname, sys_path))
+        return ret
+
+    spec = await loop.run_in_executor(
+        executor, functools.partial(resolve, data, cache, root=root,
+                                    sys_path=sys_path,
+                                    dynamic_metadata=static_metadata))
+
+    for modname, mod_sys_path in imports:
+        dynamic = await get_dynamic_metadata_async(modname, root,
+                                                   mod_sys_path)
+        for k, v in dynamic.items():
+            if spec[k] is None:
+                spec[k] = v
+    return spec
+
+
+async def resolve_many_async(roots, jobs=8, executor=None, cache=None,
+                             return_exceptions=False):
+    """
+    Resolve metadata of projects in roots concurrently, yielding
+    (root, setup() arguments) pairs as they complete.  At most jobs
+    projects are in flight at any time, and roots are consumed lazily.
+
+    If return_exceptions is True, exceptions are yielded in place
+    of setup() arguments rather than raised.
+    """
+
+    if cache is None:
+        cache = ResolveCache()
+    roots = iter(roots)
+    pending = {}
+
+    def submit():
+        for root in roots:
+            task = asyncio.ensure_future(resolve_async(root, executor,
+                                                       cache))
+            pending[task] = root
+            if len(pending) >= jobs:
+                break
+
+    submit()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                root = pending.pop(task)
+                try:
+                    spec = task.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    spec = e
+                yield root, spec
+            submit()
+    finally:
+        for task in pending:
+            task.cancel()
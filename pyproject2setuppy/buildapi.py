@@ -0,0 +1,127 @@
+# pyproject2setup.py -- PEP 517 build backend
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import zipfile
+
+from pyproject2setuppy.__main__ import load_pyproject, main
+from pyproject2setuppy.cache import get_cache_key, open_cache
+from pyproject2setuppy.metadata import write_dist_info
+from pyproject2setuppy.resolve import resolve
+from pyproject2setuppy.sdist import build_sdist as build_native_sdist
+
+
+def run_setup(args, dist_dir):
+    """
+    Run main() with setuptools command-line args, and move the single
+    file it produces in a temporary --dist-dir to dist_dir.  Returns
+    the basename of the file.
+    """
+
+    tmpdir = tempfile.mkdtemp(dir=dist_dir)
+    saved_argv = sys.argv
+    sys.argv = ['setup.py'] + args + ['--dist-dir', tmpdir]
+    try:
+        main()
+        fn, = os.listdir(tmpdir)
+        os.rename(os.path.join(tmpdir, fn), os.path.join(dist_dir, fn))
+    finally:
+        sys.argv = saved_argv
+        shutil.rmtree(tmpdir)
+    return fn
+
+
+def get_requires_for_build_wheel(config_settings=None):
+    """PEP 517 hook: return additional requirements for build_wheel()."""
+    return ['wheel']
+
+
+def get_requires_for_build_sdist(config_settings=None):
+    """PEP 517 hook: return additional requirements for build_sdist()."""
+    return []
+
+
+def prepare_metadata_for_build_wheel(metadata_directory,
+                                     config_settings=None):
+    """
+    PEP 517 hook: write .dist-info directory into metadata_directory,
+    and return its name.  The metadata is written directly from
+    pyproject.toml, without scanning the tree or running setuptools.
+    """
+
+    data = load_pyproject()
+    try:
+        spec = resolve(data, with_packages=False)
+    except NotImplementedError:
+        # no resolver (i.e. setup.py-based build), take it from a wheel
+        return prepare_metadata_via_wheel(metadata_directory)
+    files = write_dist_info(metadata_directory, spec)
+    return os.path.dirname(files[0])
+
+
+def prepare_metadata_via_wheel(metadata_directory):
+    """
+    Build a wheel and extract the .dist-info directory from it
+    into metadata_directory.  Returns the directory name.
+    """
+
+    tmpdir = tempfile.mkdtemp(dir=metadata_directory)
+    try:
+        whl = os.path.join(tmpdir, build_wheel(tmpdir))
+        with zipfile.ZipFile(whl) as zf:
+            names = [x for x in zf.namelist()
+                     if x.split('/')[0].endswith('.dist-info')]
+            zf.extractall(metadata_directory, names)
+    finally:
+        shutil.rmtree(tmpdir)
+    return names[0].split('/')[0]
+
+
+def build_wheel(wheel_directory, config_settings=None,
+                metadata_directory=None):
+    """
+    PEP 517 hook: build a wheel in wheel_directory, and return its
+    basename.  If the build cache is enabled, a cached wheel is reused.
+    """
+
+    cache = open_cache()
+    if cache is None:
+        return run_setup(['bdist_wheel'], wheel_directory)
+
+    data = load_pyproject()
+    try:
+        key = get_cache_key(data, resolve(data), ['bdist_wheel'])
+    except NotImplementedError:
+        return run_setup(['bdist_wheel'], wheel_directory)
+
+    tmpdir = tempfile.mkdtemp(dir=wheel_directory)
+    try:
+        if not cache.get(key, tmpdir):
+            run_setup(['bdist_wheel'], tmpdir)
+            cache.put(key, tmpdir)
+        fn, = os.listdir(tmpdir)
+        os.rename(os.path.join(tmpdir, fn), os.path.join(wheel_directory, fn))
+    finally:
+        shutil.rmtree(tmpdir)
+    return fn
+
+
+def build_sdist(sdist_directory, config_settings=None):
+    """
+    PEP 517 hook: build a source distribution in sdist_directory,
+    and return its basename.
+    """
+
+    data = load_pyproject()
+    try:
+        return build_native_sdist(sdist_directory, data)
+    except NotImplementedError:
+        return run_setup(['sdist', '--formats=gztar'], sdist_directory)
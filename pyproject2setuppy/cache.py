@@ -0,0 +1,300 @@
+# pyproject2setup.py -- content-addressed build cache
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import binascii
+import contextlib
+import hashlib
+import json
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import warnings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import pyproject2setuppy
+from pyproject2setuppy.common import (get_follow_symlinks,
+                                      get_setuptools_version)
+from pyproject2setuppy.counters import count
+from pyproject2setuppy.record import hash_files
+from pyproject2setuppy.remotecache import RemoteCache, RemoteCacheError
+from pyproject2setuppy.resolve import resolve
+from pyproject2setuppy.sdist import iter_package_sources
+
+
+# the cache is enabled by setting the directory
+CACHE_DIR_ENV = 'PYPROJECT2SETUPPY_CACHE_DIR'
+CACHE_SIZE_ENV = 'PYPROJECT2SETUPPY_CACHE_SIZE'
+DEFAULT_CACHE_SIZE = 1024 * 1024 * 1024
+
+
+def get_cache_key(data, spec, args, root='.'):
+    """
+    Compute cache key for building pyproject.toml unserialized into
+    data, with setup() arguments in spec and setuptools command-line
+    args.  The key covers the hashes of all package files, as well as
+    the Python, setuptools and pyproject2setuppy versions.
+    """
+    files = sorted(set(iter_package_sources(
+        spec, root, get_follow_symlinks(data))))
+    digests = hash_files([os.path.join(root, f) for f in files])
+    inputs = {
+        'pyproject': data,
+        'files': [(f.replace(os.path.sep, '/'),
+                   binascii.hexlify(digest).decode('ascii'))
+                  for f, (digest, _) in zip(files, digests)],
+        'args': args,
+        'python': sys.version,
+        'setuptools': get_setuptools_version(),
+        'pyproject2setuppy': pyproject2setuppy.__version__,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str)
+                          .encode('utf8')).hexdigest()
+
+
+def copy_tree(src, dst):
+    """Copy contents of directory src into directory dst."""
+    for topdir, dirs, files in os.walk(src):
+        reltop = os.path.relpath(topdir, src)
+        outdir = os.path.normpath(os.path.join(dst, reltop))
+        if not os.path.isdir(outdir):
+            os.makedirs(outdir)
+        for f in files:
+            dest = os.path.join(outdir, f)
+            shutil.copy2(os.path.join(topdir, f), dest)
+            count('files_copied')
+            count('bytes_copied', os.path.getsize(dest))
+
+
+def tree_size(path):
+    """Get the total size of files in directory path."""
+    return sum(os.path.getsize(os.path.join(topdir, f))
+               for topdir, _, files in os.walk(path) for f in files)
+
+
+class BuildCache(object):
+    """
+    Local content-addressed cache of build results.  Each entry is
+    a directory tree stored atomically under its key.  The least
+    recently used entries are evicted when the total size exceeds
+    max_size.  A lock file serializes writers against readers,
+    so the cache can be shared by concurrent builders.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        for d in ('entries', 'tmp'):
+            path = os.path.join(directory, d)
+            if not os.path.isdir(path):
+                try:
+                    os.makedirs(path)
+                except OSError:
+                    # created concurrently
+                    if not os.path.isdir(path):
+                        raise
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Create the cache from environment variables, or return None
+        if caching is not enabled.
+        """
+        directory = os.environ.get(CACHE_DIR_ENV)
+        if not directory:
+            return None
+        return cls(directory, int(os.environ.get(CACHE_SIZE_ENV,
+                                                 DEFAULT_CACHE_SIZE)))
+
+    @contextlib.contextmanager
+    def lock(self, exclusive=False):
+        """Lock the cache, shared or exclusive."""
+        with open(os.path.join(self.directory, 'lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def entry_path(self, key):
+        """Get the path to the entry for key."""
+        return os.path.join(self.directory, 'entries', key)
+
+    def get(self, key, dest):
+        """
+        Copy the entry for key into directory dest.  Returns True
+        on a hit, False on a miss.
+        """
+        path = self.entry_path(key)
+        with self.lock():
+            if not os.path.isdir(path):
+                return False
+            copy_tree(os.path.join(path, 'data'), dest)
+            # record the use for LRU eviction
+            os.utime(path, None)
+        return True
+
+    def put(self, key, src):
+        """Store the contents of directory src as the entry for key."""
+        tmpdir = tempfile.mkdtemp(dir=os.path.join(self.directory, 'tmp'))
+        try:
+            copy_tree(src, os.path.join(tmpdir, 'data'))
+            with open(os.path.join(tmpdir, 'size'), 'w') as f:
+                f.write(str(tree_size(tmpdir)))
+            with self.lock(exclusive=True):
+                path = self.entry_path(key)
+                if not os.path.isdir(path):
+                    os.rename(tmpdir, path)
+                    tmpdir = None
+                self.evict()
+        finally:
+            if tmpdir is not None:
+                shutil.rmtree(tmpdir)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits
+        max_size.  Must be called with the exclusive lock held.
+        """
+        topdir = os.path.join(self.directory, 'entries')
+        entries = []
+        for key in os.listdir(topdir):
+            path = os.path.join(topdir, key)
+            with open(os.path.join(path, 'size')) as f:
+                entries.append((os.stat(path).st_mtime, int(f.read()), path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path)
+            total -= size
+
+
+class CacheChain(object):
+    """
+    Chain of caches consulted in order, e.g. the local cache followed
+    by the remote one.  Hits in later caches are stored in the earlier
+    ones, and new entries are stored in all of them.  Remote cache
+    errors are reported as warnings and treated as misses.
+    """
+
+    def __init__(self, caches):
+        self.caches = caches
+
+    def get(self, key, dest):
+        """
+        Copy the entry for key into directory dest.  Returns True
+        on a hit, False on a miss.
+        """
+        for i, cache in enumerate(self.caches):
+            # hits in later caches are fetched into a fresh directory,
+            # so that other files in dest are not stored in the earlier
+            # caches
+            target = tempfile.mkdtemp() if i > 0 else dest
+            try:
+                try:
+                    hit = cache.get(key, target)
+                except RemoteCacheError as e:
+                    warnings.warn('Remote cache lookup failed: {}'
+                                  .format(e))
+                    hit = False
+                if hit and target != dest:
+                    for earlier in self.caches[:i]:
+                        earlier.put(key, target)
+                    copy_tree(target, dest)
+            finally:
+                if target != dest:
+                    shutil.rmtree(target)
+            if hit:
+                return True
+        return False
+
+    def put(self, key, src):
+        """Store the contents of directory src as the entry for key."""
+        for cache in self.caches:
+            try:
+                cache.put(key, src)
+            except RemoteCacheError as e:
+                warnings.warn('Remote cache upload failed: {}'.format(e))
+
+
+def open_cache():
+    """
+    Open the caches configured via environment variables.  Returns
+    a CacheChain, or None if no caches are enabled.
+    """
+    caches = [x for x in (BuildCache.from_environment(),
+                          RemoteCache.from_environment())
+              if x is not None]
+    if not caches:
+        return None
+    return CacheChain(caches)
+
+
+def get_build_lib(args):
+    """
+    Get build directory from 'build' command-line args, or None
+    if they include other options and therefore are not cacheable.
+    """
+    if not args:
+        return os.path.join('build', 'lib')
+    if len(args) == 2 and args[0] in ('-b', '--build-lib'):
+        return args[1]
+    if len(args) == 1 and args[0].startswith('--build-lib='):
+        return args[0].split('=', 1)[1]
+    return None
+
+
+def build_command(data, args):
+    """
+    Native 'build' command, reusing a cached build/lib tree if
+    the cache is enabled.  On a miss, the project is built
+    into a temporary directory that is stored in the cache and copied
+    into build_lib.
+    """
+    from pyproject2setuppy.__main__ import get_backend, get_handlers
+
+    cache = open_cache()
+    build_lib = get_build_lib(args)
+    if cache is None or build_lib is None:
+        get_handlers()[get_backend(data)](data)
+        return
+
+    key = get_cache_key(data, resolve(data), ['build'])
+    if cache.get(key, build_lib):
+        print('reusing cached build in {}'.format(build_lib))
+        return
+    # build into a fresh directory, so that stale files in build_lib
+    # are not stored in the cache
+    tmpdir = tempfile.mkdtemp()
+    try:
+        old_argv = sys.argv
+        sys.argv = sys.argv[:1] + ['build', '--build-lib', tmpdir]
+        try:
+            get_handlers()[get_backend(data)](data)
+        finally:
+            sys.argv = old_argv
+        cache.put(key, tmpdir)
+        copy_tree(tmpdir, build_lib)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def get_commands():
+    """
+    Return native command mapping for the build cache.
+    """
+
+    return {'build': build_command}
@@ -5,53 +5,583 @@
 
 from __future__ import absolute_import
 
-from collections import defaultdict
-
-from setuptools import find_packages
+from collections import namedtuple
 
+import ast
+import email.utils
+import errno
+import fnmatch
+import importlib
+import itertools
+import os
 import os.path
+import re
+import sys
+import threading
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
+from pyproject2setuppy.counters import count
+from pyproject2setuppy.timings import timed
+
+
+# sys.path and sys.modules are process-wide, so only one thread
+# at a time can import project modules
+IMPORT_LOCK = threading.Lock()
+
+
+class ResolveCache(object):
+    """
+    Caches shared between resolving metadata of multiple projects
+    in a single process.  Directory listings are keyed by absolute
+    paths, so the instance can be safely shared between projects.
+    Each directory is listed at most once, and existence checks
+    are answered from the listing of the parent directory.
+    """
+
+    def __init__(self):
+        self.addresses = {}
+        self.listings = {}
+
+    def parseaddr(self, addr):
+        """Cached equivalent of email.utils.parseaddr()."""
+        ret = self.addresses.get(addr)
+        if ret is None:
+            ret = self.addresses[addr] = email.utils.parseaddr(addr)
+        return ret
+
+    def scan_dir(self, path):
+        """
+        Cached equivalent of scan_dir().  Returns None if path
+        is not a directory.
+        """
+        path = os.path.abspath(path)
+        try:
+            return self.listings[path]
+        except KeyError:
+            pass
+        try:
+            ret = scan_dir(path)
+        except OSError:
+            ret = None
+        self.listings[path] = ret
+        return ret
+
+    def pop_dir(self, path):
+        """
+        Equivalent of scan_dir() for directories that are not going
+        to be listed again.  The cached listing is removed, and new
+        listings are not cached, so that memory use does not grow
+        with the size of the walked tree.
+        """
+        path = os.path.abspath(path)
+        ret = self.listings.pop(path, None)
+        if ret is None:
+            try:
+                ret = scan_dir(path)
+            except OSError:
+                ret = None
+        return ret
+
+    def isdir(self, path):
+        """Cached equivalent of os.path.isdir()."""
+        head, tail = os.path.split(os.path.abspath(path))
+        listing = self.scan_dir(head)
+        return listing is not None and tail in listing[0]
+
+    def isfile(self, path):
+        """Cached equivalent of os.path.isfile()."""
+        head, tail = os.path.split(os.path.abspath(path))
+        listing = self.scan_dir(head)
+        return listing is not None and tail in listing[1]
+
+
+def import_module_isolated(name, path, root='.'):
+    """
+    Import module name, searching path (relative to root) before
+    sys.path.  sys.path and sys.modules are restored afterwards,
+    so that the module is always loaded afresh from the specified
+    project and does not leak into the global state.  Other modules
+    imported in the process (e.g. from the standard library) are kept
+    in sys.modules, unless they were loaded from path.
+    """
+    path = [os.path.join(root, x) for x in path]
+    top = name.split('.')[0]
+    prefixes = tuple(os.path.join(os.path.abspath(x), '') for x in path)
+    with IMPORT_LOCK:
+        saved_path = list(sys.path)
+        saved_modules = dict(sys.modules)
+        for k in saved_modules:
+            if k == top or k.startswith(top + '.'):
+                del sys.modules[k]
+        sys.path[:0] = path
+        try:
+            return importlib.import_module(name, '')
+        finally:
+            sys.path[:] = saved_path
+            for k, mod in list(sys.modules.items()):
+                if k in saved_modules:
+                    continue
+                fn = getattr(mod, '__file__', None)
+                if (k == top or k.startswith(top + '.') or (
+                        fn is not None
+                        and os.path.abspath(fn).startswith(prefixes))):
+                    del sys.modules[k]
+            sys.modules.update(saved_modules)
+
+
+def find_module_file(modname, path, root='.'):
+    """
+    Find the source file for module modname in path (relative to root).
+    Returns the path to the file, or None if not found.
+    """
+    modpath = modname.replace('.', os.path.sep)
+    for p in path:
+        for fn in (os.path.join(modpath, '__init__.py'), modpath + '.py'):
+            fn = os.path.join(root, p, fn)
+            count('stat_calls')
+            if os.path.isfile(fn):
+                return fn
+    return None
+
+
+def get_module_path(modname):
+    """
+    Get the path to the source file of py_modules entry modname,
+    relative to the package directory.  Dotted names map to nested
+    directories, e.g. 'ns.mod' to ns/mod.py.
+    """
+    return os.path.join(*modname.split('.')) + '.py'
+
+
+def format_description(docstring):
+    """
+    Convert module docstring into a single-line description.
+    Returns None if the module has no docstring.
+    """
+    if docstring is None:
+        return None
+    # setuptools doesn't like multiple lines in description
+    return ' '.join(docstring.strip().splitlines())
+
+
+def get_static_metadata(modname, root='.', sys_path=None):
+    """
+    Get version and description from module modname by parsing its
+    source.  Values that can not be determined statically are None.
+    sys_path specifies the directories to search (relative to root),
+    defaulting to the project's top directory and src/.
+    """
+    if sys_path is None:
+        sys_path = ['.', 'src']
+
+    version = None
+    docstring = None
+    fn = find_module_file(modname.replace('/', '.'), sys_path, root)
+    if fn is not None:
+        with open(fn, 'rb') as f:
+            try:
+                tree = ast.parse(f.read(), fn)
+            except SyntaxError:
+                tree = None
+        if tree is not None:
+            docstring = ast.get_docstring(tree, clean=False)
+            for node in tree.body:
+                if (isinstance(node, ast.Assign)
+                        and any(isinstance(t, ast.Name)
+                                and t.id == '__version__'
+                                for t in node.targets)):
+                    try:
+                        version = ast.literal_eval(node.value)
+                    except ValueError:
+                        version = None
+
+    return {
+        'version': version,
+        'description': format_description(docstring),
+    }
+
+
+@timed('dynamic-metadata')
+def get_dynamic_metadata(modname, root='.', sys_path=None):
+    """
+    Get version and description from module modname.  The module
+    source is parsed first, and only if the values can not be found
+    statically, the module is imported to obtain the missing ones.
+    """
+    if sys_path is None:
+        sys_path = ['.', 'src']
+
+    ret = get_static_metadata(modname, root, sys_path)
+    if None in ret.values():
+        mod = import_module_isolated(modname.replace('/', '.'), sys_path,
+                                     root)
+        if ret['version'] is None:
+            ret['version'] = mod.__version__
+        if ret['description'] is None:
+            ret['description'] = format_description(mod.__doc__)
+    return ret
+
+
+def scan_dir(path):
+    """
+    List directory at path.  Returns a tuple of sorted lists
+    of subdirectory and file names, and a frozenset of names that
+    are symlinks.  Symlinks are followed when determining entry types.
+    Uses scandir() if available, to avoid calling stat() on every entry.
+    """
+    dirs = []
+    files = []
+    links = set()
+    count('dirs_listed')
+    if scandir is not None:
+        for e in scandir(path):
+            if e.is_dir():
+                dirs.append(e.name)
+            elif e.is_file():
+                files.append(e.name)
+            if e.is_symlink():
+                links.add(e.name)
+    else:
+        stats = 0
+        for name in os.listdir(path):
+            full = os.path.join(path, name)
+            stats += 2
+            if os.path.isdir(full):
+                dirs.append(name)
+            else:
+                stats += 1
+                if os.path.isfile(full):
+                    files.append(name)
+            if os.path.islink(full):
+                links.add(name)
+        count('stat_calls', stats)
+    return sorted(dirs), sorted(files), frozenset(links)
+
+
+def find_packages(where, include, cache=None):
+    """
+    Find packages in directory where whose top-level name matches
+    glob include, along with all their subpackages.  Only directories
+    of matching packages are descended into, and directories without
+    __init__.py are pruned immediately.  Returns the list of package
+    names, in depth-first order.
 
+    include can be prefixed with a slash-separated path to a PEP 420
+    namespace package (e.g. ns/pkg).  The namespace directories
+    do not need __init__.py, are not included in the result and only
+    the declared path is followed, so that sibling directories are
+    never scanned.
+    """
+    if cache is None:
+        cache = ResolveCache()
+    namespace, _, include = include.rpartition('/')
+    prefix = ''
+    if namespace:
+        where = os.path.join(where, *namespace.split('/'))
+        prefix = namespace.replace('/', '.') + '.'
+    if any(x in include for x in '*?['):
+        listing = cache.scan_dir(where)
+        stack = [(prefix + d, os.path.join(where, d))
+                 for d in reversed(listing[0] if listing else [])
+                 if fnmatch.fnmatchcase(d, include)]
+    else:
+        stack = [(prefix + include, os.path.join(where, include))]
 
-def raise_exc(e):
-    raise e
+    ret = []
+    while stack:
+        name, path = stack.pop()
+        listing = cache.scan_dir(path)
+        if listing is None or '__init__.py' not in listing[1]:
+            continue
+        ret.append(name)
+        stack.extend(('.'.join((name, d)), os.path.join(path, d))
+                     for d in reversed(listing[0]) if '.' not in d)
+    return ret
 
 
-def auto_find_packages(modname, subdir='.'):
+@timed('package-discovery')
+def auto_find_packages(modname, subdir='.', cache=None, root='.'):
     """
     Find packages for modname, and supply proper setup() args for them.
     Supports both packages and modules in correct directory.  Includes
-    all nested subpackages.
-    """
-    retdict = {}
-    if subdir != '.':
-        retdict['package_dir'] = {'': subdir}
-    if os.path.isdir(os.path.join(subdir, modname)):
-        retdict.update(
-            {'packages': find_packages(where=subdir,
-                                       include=(modname,
-                                                '{}.*'.format(modname)))})
-    elif os.path.isfile(os.path.join(subdir, modname + '.py')):
-        retdict.update({'py_modules': [modname]})
-    else:
-        raise RuntimeError('No package matching {} found'.format(modname))
-    return retdict
+    all nested subpackages.  The directories are relative to root.
+    subdir can also be a list of directories, in which case the first
+    one containing modname is used.  modname can be a dotted name
+    of a package or module inside a PEP 420 namespace package.
+    """
+    if cache is None:
+        cache = ResolveCache()
+    subdirs = subdir if isinstance(subdir, (list, tuple)) else [subdir]
+    modpath = os.path.join(*modname.split('.'))
+    for subdir in subdirs:
+        retdict = {}
+        if subdir != '.':
+            retdict['package_dir'] = {'': subdir}
+        where = os.path.join(root, subdir)
+        if cache.isdir(os.path.join(where, modpath)):
+            retdict['packages'] = find_packages(
+                where, modname.replace('.', '/'), cache)
+            return retdict
+        elif cache.isfile(os.path.join(where, modpath + '.py')):
+            retdict['py_modules'] = [modname]
+            return retdict
+    raise RuntimeError('No package matching {} found'.format(modname))
 
 
-def find_package_data(packages, package_dirs={}):
-    """Find additional package data dirs and return package_data dict."""
-    ret = defaultdict(list)
-    # install all data files from package directories
-    ret[''] = ['*']
+FOLLOW_SYMLINKS_POLICIES = ('never', 'always', 'within-root')
+
+
+def get_follow_symlinks(data):
+    """
+    Get the symlink follow policy for package data from pyproject.toml
+    unserialized into data.
+    """
+    policy = (data.get('tool', {}).get('pyproject2setuppy', {})
+              .get('follow-symlinks', 'never'))
+    if policy is True:
+        policy = 'always'
+    elif policy is False:
+        policy = 'never'
+    if policy not in FOLLOW_SYMLINKS_POLICIES:
+        raise ValueError('Invalid follow-symlinks value: {}'.format(policy))
+    return policy
+
+
+def follows_symlink(path, follow_symlinks, root='.'):
+    """
+    Check whether symlinked directory at path is followed according
+    to follow_symlinks policy: 'never', 'always' or 'within-root'
+    (if it points inside root).
+    """
+    if follow_symlinks == 'never':
+        return False
+    if follow_symlinks == 'within-root':
+        target = os.path.realpath(path)
+        top = os.path.realpath(root)
+        return target == top or target.startswith(os.path.join(top, ''))
+    return True
+
+
+# record yielded by iter_package_data()
+PackageDataDir = namedtuple('PackageDataDir', ('package', 'path', 'complete'))
+
+
+def iter_data_dirs(path, cache, follow_symlinks='never', root='.',
+                   memo=None, ancestors=frozenset(), nested={}):
+    """
+    Yield directories in path that are not packages, as (relative
+    path, complete) tuples, '.' meaning path itself.  complete is True
+    if all subdirectories of the directory are data directories too,
+    i.e. recursive globs would match the same files.  Directories
+    are yielded in sorted post-order, i.e. each directory follows its
+    subdirectories.
+
+    Symlinked directories are followed according to follow_symlinks
+    policy: 'never', 'always' or 'within-root' (if they point inside
+    root).  When following symlinks, directories are identified
+    by (st_dev, st_ino), symlinks looping back to their ancestors
+    are skipped and results are recorded in memo, so that aliased
+    subtrees are walked only once.
+
+    Directory listings are consumed via cache.pop_dir().  If nested
+    contains the absolute path of a subdirectory, the results for it
+    are stored there, so that they can be reused for the nested
+    package without listing the tree again.
+    """
+    key = None
+    if follow_symlinks != 'never':
+        count('stat_calls')
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino)
+        if key in ancestors:
+            return
+        if memo is not None and key in memo:
+            for x in memo[key]:
+                yield x
+            return
+        ancestors = ancestors | frozenset([key])
+    record = [] if key is not None and memo is not None else None
+
+    listing = cache.pop_dir(path)
+    if listing is None:
+        raise OSError(errno.ENOENT, 'Package directory not found', path)
+    dirs, files, links = listing
+    complete = '__init__.py' not in files
+    for d in dirs:
+        # hidden directories are not matched by globs either
+        if d.startswith('.'):
+            continue
+        if d == '__pycache__':
+            complete = False
+            continue
+        subpath = os.path.join(path, d)
+        if d in links and not follows_symlink(subpath, follow_symlinks,
+                                              root):
+            complete = False
+            continue
+        last = None
+        sub_record = None
+        if nested and os.path.abspath(subpath) in nested:
+            sub_record = nested[os.path.abspath(subpath)] = []
+        for x, c in iter_data_dirs(subpath, cache, follow_symlinks, root,
+                                   memo, ancestors, nested):
+            last = (x, c)
+            if sub_record is not None:
+                sub_record.append(last)
+            item = (os.path.normpath(os.path.join(d, x)), c)
+            if record is not None:
+                record.append(item)
+            yield item
+        # the subdirectory itself comes last, if it is a data directory
+        if last != ('.', True):
+            complete = False
+
+    if '__init__.py' not in files:
+        if record is not None:
+            record.append(('.', complete))
+        yield ('.', complete)
+    if record is not None:
+        memo[key] = record
+
 
-    # find data subdirectories
+def iter_package_data(packages, package_dirs={}, root='.', cache=None,
+                      follow_symlinks='never'):
+    """
+    Yield PackageDataDir records for data directories of packages,
+    in order of packages and iter_data_dirs() order within each
+    package.  The package directories are relative to root,
+    and the yielded paths are relative to the package directory.
+    follow_symlinks specifies the policy for symlinked directories,
+    see iter_data_dirs().  Directory listings are not kept after
+    the directory is walked, so the records can be processed
+    incrementally.
+    """
+    if cache is None:
+        cache = ResolveCache()
+    # share results between packages when following symlinks
+    memo = {}
+    pkgdirs = []
     for p in packages:
         pkgdir = package_dirs.get(p, os.path.join(package_dirs.get('', ''),
                                                   p.replace('.', '/')))
-        for topdir, dirs, files in os.walk(pkgdir, onerror=raise_exc):
-            dirs[:] = [x for x in dirs if x != '__pycache__'
-                       and not x.startswith('.')]
-            if '__init__.py' not in files:
-                data_path = os.path.relpath(topdir, pkgdir)
-                ret[p].append(data_path + '/*')
-
-    return dict((x, sorted(frozenset(y))) for (x, y) in ret.items())
+        pkgdirs.append(os.path.join(root, pkgdir))
+    # data dirs of subpackages are recorded while walking their parent
+    # package, rather than listing the same tree again
+    abspaths = set(os.path.abspath(x) for x in pkgdirs)
+    nested = dict((x, None) for x in abspaths
+                  if os.path.dirname(x) in abspaths)
+    for p, pkgdir in zip(packages, pkgdirs):
+        records = nested.pop(os.path.abspath(pkgdir), None)
+        if records is None:
+            records = iter_data_dirs(pkgdir, cache, follow_symlinks, root,
+                                     memo, nested=nested)
+        for path, complete in records:
+            yield PackageDataDir(p, path, complete)
+
+
+# minimal number of directories in a subtree to collapse it
+COLLAPSE_MIN_DIRS = 16
+
+
+def get_setuptools_version():
+    """
+    Get the version of setuptools, or None if it is not installed.
+    Unless setuptools is imported already, the version is taken
+    from the package metadata where possible, to avoid importing
+    setuptools (and distutils) during resolution.
+    """
+    mod = sys.modules.get('setuptools')
+    if mod is None:
+        try:
+            from importlib.metadata import PackageNotFoundError, version
+        except ImportError:
+            pass
+        else:
+            try:
+                return version('setuptools')
+            except PackageNotFoundError:
+                return None
+        try:
+            import setuptools as mod
+        except ImportError:
+            return None
+    return mod.__version__
+
+
+def supports_recursive_globs():
+    """Check whether setuptools supports '**' in package_data."""
+    version = get_setuptools_version()
+    if version is None:
+        return False
+    version = tuple(int(x) for x in re.findall(r'\d+', version)[:2])
+    return version >= (62, 3)
+
+
+def collapse_data_dirs(dirs, min_dirs=None):
+    """
+    Convert data directories in dirs, as yielded by iter_data_dirs(),
+    into package_data globs.  The directories are put into a prefix
+    trie, and complete subtrees of at least min_dirs directories
+    (defaulting to COLLAPSE_MIN_DIRS) are collapsed into a single
+    recursive glob.  Returns a sorted list
+    of globs.
+    """
+    if min_dirs is None:
+        min_dirs = COLLAPSE_MIN_DIRS
+    trie = {}
+    for path, complete in dirs:
+        node = trie
+        if path != '.':
+            for part in path.split(os.path.sep):
+                node = node.setdefault(part, {})
+        # None key holds the directory itself
+        node[None] = complete
+
+    ret = []
+
+    def visit(node, prefix):
+        """Return number of directories in node, emitting globs."""
+        count = None in node
+        start = len(ret)
+        for k in sorted(k for k in node if k is not None):
+            count += visit(node[k], prefix + k + '/')
+        if node.get(None) and count >= min_dirs:
+            # replace the globs emitted for the subtree
+            del ret[start:]
+            ret.append(prefix + '**/*')
+        elif None in node:
+            ret.append(prefix + '*')
+        return count
+
+    visit(trie, '')
+    return sorted(ret)
+
+
+@timed('package-data')
+def find_package_data(packages, package_dirs={}, root='.', cache=None,
+                      follow_symlinks='never'):
+    """
+    Find additional package data dirs and return package_data dict.
+    The package directories are relative to root.  follow_symlinks
+    specifies the policy for symlinked directories, see iter_data_dirs().
+    Large data trees are collapsed into recursive globs if setuptools
+    supports them.
+    """
+    # install all data files from package directories
+    ret = {'': ['*']}
+    collapse = supports_recursive_globs()
+
+    records = iter_package_data(packages, package_dirs, root, cache,
+                                follow_symlinks)
+    for p, group in itertools.groupby(records, lambda x: x.package):
+        if collapse:
+            globs = collapse_data_dirs((x.path, x.complete) for x in group)
+        else:
+            globs = (x.path.replace(os.path.sep, '/') + '/*' for x in group)
+        ret.setdefault(p, []).extend(globs)
+
+    return dict((x, sorted(set(y))) for (x, y) in ret.items())
@@ -0,0 +1,109 @@
+# pyproject2setup.py -- filesystem and I/O counters
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import contextlib
+import importlib
+import os.path
+import threading
+
+
+# dirs_listed: directories listed by scan_dir()
+# stat_calls: explicit stat() calls (including isfile() checks)
+# files_copied: files copied or linked into build and install trees
+# bytes_copied: bytes copied, either in userspace or in kernel
+# bytes_hashed: bytes read for computing digests
+# toml_bytes: bytes of pyproject.toml parsed
+COUNTERS = ('dirs_listed', 'stat_calls', 'files_copied', 'bytes_copied',
+            'bytes_hashed', 'toml_bytes')
+
+_lock = threading.Lock()
+_counts = dict.fromkeys(COUNTERS, 0)
+
+
+def count(name, value=1):
+    """Increase counter name by value."""
+    with _lock:
+        _counts[name] += value
+
+
+def get_counters():
+    """
+    Get the current values of all counters since the process start
+    or the last reset_counters() call, as a dict.
+    """
+    with _lock:
+        return dict(_counts)
+
+
+def reset_counters():
+    """Reset all counters to zero."""
+    with _lock:
+        for k in _counts:
+            _counts[k] = 0
+
+
+def diff_counters(before, after):
+    """
+    Get the difference between counter values before and after,
+    as returned by get_counters(), omitting counters that did not
+    change.
+    """
+    return dict((k, after[k] - before[k]) for k in COUNTERS
+                if after[k] != before[k])
+
+
+@contextlib.contextmanager
+def counting():
+    """
+    Count I/O done in the context.  Yields a dict that is filled
+    with the counter increases (including the unchanged ones)
+    on exit.  Counters are process-wide, so I/O done by other
+    threads in the meantime is included.
+    """
+    ret = {}
+    before = get_counters()
+    try:
+        yield ret
+    finally:
+        after = get_counters()
+        ret.update((k, after[k] - before[k]) for k in COUNTERS)
+
+
+@contextlib.contextmanager
+def counted_copies():
+    """
+    Count files copied by setuptools commands run in the context,
+    via distutils copy_file() (also used by copy_tree()).
+    """
+    # make sure distutils is the one used by setuptools
+    importlib.import_module('setuptools')
+    from distutils import dir_util, file_util
+
+    copy_file = file_util.copy_file
+
+    def counted_copy_file(src, dst, *args, **kwargs):
+        ret = copy_file(src, dst, *args, **kwargs)
+        dest, copied = ret
+        dry_run = kwargs.get('dry_run', args[5] if len(args) > 5 else 0)
+        if copied and not dry_run:
+            count('files_copied')
+            link = kwargs.get('link', args[3] if len(args) > 3 else None)
+            if link is None:
+                count('bytes_copied', os.path.getsize(dest))
+        return ret
+
+    modules = [file_util]
+    # older distutils import copy_file into dir_util namespace
+    if getattr(dir_util, 'copy_file', None) is copy_file:
+        modules.append(dir_util)
+    for mod in modules:
+        mod.copy_file = counted_copy_file
+    try:
+        yield
+    finally:
+        for mod in modules:
+            mod.copy_file = copy_file
@@ -0,0 +1,160 @@
+# pyproject2setup.py -- editable installs
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import argparse
+import csv
+import json
+import os
+import os.path
+
+try:
+    from urllib.request import pathname2url
+except ImportError:
+    from urllib import pathname2url
+
+from pyproject2setuppy.install import (get_install_paths, get_package_dir,
+                                       write_install_metadata)
+from pyproject2setuppy.metadata import dist_info_name
+from pyproject2setuppy.record import Record
+from pyproject2setuppy.resolve import resolve
+
+
+def get_source_roots(spec, root='.'):
+    """
+    Get the list of absolute directories that need to be added
+    to sys.path to import the packages and modules in setup()
+    arguments spec from the source tree in root.  Returns None
+    if a package directory does not match the package name, i.e.
+    the package cannot be imported from the source tree.
+    """
+    ret = []
+    dirs = [spec.get('package_dir', {}).get('', '')
+            for m in spec.get('py_modules', [])]
+    for p in spec.get('packages', []):
+        pkgdir = os.path.normpath(get_package_dir(spec, p))
+        suffix = os.path.join(*p.split('.'))
+        if (pkgdir != suffix
+                and not pkgdir.endswith(os.path.sep + suffix)):
+            return None
+        dirs.append(pkgdir[:-len(suffix)])
+    for d in dirs:
+        path = os.path.abspath(os.path.join(root, d))
+        if path not in ret:
+            ret.append(path)
+    return ret
+
+
+def get_pth_name(spec):
+    """Get the name of the .pth file for setup() arguments spec."""
+    return '__editable__.{}.pth'.format(dist_info_name(spec)[:-10])
+
+
+def install_editable(data, root=None, prefix=None, install_dir=None,
+                     script_dir=None, project_root='.'):
+    """
+    Install the project described by pyproject.toml unserialized into
+    data in editable mode, adding its source directories in project_root
+    to sys.path via a .pth file.  No package files are copied.  Returns
+    the record of installed files, or None if the project cannot
+    be installed that way (see get_source_roots()).
+    """
+    spec = resolve(data, root=project_root)
+    source_roots = get_source_roots(spec, project_root)
+    if source_roots is None:
+        return None
+    purelib, scripts_dir = get_install_paths(root, prefix)
+    if install_dir is not None:
+        purelib = install_dir
+    if script_dir is not None:
+        scripts_dir = script_dir
+    if not os.path.isdir(purelib):
+        os.makedirs(purelib)
+    record = Record()
+
+    pth = get_pth_name(spec)
+    with open(os.path.join(purelib, pth), 'w') as f:
+        for path in source_roots:
+            f.write(path + '\n')
+    record.add(pth, os.path.join(purelib, pth))
+
+    # PEP 610
+    direct_url = {
+        'url': 'file:' + pathname2url(os.path.abspath(project_root)),
+        'dir_info': {'editable': True},
+    }
+    write_install_metadata(spec, purelib, scripts_dir, record,
+                           extra_files={
+                               'direct_url.json': json.dumps(direct_url),
+                           })
+    return record
+
+
+def uninstall_editable(data, root=None, prefix=None, install_dir=None,
+                       project_root='.'):
+    """
+    Uninstall the project described by pyproject.toml unserialized
+    into data, removing files listed in its RECORD.  Returns False
+    if it is not installed.
+    """
+    spec = resolve(data, root=project_root)
+    purelib, _ = get_install_paths(root, prefix)
+    if install_dir is not None:
+        purelib = install_dir
+    distinfo = os.path.join(purelib, dist_info_name(spec))
+    try:
+        f = open(os.path.join(distinfo, 'RECORD'))
+    except EnvironmentError:
+        return False
+    with f:
+        files = [row[0] for row in csv.reader(f) if row]
+    for fn in files:
+        path = os.path.normpath(os.path.join(purelib, *fn.split('/')))
+        if os.path.lexists(path):
+            os.unlink(path)
+    if os.path.isdir(distinfo) and not os.listdir(distinfo):
+        os.rmdir(distinfo)
+    return True
+
+
+def develop_command(data, args):
+    """
+    Native 'develop' command, installing the project in editable mode.
+    Unsupported options and projects whose packages cannot be imported
+    from the source tree are passed to the setuptools command.
+    """
+    argp = argparse.ArgumentParser(prog='setup.py develop')
+    argp.add_argument('-d', '--install-dir',
+                      help='Install the .pth file and metadata here')
+    argp.add_argument('-s', '--script-dir',
+                      help='Install scripts here')
+    argp.add_argument('-u', '--uninstall', action='store_true',
+                      help='Uninstall the project')
+    argp.add_argument('--root',
+                      help='Install everything relative to this directory')
+    argp.add_argument('--prefix',
+                      help='Installation prefix')
+    opts, unknown = argp.parse_known_args(args)
+    if not unknown:
+        if opts.uninstall:
+            if not uninstall_editable(data, opts.root, opts.prefix,
+                                      opts.install_dir):
+                print('project is not installed')
+            return
+        if install_editable(data, opts.root, opts.prefix, opts.install_dir,
+                            opts.script_dir) is not None:
+            return
+
+    from pyproject2setuppy.__main__ import get_backend, get_handlers
+    get_handlers()[get_backend(data)](data)
+
+
+def get_commands():
+    """
+    Return native command mapping for editable installs.
+    """
+
+    return {'develop': develop_command}
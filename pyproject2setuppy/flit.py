@@ -5,21 +5,26 @@
 
 from __future__ import absolute_import
 
-from setuptools import setup
-
 from collections import defaultdict
 
-import importlib
-import sys
-
-from pyproject2setuppy.common import auto_find_packages, find_package_data
+from pyproject2setuppy.common import (auto_find_packages, find_package_data,
+                                      get_dynamic_metadata,
+                                      get_follow_symlinks,
+                                      import_module_isolated, ResolveCache)
 from pyproject2setuppy.pep621 import get_pep621_metadata
+from pyproject2setuppy.timings import phase
 
 
-def handle_flit(data):
+def resolve_flit(data, cache=None, root='.', sys_path=None,
+                 dynamic_metadata=None, with_packages=True):
     """
-    Handle pyproject.toml unserialized into data, using flit build
-    system.
+    Resolve pyproject.toml unserialized into data, using flit build
+    system.  Returns a dict of setup() arguments.  The project is
+    located in root, sys_path specifies directories to search
+    for the module providing dynamic metadata.  dynamic_metadata
+    is the function used to obtain it, defaulting
+    to get_dynamic_metadata().  If with_packages is False, package
+    arguments are omitted and the tree is not scanned.
     """
 
     # try PEP 621 first
@@ -69,46 +74,74 @@ def handle_flit(data):
         modname = setup_metadata['name']
 
     if None in [setup_metadata[x] for x in ('version', 'description')]:
-        sys.path.insert(0, '.')
-        sys.path.insert(1, 'src')
-        mod = importlib.import_module(modname.replace('/', '.'), '')
-        if setup_metadata['version'] is None:
-            setup_metadata['version'] = mod.__version__
-        if setup_metadata['description'] is None:
-            # setuptools doesn't like multiple lines in description
-            setup_metadata['description'] = (
-                ' '.join(mod.__doc__.strip().splitlines()))
-
-    try:
-        setup_metadata.update(auto_find_packages(modname))
-    except RuntimeError:
-        setup_metadata.update(auto_find_packages(modname, 'src'))
+        if dynamic_metadata is None:
+            dynamic_metadata = get_dynamic_metadata
+        dynamic = dynamic_metadata(modname, root, sys_path)
+        for k, v in dynamic.items():
+            if setup_metadata[k] is None:
+                setup_metadata[k] = v
+
+    if not with_packages:
+        return setup_metadata
+
+    if cache is None:
+        cache = ResolveCache()
+    setup_metadata.update(auto_find_packages(modname, ('.', 'src'),
+                                             cache=cache, root=root))
     setup_metadata['package_data'] = (
         find_package_data(setup_metadata.get('packages', []),
-                          setup_metadata.get('package_dir', {})))
+                          setup_metadata.get('package_dir', {}),
+                          root, cache, get_follow_symlinks(data)))
 
-    setup(**setup_metadata)
+    return setup_metadata
 
 
-def handle_flit_thyself(data):
-    """Handle flit_core.build_thyself backend"""
+def handle_flit(data):
+    """
+    Handle pyproject.toml unserialized into data, using flit build
+    system.
+    """
+
+    with phase('resolve'):
+        spec = resolve_flit(data)
+    with phase('setup'):
+        from setuptools import setup
+        setup(**spec)
+
+
+def resolve_flit_thyself(data, cache=None, root='.', sys_path=None,
+                         dynamic_metadata=None, with_packages=True):
+    """Resolve flit_core.build_thyself backend"""
     bs = data['build-system']
     backend_path = bs['backend-path']
     if not isinstance(backend_path, list):
         backend_path = [backend_path]
-    sys.path = backend_path + sys.path
-    mod = importlib.import_module(bs['build-backend'], '')
+    if sys_path is not None:
+        backend_path = backend_path + sys_path
+    mod = import_module_isolated(bs['build-backend'], backend_path, root)
     metadata = mod.metadata_dict
-    package_args = auto_find_packages(bs['build-backend'].split('.')[0])
+    package_args = {}
+    if with_packages:
+        package_args = auto_find_packages(bs['build-backend'].split('.')[0],
+                                          cache=cache, root=root)
+
+    return dict(name=mod.metadata.name,
+                version=mod.metadata.version,
+                description=mod.metadata.summary,
+                author=metadata['author'],
+                author_email=metadata['author_email'],
+                url=metadata.get('home_page'),
+                classifiers=metadata.get('classifiers', []),
+                **package_args)
 
-    setup(name=mod.metadata.name,
-          version=mod.metadata.version,
-          description=mod.metadata.summary,
-          author=metadata['author'],
-          author_email=metadata['author_email'],
-          url=metadata.get('home_page'),
-          classifiers=metadata.get('classifiers', []),
-          **package_args)
+
+def handle_flit_thyself(data):
+    """Handle flit_core.build_thyself backend"""
+    with phase('resolve'):
+        spec = resolve_flit_thyself(data)
+    with phase('setup'):
+        from setuptools import setup
+        setup(**spec)
 
 
 def get_handlers():
@@ -120,3 +153,14 @@ def get_handlers():
             'flit_core.buildapi': handle_flit,
             'flit_core.build_thyself': handle_flit_thyself,
             }
+
+
+def get_resolvers():
+    """
+    Return build-backend mapping of metadata resolvers for flit.
+    """
+
+    return {'flit.buildapi': resolve_flit,
+            'flit_core.buildapi': resolve_flit,
+            'flit_core.build_thyself': resolve_flit_thyself,
+            }
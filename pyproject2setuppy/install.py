@@ -0,0 +1,457 @@
+# pyproject2setup.py -- native installation via links
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import argparse
+import compileall
+import errno
+import glob
+import multiprocessing
+import os
+import os.path
+import shutil
+import sys
+import sysconfig
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from pyproject2setuppy.common import get_module_path
+from pyproject2setuppy.counters import count
+from pyproject2setuppy.metadata import dist_info_name, write_dist_info
+from pyproject2setuppy.record import copy_and_hash, Record
+from pyproject2setuppy.resolve import resolve
+
+
+if sys.version_info >= (3, 5):
+    # match '**' in package_data, like setuptools does
+    def iglob(pattern):
+        return glob.iglob(pattern, recursive=True)
+else:
+    iglob = glob.iglob
+
+# from linux/fs.h
+FICLONE = 0x40049409
+LINK_MODES = ('auto', 'hardlink', 'reflink', 'copy_file_range', 'copy')
+
+
+def get_package_dir(spec, package):
+    """Get the source directory of package in setup() arguments spec."""
+    package_dirs = spec.get('package_dir', {})
+    return package_dirs.get(package, os.path.join(
+        package_dirs.get('', ''), *package.split('.')))
+
+
+def iter_build_files(spec, root='.'):
+    """
+    Yield (source, destination) paths of files built from setup()
+    arguments spec, equivalent to the build_py command.  Source paths
+    are relative to root, destination paths to the build directory.
+    The files are yielded in deterministic order.
+    """
+    seen = set()
+    package_data = spec.get('package_data', {})
+    for m in sorted(spec.get('py_modules', [])):
+        # like build_py, 'ns.mod' is built as ns/mod.py (e.g. a module
+        # inside a namespace package), rather than as ns.mod.py
+        dest = get_module_path(m)
+        src = os.path.join(spec.get('package_dir', {}).get('', ''), dest)
+        yield os.path.normpath(src), dest
+
+    for p in sorted(spec.get('packages', [])):
+        pkgdir = get_package_dir(spec, p)
+        destdir = os.path.join(*p.split('.'))
+        patterns = (['*.py'] + package_data.get('', [])
+                    + package_data.get(p, []))
+        files = set()
+        for pattern in patterns:
+            for path in iglob(os.path.join(root, pkgdir, pattern)):
+                count('stat_calls')
+                if os.path.isfile(path):
+                    files.add(os.path.relpath(path,
+                                              os.path.join(root, pkgdir)))
+        for f in sorted(files):
+            dest = os.path.normpath(os.path.join(destdir, f))
+            if dest not in seen:
+                seen.add(dest)
+                yield os.path.normpath(os.path.join(pkgdir, f)), dest
+
+
+def reflink(src, dst):
+    """Create a reflink (copy-on-write clone) of src at dst."""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, 'reflinks are not supported')
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except EnvironmentError:
+                fdst.close()
+                os.unlink(dst)
+                raise
+
+
+def copy_range(src, dst):
+    """Copy src to dst in kernel space, using copy_file_range()."""
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, 'copy_file_range() is not supported')
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'wb') as fdst:
+            size = remaining = os.fstat(fsrc.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                                remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except EnvironmentError:
+                fdst.close()
+                os.unlink(dst)
+                raise
+    # count only after success, the fallback copy counts the bytes again
+    count('bytes_copied', size - remaining)
+
+
+def link_file(src, dst, mode='auto'):
+    """
+    Install file src at dst without copying the data in userspace,
+    if possible.  mode is one of LINK_MODES; 'auto' tries hardlink,
+    reflink and copy_file_range in order, falling back to copying.
+    Returns a tuple of (method used, digest, size); digest and size
+    are None unless the file was copied in userspace.
+    """
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    methods = [
+        ('hardlink', os.link),
+        ('reflink', reflink),
+        ('copy_file_range', copy_range),
+    ]
+    for name, func in methods:
+        if mode not in ('auto', name):
+            continue
+        try:
+            func(src, dst)
+        except EnvironmentError:
+            if mode != 'auto':
+                raise
+            continue
+        if name != 'hardlink':
+            shutil.copymode(src, dst)
+        count('files_copied')
+        return name, None, None
+    count('files_copied')
+    return ('copy',) + copy_and_hash(src, dst)
+
+
+def get_install_paths(root=None, prefix=None):
+    """
+    Get (purelib, scripts) install directories, for installing
+    into prefix (defaulting to sys.prefix) inside root.
+    """
+    if prefix is None:
+        paths = sysconfig.get_paths()
+    else:
+        paths = sysconfig.get_paths(vars={'base': prefix,
+                                          'platbase': prefix})
+    ret = []
+    for key in ('purelib', 'scripts'):
+        path = paths[key]
+        if root is not None:
+            path = os.path.join(root, os.path.splitdrive(path)[1]
+                                .lstrip(os.path.sep))
+        ret.append(path)
+    return tuple(ret)
+
+
+def get_pyc_path(path, level=0):
+    """Get the path to the .pyc file for path and optimization level."""
+    if sys.version_info >= (3,):
+        import importlib.util
+        return importlib.util.cache_from_source(
+            path, optimization=level if level else '')
+    return path + ('o' if level else 'c')
+
+
+def compile_file(args):
+    """
+    Byte-compile a single file for all optimization levels.  args
+    is a tuple of (path, ddir, levels), where ddir is the directory
+    name recorded in the .pyc files.  Up-to-date .pyc files
+    are skipped.  Returns True on success.
+    """
+    path, ddir, levels = args
+    if sys.version_info >= (3, 9):
+        return bool(compileall.compile_file(path, ddir=ddir, quiet=1,
+                                            optimize=list(levels)))
+    if sys.version_info < (3,):
+        # Python 2 compiles only for the current interpreter's level
+        return bool(compileall.compile_file(path, ddir=ddir, quiet=1))
+    ret = True
+    for level in levels:
+        ret = compileall.compile_file(path, ddir=ddir, quiet=1,
+                                      optimize=level) and ret
+    return bool(ret)
+
+
+def compile_files(files, jobs=None, levels=(0,)):
+    """
+    Byte-compile files for all optimization levels in parallel,
+    using jobs worker processes (0 or None for CPU count).  files
+    is a list of (path, ddir) tuples, see compile_file().  Returns
+    the list of .pyc files written.
+    """
+    if not jobs:
+        jobs = multiprocessing.cpu_count()
+    if sys.version_info < (3,):
+        levels = (1 if sys.flags.optimize else 0,)
+    tasks = [(path, ddir, tuple(levels)) for path, ddir in files]
+    if jobs == 1 or len(tasks) <= 1:
+        for x in tasks:
+            compile_file(x)
+    else:
+        pool = multiprocessing.Pool(min(jobs, len(tasks)))
+        try:
+            pool.map(compile_file, tasks,
+                     chunksize=max(1, len(tasks) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
+
+    # failures are reported by compileall, like setuptools does
+    ret = []
+    for path, _ in files:
+        for level in levels:
+            pyc = get_pyc_path(path, level)
+            if os.path.isfile(pyc):
+                ret.append(pyc)
+    return ret
+
+
+def pop_option(args, names, short=None):
+    """
+    Remove option with a value from command-line args, either
+    as '--name value', '--name=value', or '-Xvalue' / '-X value'
+    if short is specified.  Returns the last value, or None.
+    """
+    ret = None
+    out = []
+    it = iter(args)
+    for x in it:
+        name = x.split('=', 1)[0]
+        if name in names:
+            ret = x.split('=', 1)[1] if '=' in x else next(it, None)
+        elif short is not None and x.startswith(short):
+            ret = x[len(short):] or next(it, None)
+        else:
+            out.append(x)
+    args[:] = out
+    return ret
+
+
+def get_compile_levels(optimize):
+    """Get the list of optimization levels for install --optimize."""
+    optimize = int(optimize or 0)
+    if optimize not in (0, 1, 2):
+        raise ValueError('Invalid --optimize value: {}'.format(optimize))
+    return sorted(set([0, optimize]))
+
+
+def strip_root(path, root):
+    """Strip root from path, making it absolute."""
+    return os.path.join(os.path.sep, os.path.relpath(path, root))
+
+
+SCRIPT_TEMPLATE = '''#!{python}
+import sys
+from {module} import {attr}
+if __name__ == '__main__':
+    sys.exit({func}())
+'''
+
+
+def write_scripts(spec, scripts_dir, record, record_base):
+    """
+    Write wrappers for console and GUI scripts in setup() arguments
+    spec into scripts_dir, adding them to record (relative
+    to record_base).
+    """
+    entry_points = spec.get('entry_points', {})
+    for group in ('console_scripts', 'gui_scripts'):
+        for ep in entry_points.get(group, []):
+            name, _, value = (x.strip() for x in ep.partition('='))
+            module, _, func = value.partition(':')
+            func = func.split('[')[0].strip()
+            if not os.path.isdir(scripts_dir):
+                os.makedirs(scripts_dir)
+            path = os.path.join(scripts_dir, name)
+            with open(path, 'w') as f:
+                f.write(SCRIPT_TEMPLATE.format(python=sys.executable,
+                                               module=module.strip(),
+                                               attr=func.split('.')[0],
+                                               func=func))
+            os.chmod(path, 0o755)
+            record.add(os.path.relpath(path, record_base), path)
+
+
+def write_install_metadata(spec, purelib, scripts_dir, record, jobs=None,
+                           extra_files={}):
+    """
+    Write .dist-info directory for setup() arguments spec into purelib,
+    along with script wrappers in scripts_dir, and RECORD
+    of all installed files in record.  extra_files can specify
+    additional .dist-info files, as a mapping of names to contents.
+    """
+    distinfo = dist_info_name(spec)
+    for f in write_dist_info(purelib, spec):
+        record.add(f, os.path.join(purelib, f))
+    files = dict(extra_files)
+    files['INSTALLER'] = 'pyproject2setuppy\n'
+    for fn, content in sorted(files.items()):
+        path = os.path.join(purelib, distinfo, fn)
+        with open(path, 'w') as f:
+            f.write(content)
+        record.add(os.path.join(distinfo, fn), path)
+
+    write_scripts(spec, scripts_dir, record, purelib)
+    record.write(os.path.join(purelib, distinfo, 'RECORD'),
+                 '/'.join((distinfo, 'RECORD')), jobs)
+
+
+def install_linked(data, root=None, prefix=None, mode='auto', jobs=None,
+                   project_root='.', compile_levels=None):
+    """
+    Install the project described by pyproject.toml unserialized into
+    data directly from the source tree in project_root, linking files
+    instead of copying them where possible.  If compile_levels is
+    not None, the modules are byte-compiled for these optimization
+    levels.  Returns the record of installed files.
+    """
+    spec = resolve(data, root=project_root)
+    purelib, scripts_dir = get_install_paths(root, prefix)
+    record = Record()
+
+    for src, dest in iter_build_files(spec, project_root):
+        path = os.path.join(purelib, dest)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        _, digest, size = link_file(os.path.join(project_root, src), path,
+                                    mode)
+        record.add(dest, path, digest, size)
+
+    if compile_levels is not None:
+        py_files = [(path, os.path.dirname(strip_root(path, root or '/')))
+                    for path, _, _ in record.entries.values()
+                    if path.endswith('.py')]
+        for pyc in compile_files(py_files, jobs, compile_levels):
+            record.add(os.path.relpath(pyc, purelib), pyc)
+
+    write_install_metadata(spec, purelib, scripts_dir, record, jobs)
+    return record
+
+
+def setuptools_install(data, args):
+    """
+    Run setuptools 'install' command with args.  If --compile-jobs
+    is specified, setuptools byte-compilation is disabled and the files
+    are compiled in parallel afterwards instead.  Invalid values
+    of these options are reported as usage errors.
+    """
+    from pyproject2setuppy.__main__ import get_backend, get_handlers
+
+    args = list(args)
+    if not any(x.split('=', 1)[0] == '--compile-jobs' for x in args):
+        get_handlers()[get_backend(data)](data)
+        return
+
+    argp = argparse.ArgumentParser(prog='setup.py install')
+    jobs = pop_option(args, ('--compile-jobs',))
+    if jobs is None:
+        argp.error('argument --compile-jobs: expected one argument')
+    try:
+        jobs = int(jobs)
+    except ValueError:
+        argp.error("argument --compile-jobs: invalid int value: '{}'"
+                   .format(jobs))
+    try:
+        levels = get_compile_levels(pop_option(args, ('--optimize',), '-O'))
+    except ValueError as e:
+        argp.error(str(e))
+    root = pop_option(args, ('--root',))
+    record = pop_option(args, ('--record',))
+    if '--no-compile' in args:
+        levels = None
+    tmpdir = tempfile.mkdtemp()
+    try:
+        record_path = record or os.path.join(tmpdir, 'record')
+        args += ['--no-compile', '--optimize=0', '--record', record_path]
+        if root is not None:
+            args += ['--root', root]
+        old_argv = sys.argv
+        sys.argv = sys.argv[:1] + ['install'] + args
+        try:
+            get_handlers()[get_backend(data)](data)
+        finally:
+            sys.argv = old_argv
+
+        if levels is None:
+            return
+        with open(record_path) as f:
+            installed = [x.rstrip('\n') for x in f]
+        files = [(os.path.join(root, x.lstrip(os.path.sep)) if root else x,
+                  os.path.dirname(x))
+                 for x in installed if x.endswith('.py')]
+        pycs = compile_files(files, jobs, levels)
+        if record is not None:
+            with open(record_path, 'a') as f:
+                for pyc in pycs:
+                    f.write((strip_root(pyc, root) if root else pyc) + '\n')
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def install_command(data, args):
+    """
+    Native 'install' command, used when --link is passed.  Otherwise,
+    the setuptools command is used.
+    """
+    if not any(x == '--link' or x.startswith('--link=') for x in args):
+        setuptools_install(data, args)
+        return
+
+    argp = argparse.ArgumentParser(prog='setup.py install')
+    argp.add_argument('--link', nargs='?', choices=LINK_MODES,
+                      const='auto',
+                      help='Link files from the source tree instead '
+                           'of copying them (default mode: auto)')
+    argp.add_argument('--root',
+                      help='Install everything relative to this directory')
+    argp.add_argument('--prefix',
+                      help='Installation prefix')
+    argp.add_argument('--compile-jobs', type=int,
+                      help='Byte-compile modules using this many worker '
+                           'processes (0 for CPU count)')
+    argp.add_argument('-O', '--optimize', type=int, choices=(0, 1, 2),
+                      default=0,
+                      help='Also byte-compile for this optimization level')
+    opts = argp.parse_args(args)
+    levels = None
+    if opts.compile_jobs is not None:
+        levels = get_compile_levels(opts.optimize)
+    install_linked(data, opts.root, opts.prefix, opts.link,
+                   jobs=opts.compile_jobs, compile_levels=levels)
+
+
+def get_commands():
+    """
+    Return native command mapping for installing.
+    """
+
+    return {'install': install_command}
@@ -0,0 +1,148 @@
+# pyproject2setup.py -- forkserver-based project launcher
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+
+try:
+    from multiprocessing import forkserver, reduction, spawn, util
+    from multiprocessing.context import ForkServerProcess, set_spawning_popen
+    from multiprocessing.popen_forkserver import Popen as ForkServerPopen
+except ImportError:
+    # forkserver is not supported, see is_supported()
+    ForkServerProcess = ForkServerPopen = object
+
+
+# modules imported once in the template process
+PRELOAD_MODULES = [
+    'setuptools',
+    'distutils.core',
+    'tomli',
+    'toml',
+    'pyproject2setuppy.__main__',
+    'pyproject2setuppy.cache',
+    'pyproject2setuppy.develop',
+    'pyproject2setuppy.install',
+    'pyproject2setuppy.plan',
+    'pyproject2setuppy.sdist',
+    'pyproject2setuppy.watch',
+    'pyproject2setuppy.workspace',
+]
+
+
+def is_supported():
+    """Check whether the forkserver start method is available."""
+    return (hasattr(multiprocessing, 'get_all_start_methods')
+            and 'forkserver' in multiprocessing.get_all_start_methods())
+
+
+def get_preparation_data(name):
+    """
+    Get the data used to prepare child process name, omitting __main__,
+    so that multiprocessing does not re-run the main script (e.g.
+    setup.py) in the child.
+    """
+    ret = spawn.get_preparation_data(name)
+    ret.pop('init_main_from_name', None)
+    ret.pop('init_main_from_path', None)
+    return ret
+
+
+class HiddenMainPopen(ForkServerPopen):
+    """
+    forkserver Popen passing the preparation data without __main__
+    (see get_preparation_data()).  Only the children started using
+    HiddenMainProcess are affected.
+    """
+
+    def _launch(self, process_obj):
+        # same as the parent method, except for the preparation data
+        prep_data = get_preparation_data(process_obj._name)
+        buf = io.BytesIO()
+        set_spawning_popen(self)
+        try:
+            reduction.dump(prep_data, buf)
+            reduction.dump(process_obj, buf)
+        finally:
+            set_spawning_popen(None)
+
+        self.sentinel, w = forkserver.connect_to_new_process(self._fds)
+        parent_w = os.dup(w)
+        self.finalizer = util.Finalize(self, util.close_fds,
+                                       (parent_w, self.sentinel))
+        with io.open(w, 'wb', closefd=True) as f:
+            f.write(buf.getbuffer())
+        self.pid = forkserver.read_signed(self.sentinel)
+
+
+class HiddenMainProcess(ForkServerProcess):
+    """forkserver Process started using HiddenMainPopen."""
+
+    @staticmethod
+    def _Popen(process_obj):
+        return HiddenMainPopen(process_obj)
+
+
+def run_child(root, args, output):
+    """
+    Run pyproject2setuppy with command-line args in project directory
+    root, redirecting stdout and stderr into file at path output.
+    Called in the child process.
+    """
+    fd = os.open(output, os.O_WRONLY | os.O_APPEND)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+    os.chdir(root)
+    sys.argv = ['setup.py'] + list(args)
+
+    from pyproject2setuppy.__main__ import main
+    main()
+
+
+class Launcher(object):
+    """
+    Project launcher forking a fresh child for each project from
+    a template process that has already imported setuptools, the TOML
+    parser and pyproject2setuppy modules.  The children start
+    with copy-on-write copies of the template state, so they do not
+    pay the import cost and do not see sys.path or sys.modules changes
+    from other projects.
+    """
+
+    def __init__(self, preload=PRELOAD_MODULES):
+        if not is_supported():
+            raise NotImplementedError(
+                'forkserver start method is not supported')
+        self.context = multiprocessing.get_context('forkserver')
+        self.context.set_forkserver_preload(list(preload))
+
+    def start(self):
+        """Start the template process if it is not running yet."""
+        from multiprocessing.forkserver import ensure_running
+        ensure_running()
+
+    def run(self, root, args):
+        """
+        Run pyproject2setuppy with command-line args in project
+        directory root in a forked child.  Returns a tuple of (exit
+        status, output), like run_project().
+        """
+        fd, output = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            p = HiddenMainProcess(target=run_child,
+                                  args=(os.path.abspath(root), args, output))
+            p.start()
+            p.join()
+            with io.open(output, encoding='utf8', errors='replace') as f:
+                return p.exitcode, f.read()
+        finally:
+            os.unlink(output)
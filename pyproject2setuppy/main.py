@@ -5,10 +5,10 @@
 
 from __future__ import absolute_import
 
-from pyproject2setuppy.__main__ import get_handlers, main
+from pyproject2setuppy.__main__ import get_handlers, get_resolvers, main
 
 
-__all__ = [get_handlers, main]
+__all__ = [get_handlers, get_resolvers, main]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+# pyproject2setup.py -- tracemalloc-based memory report
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import contextlib
+import json
+import os
+import sys
+import threading
+
+from pyproject2setuppy.timings import pop_output_option, RECORDERS
+
+
+# memory report is enabled by setting the output file ('-' for stderr)
+MEMORY_REPORT_ENV = 'PYPROJECT2SETUPPY_MEMORY_REPORT'
+# number of allocation sites reported for each phase
+TOP_SITES = 10
+
+
+class MemoryReport(object):
+    """
+    Recorder of memory allocated in each phase, using tracemalloc.
+    For each phase, the peak traced memory, the memory retained
+    at the end and the top allocation sites of the retained memory
+    are recorded.  Allocations are traced process-wide.
+    """
+
+    def __init__(self, top_sites=TOP_SITES):
+        import tracemalloc
+
+        self.tracemalloc = tracemalloc
+        self.top_sites = top_sites
+        self.root = os.getcwd()
+        self.records = []
+        # states of the phases that are running, to propagate peaks
+        # to them before the peak is reset
+        self.running = []
+        self.lock = threading.Lock()
+
+    def update_peaks(self):
+        """
+        Update peaks of running phases, and reset the tracemalloc peak
+        if supported (Python 3.9+).  Otherwise, the peaks cover
+        everything since tracing started.  Returns the current traced
+        memory.
+        """
+        current, peak = self.tracemalloc.get_traced_memory()
+        for state in self.running:
+            state['peak'] = max(state['peak'], peak)
+        if hasattr(self.tracemalloc, 'reset_peak'):
+            self.tracemalloc.reset_peak()
+        return current
+
+    def enter(self, name):
+        # snapshots themselves are not traced
+        snapshot = self.tracemalloc.take_snapshot()
+        with self.lock:
+            current = self.update_peaks()
+            state = {'start': current, 'peak': current,
+                     'snapshot': snapshot}
+            self.running.append(state)
+        return state
+
+    def exit(self, name, parent, depth, state):
+        with self.lock:
+            current = self.update_peaks()
+            self.running.remove(state)
+            stats = self.tracemalloc.take_snapshot().compare_to(
+                state.pop('snapshot'), 'lineno')
+            # skip the objects allocated for the report itself
+            ignored = (self.tracemalloc.__file__, __file__)
+            top = [{
+                'site': '{}:{}'.format(s.traceback[0].filename,
+                                       s.traceback[0].lineno),
+                'size': s.size_diff,
+                'count': s.count_diff,
+            } for s in stats if s.size_diff > 0
+                and s.traceback[0].filename not in ignored][:self.top_sites]
+            del stats
+            # do not count the comparison in the peaks of parent phases
+            if hasattr(self.tracemalloc, 'reset_peak'):
+                self.tracemalloc.reset_peak()
+        self.records.append({
+            'project': self.root,
+            'phase': name,
+            'parent': parent,
+            'depth': depth,
+            'peak': state['peak'],
+            'peak_increase': state['peak'] - state['start'],
+            'retained': current - state['start'],
+            'top': top,
+        })
+
+    def write(self, f):
+        """Write the records to file f as JSON lines."""
+        for r in self.records:
+            f.write(json.dumps(r, sort_keys=True) + '\n')
+
+
+@contextlib.contextmanager
+def record_memory(output):
+    """
+    Trace memory allocations in phases run in the context, and append
+    the report to file at path output ('-' for stderr) afterwards.
+    Yields the MemoryReport instance, or None if output is None.
+    The instrumented code needs to be run in instrumented() context.
+    """
+    if output is None:
+        yield None
+        return
+    if sys.version_info < (3, 4):
+        raise NotImplementedError(
+            'Memory report requires tracemalloc (Python 3.4+)')
+
+    import tracemalloc
+
+    report = MemoryReport()
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    RECORDERS.append(report)
+    try:
+        yield report
+    finally:
+        RECORDERS.remove(report)
+        if started:
+            tracemalloc.stop()
+        if output == '-':
+            report.write(sys.stderr)
+        else:
+            with open(output, 'a') as f:
+                report.write(f)
+
+
+def pop_memory_report_option(args):
+    """
+    Remove --memory-report or --memory-report=PATH option from
+    command-line args.  Returns the output path ('-' for stderr),
+    falling back to the value of MEMORY_REPORT_ENV, or None
+    if the report is not enabled.
+    """
+    return pop_output_option(args, '--memory-report', MEMORY_REPORT_ENV)
@@ -0,0 +1,149 @@
+# pyproject2setup.py -- core metadata writing
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import fnmatch
+import io
+import os
+import os.path
+import re
+import sys
+
+try:
+    from packaging.version import InvalidVersion, Version
+except ImportError:
+    Version = None
+
+
+# license files included by setuptools if license_files is not set
+LICENSE_PATTERNS = ('LICEN[CS]E*', 'COPYING*', 'NOTICE*', 'AUTHORS*')
+
+
+def escape_name(name):
+    """Escape distribution name for use in filenames, per PEP 427."""
+    return re.sub(r'[^\w\d.]+', '_', name)
+
+
+def safe_name(name):
+    """Convert distribution name to the form used by setuptools."""
+    return re.sub(r'[^A-Za-z0-9.]+', '-', name)
+
+
+def normalize_version(version):
+    """
+    Normalize version per PEP 440, like setuptools does.  The version
+    is returned unchanged if it is invalid, or if packaging is not
+    available.
+    """
+    if Version is None:
+        return version
+    try:
+        return str(Version(version))
+    except InvalidVersion:
+        return version
+
+
+def dist_fullname(spec):
+    """
+    Get the escaped name-version string for setup() arguments
+    in spec, used in distribution filenames.
+    """
+    return '{}-{}'.format(escape_name(spec['name']),
+                          normalize_version(spec['version']))
+
+
+def dist_info_name(spec):
+    """Get .dist-info directory name for setup() arguments in spec."""
+    return dist_fullname(spec) + '.dist-info'
+
+
+def egg_info_name(spec):
+    """
+    Get .egg-info directory name for setup() arguments in spec,
+    as installed by setuptools.
+    """
+    return '{}-{}-py{}.{}.egg-info'.format(
+        safe_name(spec['name']).replace('-', '_'),
+        normalize_version(spec['version']).replace('-', '_'),
+        *sys.version_info[:2])
+
+
+def find_license_files(root='.'):
+    """
+    Find license files in root that setuptools includes by default.
+    Returns paths relative to root.
+    """
+    names = sorted(os.listdir(root))
+    ret = []
+    for pattern in LICENSE_PATTERNS:
+        for fn in names:
+            if (fnmatch.fnmatchcase(fn, pattern) and not fn.endswith('~')
+                    and fn not in ret
+                    and os.path.isfile(os.path.join(root, fn))):
+                ret.append(fn)
+    return ret
+
+
+def format_metadata(spec, root='.'):
+    """
+    Format core metadata (METADATA or PKG-INFO file contents)
+    for setup() arguments in spec, for the project in root.
+    The output matches the one written by setuptools, so that
+    the metadata written natively agrees with the one in wheels.
+    """
+    lines = [
+        'Metadata-Version: 2.1',
+        'Name: {}'.format(safe_name(spec['name'])),
+        'Version: {}'.format(normalize_version(spec['version'])),
+    ]
+    if spec.get('description'):
+        lines.append('Summary: {}'.format(spec['description']))
+    for key, field in (('url', 'Home-page'),
+                       ('author', 'Author'),
+                       ('author_email', 'Author-email')):
+        if spec.get(key) is not None:
+            lines.append('{}: {}'.format(field, spec[key]))
+    for c in spec.get('classifiers', []):
+        lines.append('Classifier: {}'.format(c))
+    for fn in find_license_files(root):
+        lines.append('License-File: {}'.format(fn))
+    return '\n'.join(lines) + '\n'
+
+
+def format_entry_points(entry_points):
+    """
+    Format entry_points.txt file contents for entry_points dict
+    (in setup() argument format).
+    """
+    sections = []
+    for group in sorted(entry_points):
+        sections.append('[{}]\n{}'.format(
+            group, ''.join(x + '\n' for x in entry_points[group])))
+    return '\n'.join(sections)
+
+
+def write_dist_info(directory, spec, root='.'):
+    """
+    Write .dist-info directory for setup() arguments in spec
+    (for the project in root) into directory.  Returns the paths
+    of files written, relative to directory.
+    """
+    name = dist_info_name(spec)
+    files = {'METADATA': format_metadata(spec, root)}
+    if spec.get('entry_points'):
+        files['entry_points.txt'] = format_entry_points(
+            spec['entry_points'])
+
+    distinfo = os.path.join(directory, name)
+    if not os.path.isdir(distinfo):
+        os.makedirs(distinfo)
+    ret = []
+    for fn, content in sorted(files.items()):
+        with io.open(os.path.join(distinfo, fn), 'w', encoding='utf8',
+                     newline='\n') as f:
+            f.write(content)
+        ret.append(os.path.join(name, fn))
+    return ret
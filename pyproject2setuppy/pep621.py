@@ -5,7 +5,10 @@
 
 from collections import defaultdict
 
+from pyproject2setuppy.timings import timed
 
+
+@timed('pep621')
 def get_pep621_metadata(data, allow_dynamic=[]):
     """
     Get PEP 621 metadata if available, return None otherwise.
@@ -0,0 +1,140 @@
+# pyproject2setup.py -- dry-run install plan
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import argparse
+import json
+import os
+import os.path
+import sys
+
+from pyproject2setuppy.counters import count
+from pyproject2setuppy.install import (get_compile_levels, get_install_paths,
+                                       get_pyc_path, iter_build_files)
+from pyproject2setuppy.metadata import dist_info_name, egg_info_name
+from pyproject2setuppy.resolve import resolve
+
+
+def generated_file(destination):
+    """Get a plan entry for generated file at destination."""
+    return {
+        'source': None,
+        'destination': destination,
+        'size': None,
+    }
+
+
+def get_plan(data, build_lib=os.path.join('build', 'lib'), root=None,
+             prefix=None, optimize=0, project_root='.'):
+    """
+    Get the list of files that would be built and installed for
+    pyproject.toml unserialized into data, without copying anything.
+    Returns a dict with 'build', 'install' and 'install_link' lists
+    of dicts with 'source', 'destination' and 'size' keys.  Generated
+    files (metadata, bytecode and scripts) have source and size set
+    to None.
+
+    'install' describes the layout of the default setuptools 'install'
+    command: .egg-info metadata, and modules byte-compiled for level 0
+    and optimize (unless writing bytecode is disabled).  'install_link'
+    describes the layout of the native 'install --link' command,
+    with .dist-info metadata and no bytecode.
+    """
+    spec = resolve(data, root=project_root)
+    purelib, scripts_dir = get_install_paths(root, prefix)
+    levels = [] if sys.dont_write_bytecode else get_compile_levels(optimize)
+
+    build = []
+    install = []
+    install_link = []
+    for src, dest in iter_build_files(spec, project_root):
+        count('stat_calls')
+        size = os.stat(os.path.join(project_root, src)).st_size
+        build.append({
+            'source': src,
+            'destination': os.path.join(build_lib, dest),
+            'size': size,
+        })
+        installed = {
+            'source': src,
+            'destination': os.path.join(purelib, dest),
+            'size': size,
+        }
+        install.append(installed)
+        install_link.append(dict(installed))
+        if dest.endswith('.py'):
+            for level in levels:
+                install.append(generated_file(
+                    get_pyc_path(installed['destination'], level)))
+
+    entry_points = spec.get('entry_points', {})
+    egginfo = os.path.join(purelib, egg_info_name(spec))
+    generated = ['PKG-INFO', 'SOURCES.txt', 'dependency_links.txt',
+                 'top_level.txt']
+    if entry_points:
+        generated.append('entry_points.txt')
+    for fn in sorted(generated):
+        install.append(generated_file(os.path.join(egginfo, fn)))
+
+    distinfo = os.path.join(purelib, dist_info_name(spec))
+    generated = ['METADATA', 'INSTALLER', 'RECORD']
+    if entry_points:
+        generated.append('entry_points.txt')
+    for fn in sorted(generated):
+        install_link.append(generated_file(os.path.join(distinfo, fn)))
+
+    for group in ('console_scripts', 'gui_scripts'):
+        for ep in entry_points.get(group, []):
+            script = os.path.join(scripts_dir, ep.partition('=')[0].strip())
+            install.append(generated_file(script))
+            install_link.append(generated_file(script))
+
+    return {
+        'name': spec['name'],
+        'version': spec['version'],
+        'build': build,
+        'install': install,
+        'install_link': install_link,
+    }
+
+
+def plan_command(data, args):
+    """
+    Native 'plan' command, printing the build and install plan as JSON.
+    """
+    argp = argparse.ArgumentParser(prog='setup.py plan')
+    argp.add_argument('-b', '--build-lib',
+                      default=os.path.join('build', 'lib'),
+                      help='Build directory (default: build/lib)')
+    argp.add_argument('--root',
+                      help='Install everything relative to this directory')
+    argp.add_argument('--prefix',
+                      help='Installation prefix')
+    argp.add_argument('-O', '--optimize', type=int, choices=(0, 1, 2),
+                      default=0,
+                      help='Also byte-compile for this optimization level '
+                           '(for install without --link)')
+    argp.add_argument('-o', '--output',
+                      help='Write the plan to this file instead of stdout')
+    opts = argp.parse_args(args)
+
+    plan = get_plan(data, opts.build_lib, opts.root, opts.prefix,
+                    opts.optimize)
+    if opts.output is not None:
+        with open(opts.output, 'w') as f:
+            json.dump(plan, f, indent=2, sort_keys=True)
+            f.write('\n')
+    else:
+        json.dump(plan, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+
+def get_commands():
+    """
+    Return native command mapping for the install plan.
+    """
+
+    return {'plan': plan_command}
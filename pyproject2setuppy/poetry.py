@@ -5,56 +5,69 @@
 
 from __future__ import absolute_import
 
-from setuptools import find_packages, setup
-
 from collections import defaultdict
 
-import email.utils
 import os.path
 import re
 
-from pyproject2setuppy.common import auto_find_packages, find_package_data
+from pyproject2setuppy.common import (auto_find_packages, find_package_data,
+                                      find_packages, get_follow_symlinks,
+                                      ResolveCache)
+from pyproject2setuppy.timings import phase
 
 
-def handle_poetry(data):
+CANONICAL_NAME_RE = re.compile(r'[-.]')
+
+
+def resolve_poetry(data, cache=None, root='.', sys_path=None,
+                   dynamic_metadata=None, with_packages=True):
     """
-    Handle pyproject.toml unserialized into data, using poetry build
-    system.
+    Resolve pyproject.toml unserialized into data, using poetry build
+    system.  Returns a dict of setup() arguments.  The project is
+    located in root.  sys_path and dynamic_metadata are unused,
+    as poetry does not support dynamic metadata.  If with_packages
+    is False, package arguments are omitted and the tree is not
+    scanned.
     """
 
+    if cache is None:
+        cache = ResolveCache()
     metadata = data['tool']['poetry']
 
     authors = []
     author_emails = []
     for a in metadata['authors']:
-        name, addr = email.utils.parseaddr(a)
+        name, addr = cache.parseaddr(a)
         authors.append(name)
         author_emails.append(addr)
 
-    if 'packages' not in metadata:
+    if not with_packages:
+        package_args = {}
+    elif 'packages' not in metadata:
         # canonicalize the name
-        canonical_name = re.sub(r'[-.]', '_', metadata['name'].lower())
-        try:
-            package_args = auto_find_packages(canonical_name)
-        except RuntimeError:
-            package_args = auto_find_packages(canonical_name, 'src')
+        canonical_name = CANONICAL_NAME_RE.sub('_', metadata['name'].lower())
+        package_args = auto_find_packages(canonical_name, ('.', 'src'),
+                                          cache=cache, root=root)
     else:
         package_args = {'packages': [], 'package_dir': {}}
-        for p in metadata['packages']:
-            if p.get('format', '') == 'sdist':
-                continue
-            subdir = p.get('from', '.')
-            packages = find_packages(
-                subdir, include=(p['include'], p['include'] + '.*'))
-            package_args['packages'].extend(packages)
-            if subdir != '.':
-                for sp in packages:
-                    package_args['package_dir'][sp] = os.path.join(
-                        subdir, sp.replace('.', os.path.sep))
-
-    package_args['package_data'] = (
-        find_package_data(package_args.get('packages', []),
-                          package_args.get('package_dir', {})))
+        with phase('package-discovery'):
+            for p in metadata['packages']:
+                if p.get('format', '') == 'sdist':
+                    continue
+                subdir = p.get('from', '.')
+                packages = find_packages(os.path.join(root, subdir),
+                                         p['include'], cache)
+                package_args['packages'].extend(packages)
+                if subdir != '.':
+                    for sp in packages:
+                        package_args['package_dir'][sp] = os.path.join(
+                            subdir, sp.replace('.', os.path.sep))
+
+    if with_packages:
+        package_args['package_data'] = (
+            find_package_data(package_args.get('packages', []),
+                              package_args.get('package_dir', {}),
+                              root, cache, get_follow_symlinks(data)))
 
     # NB: include doesn't seem to do anything without exclude
     if metadata.get('exclude', []):
@@ -74,15 +87,28 @@ def handle_poetry(data):
                     '{} = {}'.format(name, path)
                 )
 
-    setup(name=metadata['name'],
-          version=metadata['version'],
-          description=metadata['description'],
-          author=', '.join(authors),
-          author_email=', '.join(author_emails),
-          url=metadata.get('homepage'),
-          classifiers=metadata.get('classifiers', []),
-          entry_points=dict(entry_points),
-          **package_args)
+    return dict(name=metadata['name'],
+                version=metadata['version'],
+                description=metadata['description'],
+                author=', '.join(authors),
+                author_email=', '.join(author_emails),
+                url=metadata.get('homepage'),
+                classifiers=metadata.get('classifiers', []),
+                entry_points=dict(entry_points),
+                **package_args)
+
+
+def handle_poetry(data):
+    """
+    Handle pyproject.toml unserialized into data, using poetry build
+    system.
+    """
+
+    with phase('resolve'):
+        spec = resolve_poetry(data)
+    with phase('setup'):
+        from setuptools import setup
+        setup(**spec)
 
 
 def get_handlers():
@@ -93,3 +119,13 @@ def get_handlers():
     return {'poetry.masonry.api': handle_poetry,
             'poetry.core.masonry.api': handle_poetry,
             }
+
+
+def get_resolvers():
+    """
+    Return build-backend mapping of metadata resolvers for poetry.
+    """
+
+    return {'poetry.masonry.api': resolve_poetry,
+            'poetry.core.masonry.api': resolve_poetry,
+            }
@@ -0,0 +1,122 @@
+# pyproject2setup.py -- built-in profilers
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import contextlib
+import signal
+
+
+PROFILE_MODES = ('cprofile', 'sample')
+DEFAULT_OUTPUTS = {
+    'cprofile': 'pyproject2setuppy.pstats',
+    'sample': 'pyproject2setuppy.folded',
+}
+# sampling interval in seconds of CPU time
+SAMPLE_INTERVAL = 0.005
+
+
+def format_frame(frame):
+    """Format stack frame for the collapsed stack output."""
+    code = frame.f_code
+    # ';' separates frames, so it can not occur in their names
+    return '{} ({}:{})'.format(code.co_name, code.co_filename,
+                               code.co_firstlineno).replace(';', ':')
+
+
+class Sampler(object):
+    """
+    Statistical profiler sampling the main thread stack every interval
+    seconds of CPU time, using SIGPROF.  Stacks are counted in memory,
+    and written in the collapsed format used by flamegraph tools.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        if not hasattr(signal, 'setitimer'):
+            raise NotImplementedError(
+                'Sampling profiler is not supported on this platform')
+        self.interval = interval
+        self.counts = {}
+        self.prev_handler = None
+
+    def sample(self, signum, frame):
+        """Signal handler recording the stack of frame."""
+        stack = []
+        while frame is not None:
+            stack.append(format_frame(frame))
+            frame = frame.f_back
+        key = ';'.join(reversed(stack))
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def start(self):
+        """Start sampling.  Must be called from the main thread."""
+        self.prev_handler = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop sampling and restore the previous signal handler."""
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.prev_handler)
+
+    def write(self, f):
+        """Write collapsed stacks with their sample counts to file f."""
+        for stack, count in sorted(self.counts.items()):
+            f.write('{} {}\n'.format(stack, count))
+
+
+@contextlib.contextmanager
+def profiled(mode, output=None):
+    """
+    Profile the code run in the context using profiler mode (one
+    of PROFILE_MODES, or None to disable profiling), and write
+    the results to file at path output, defaulting to DEFAULT_OUTPUTS.
+    'cprofile' writes pstats data, 'sample' collapsed stacks.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError('Invalid profile mode: {}'.format(mode))
+    if output is None:
+        output = DEFAULT_OUTPUTS[mode]
+
+    if mode == 'cprofile':
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(output)
+    else:
+        sampler = Sampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            with open(output, 'w') as f:
+                sampler.write(f)
+
+
+def pop_profile_options(args):
+    """
+    Remove --profile=MODE and --profile-output=PATH options
+    from command-line args.  Returns a tuple of (mode, output),
+    with None for options that were not passed.
+    """
+    ret = {'--profile': None, '--profile-output': None}
+    out = []
+    it = iter(args)
+    for x in it:
+        name = x.split('=', 1)[0]
+        if name in ret:
+            ret[name] = x.split('=', 1)[1] if '=' in x else next(it, None)
+        else:
+            out.append(x)
+    args[:] = out
+    return ret['--profile'], ret['--profile-output']
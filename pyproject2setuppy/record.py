@@ -0,0 +1,148 @@
+# pyproject2setup.py -- RECORD file hashing
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import base64
+import csv
+import hashlib
+import io
+import mmap
+import multiprocessing
+import os
+import os.path
+import sys
+
+from multiprocessing.pool import ThreadPool
+
+from pyproject2setuppy.counters import count
+
+
+HASH_ALGORITHM = 'sha256'
+# read size for hashing and copying files
+CHUNK_SIZE = 1024 * 1024
+# files larger than that are hashed via mmap() in a single update()
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+
+def hash_file(path):
+    """
+    Hash the file at path.  Returns a tuple of (digest, size).
+    hashlib releases the GIL while hashing large buffers, so this
+    function scales when called from multiple threads.
+    """
+    h = hashlib.new(HASH_ALGORITHM)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                h.update(m)
+            finally:
+                m.close()
+        else:
+            while True:
+                buf = f.read(CHUNK_SIZE)
+                if not buf:
+                    break
+                h.update(buf)
+    count('bytes_hashed', size)
+    return h.digest(), size
+
+
+def copy_and_hash(src, dst):
+    """
+    Copy file src to dst, hashing the data as it is copied.  Returns
+    a tuple of (digest, size).  The permission bits are copied too.
+    """
+    h = hashlib.new(HASH_ALGORITHM)
+    size = 0
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'wb') as fdst:
+            while True:
+                buf = fsrc.read(CHUNK_SIZE)
+                if not buf:
+                    break
+                h.update(buf)
+                fdst.write(buf)
+                size += len(buf)
+    count('stat_calls')
+    os.chmod(dst, os.stat(src).st_mode & 0o7777)
+    count('bytes_copied', size)
+    count('bytes_hashed', size)
+    return h.digest(), size
+
+
+def hash_files(paths, jobs=None):
+    """
+    Hash files at paths in parallel, using jobs threads (defaulting
+    to the CPU count).  Returns a list of (digest, size) tuples.
+    """
+    if not paths:
+        return []
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    pool = ThreadPool(min(jobs, len(paths)))
+    try:
+        return pool.map(hash_file, paths, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def format_hash(digest):
+    """Format digest for RECORD file, per PEP 376 and PEP 427."""
+    return '{}={}'.format(HASH_ALGORITHM,
+                          base64.urlsafe_b64encode(digest).rstrip(b'=')
+                          .decode('ascii'))
+
+
+class Record(object):
+    """
+    RECORD file builder.  Files are added as they are installed,
+    along with their digests if they were computed during copying.
+    The remaining files are hashed in parallel when writing RECORD.
+    """
+
+    def __init__(self):
+        # relative path -> (full path, digest, size)
+        self.entries = {}
+
+    def add(self, relpath, path, digest=None, size=None):
+        """
+        Add file installed at path to the record as relpath.  If digest
+        and size are known already, they are reused.
+        """
+        relpath = relpath.replace(os.path.sep, '/')
+        self.entries[relpath] = (path, digest, size)
+
+    def hash_all(self, jobs=None):
+        """
+        Hash all files whose digests are not known yet, using jobs
+        threads (defaulting to the CPU count).
+        """
+        pending = [(relpath, path) for relpath, (path, digest, size)
+                   in self.entries.items() if digest is None]
+        results = hash_files([path for _, path in pending], jobs)
+        for (relpath, path), (digest, size) in zip(pending, results):
+            self.entries[relpath] = (path, digest, size)
+
+    def write(self, path, relpath, jobs=None):
+        """
+        Write RECORD file to path, adding an entry for itself
+        as relpath.
+        """
+        self.hash_all(jobs)
+        rows = [(k, format_hash(digest), str(size))
+                for k, (_, digest, size) in sorted(self.entries.items())]
+        rows.append((relpath, '', ''))
+        if sys.version_info >= (3,):
+            f = io.open(path, 'w', encoding='utf8', newline='')
+        else:
+            f = open(path, 'wb')
+        with f:
+            writer = csv.writer(f, lineterminator='\n')
+            for row in rows:
+                writer.writerow(row)
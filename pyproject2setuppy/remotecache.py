@@ -0,0 +1,384 @@
+# pyproject2setup.py -- shared build cache over HTTP
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+# The protocol consists of two namespaces:
+#
+#   PUT/GET /cas/<sha256>  -- artifact (tarball) stored by its content
+#                             digest; the server verifies the digest
+#                             before making the upload visible
+#   PUT/GET /ac/<key>      -- cache key mapped to the artifact digest;
+#                             the server refuses it if the artifact
+#                             is not present
+#
+# Misses are reported as 404.  Uploads are written into temporary files
+# and renamed into place, so partial uploads are never visible
+# and concurrent writers of the same object are harmless.
+
+from __future__ import absolute_import
+
+import argparse
+import hashlib
+import os
+import os.path
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+
+try:
+    from http.client import HTTPConnection, HTTPException
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from httplib import HTTPConnection, HTTPException
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit
+
+from pyproject2setuppy.record import CHUNK_SIZE
+from pyproject2setuppy.sdist import normalize_tarinfo
+
+
+REMOTE_CACHE_ENV = 'PYPROJECT2SETUPPY_REMOTE_CACHE'
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class RemoteCacheError(Exception):
+    """Error communicating with the remote cache."""
+    pass
+
+
+def pack_tree(src, fileobj):
+    """
+    Write a reproducible uncompressed tarball of directory src
+    into fileobj.
+    """
+    with tarfile.open(fileobj=fileobj, mode='w|',
+                      format=tarfile.PAX_FORMAT) as tf:
+        for topdir, dirs, files in os.walk(src):
+            dirs.sort()
+            reltop = os.path.relpath(topdir, src)
+            for f in sorted(files):
+                path = os.path.join(topdir, f)
+                arcname = os.path.normpath(os.path.join(reltop, f))
+                ti = normalize_tarinfo(tf.gettarinfo(
+                    path, arcname.replace(os.path.sep, '/')))
+                with open(path, 'rb') as fsrc:
+                    tf.addfile(ti, fsrc)
+
+
+def unpack_tree(fileobj, dest):
+    """
+    Unpack tarball from fileobj into directory dest, refusing members
+    that are not regular files or would be written outside dest.
+    """
+    with tarfile.open(fileobj=fileobj, mode='r|') as tf:
+        for ti in tf:
+            parts = ti.name.split('/')
+            if not ti.isfile() or ti.name.startswith('/') or '..' in parts:
+                raise RemoteCacheError('Unsafe tarball member: {}'
+                                       .format(ti.name))
+            path = os.path.join(dest, *parts)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            fsrc = tf.extractfile(ti)
+            with open(path, 'wb') as fdst:
+                shutil.copyfileobj(fsrc, fdst, CHUNK_SIZE)
+            os.chmod(path, ti.mode)
+
+
+class RemoteCache(object):
+    """
+    Client for the shared build cache at url.  Connections are kept
+    alive and pooled, so the instance can be used from multiple threads.
+    Fetched artifacts are verified against their digests.
+    """
+
+    def __init__(self, url, timeout=60):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError('Unsupported remote cache URL: {}'.format(url))
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.pool = []
+        self.pool_lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Create the client from environment variables, or return None
+        if the remote cache is not configured.
+        """
+        url = os.environ.get(REMOTE_CACHE_ENV)
+        if not url:
+            return None
+        return cls(url)
+
+    def request(self, method, path, body=None, headers={}, dest=None):
+        """
+        Perform a request, reusing a pooled connection if possible.
+        Returns a tuple of (status, body).  If dest is not None,
+        the body is streamed into it instead, and its digest
+        is returned.
+        """
+        for attempt in range(2):
+            with self.pool_lock:
+                conn = self.pool.pop() if self.pool else None
+            fresh = conn is None
+            if fresh:
+                conn = HTTPConnection(self.host, self.port,
+                                      timeout=self.timeout)
+            try:
+                if hasattr(body, 'seek'):
+                    body.seek(0)
+                if dest is not None:
+                    dest.seek(0)
+                    dest.truncate()
+                conn.request(method, self.prefix + path, body, headers)
+                resp = conn.getresponse()
+                if dest is None:
+                    ret = resp.read()
+                else:
+                    h = hashlib.sha256()
+                    while True:
+                        buf = resp.read(CHUNK_SIZE)
+                        if not buf:
+                            break
+                        h.update(buf)
+                        dest.write(buf)
+                    ret = h.hexdigest()
+            except (EnvironmentError, HTTPException) as e:
+                conn.close()
+                # a pooled connection may have been closed by the server
+                if fresh or attempt > 0:
+                    raise RemoteCacheError('{} {} failed: {}'
+                                           .format(method, path, e))
+                continue
+            if resp.will_close:
+                conn.close()
+            else:
+                with self.pool_lock:
+                    self.pool.append(conn)
+            return resp.status, ret
+
+    def get(self, key, dest):
+        """
+        Fetch the entry for key and unpack it into directory dest.
+        Returns True on a hit, False on a miss.
+        """
+        status, digest = self.request('GET', '/ac/' + key)
+        if status == 404:
+            return False
+        if status != 200:
+            raise RemoteCacheError('GET /ac/{} returned {}'
+                                   .format(key, status))
+        digest = digest.decode('ascii').strip()
+        if not DIGEST_RE.match(digest):
+            raise RemoteCacheError('Invalid digest for {}'.format(key))
+
+        with tempfile.TemporaryFile() as f:
+            status, actual = self.request('GET', '/cas/' + digest, dest=f)
+            if status == 404:
+                return False
+            if status != 200:
+                raise RemoteCacheError('GET /cas/{} returned {}'
+                                       .format(digest, status))
+            if actual != digest:
+                raise RemoteCacheError('Digest mismatch for {}'
+                                       .format(digest))
+            f.seek(0)
+            # unpack into a staging directory, so that a broken tarball
+            # does not leave partial output behind
+            tmpdir = tempfile.mkdtemp()
+            try:
+                unpack_tree(f, tmpdir)
+                for topdir, _, files in os.walk(tmpdir):
+                    outdir = os.path.normpath(os.path.join(
+                        dest, os.path.relpath(topdir, tmpdir)))
+                    if not os.path.isdir(outdir):
+                        os.makedirs(outdir)
+                    for fn in files:
+                        shutil.move(os.path.join(topdir, fn),
+                                    os.path.join(outdir, fn))
+            finally:
+                shutil.rmtree(tmpdir)
+        return True
+
+    def put(self, key, src):
+        """Upload the contents of directory src as the entry for key."""
+        with tempfile.TemporaryFile() as f:
+            pack_tree(src, f)
+            size = f.tell()
+            f.seek(0)
+            h = hashlib.sha256()
+            while True:
+                buf = f.read(CHUNK_SIZE)
+                if not buf:
+                    break
+                h.update(buf)
+            digest = h.hexdigest()
+
+            status, _ = self.request('HEAD', '/cas/' + digest)
+            if status == 404:
+                status, _ = self.request(
+                    'PUT', '/cas/' + digest, f,
+                    {'Content-Length': str(size)})
+            if status not in (200, 201, 204):
+                raise RemoteCacheError('PUT /cas/{} returned {}'
+                                       .format(digest, status))
+
+        status, _ = self.request('PUT', '/ac/' + key, digest.encode('ascii'),
+                                 {'Content-Length': str(len(digest))})
+        if status not in (200, 201, 204):
+            raise RemoteCacheError('PUT /ac/{} returned {}'
+                                   .format(key, status))
+
+
+class CacheRequestHandler(BaseHTTPRequestHandler):
+    """Request handler for the reference cache server."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def parse_object(self):
+        """
+        Get (namespace, name) from request path, or send an error
+        and return None.
+        """
+        parts = self.path.strip('/').split('/')
+        if (len(parts) != 2 or parts[0] not in ('ac', 'cas')
+                or not DIGEST_RE.match(parts[1])):
+            self.send_empty(400)
+            return None
+        return parts[0], parts[1]
+
+    def send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def object_path(self, namespace, name):
+        return os.path.join(self.server.directory, namespace, name)
+
+    def do_HEAD(self):
+        obj = self.parse_object()
+        if obj is not None:
+            self.send_empty(200 if os.path.isfile(self.object_path(*obj))
+                            else 404)
+
+    def do_GET(self):
+        obj = self.parse_object()
+        if obj is None:
+            return
+        try:
+            f = open(self.object_path(*obj), 'rb')
+        except EnvironmentError:
+            self.send_empty(404)
+            return
+        with f:
+            self.send_response(200)
+            self.send_header('Content-Length',
+                             str(os.fstat(f.fileno()).st_size))
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+    def do_PUT(self):
+        obj = self.parse_object()
+        if obj is None:
+            return
+        namespace, name = obj
+        try:
+            remaining = int(self.headers['Content-Length'])
+        except (KeyError, TypeError, ValueError):
+            self.send_empty(411)
+            return
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.server.directory,
+                                                    'tmp'))
+        try:
+            h = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as f:
+                while remaining > 0:
+                    buf = self.rfile.read(min(remaining, CHUNK_SIZE))
+                    if not buf:
+                        break
+                    h.update(buf)
+                    f.write(buf)
+                    remaining -= len(buf)
+            if remaining > 0:
+                # partial upload, the connection is unusable now
+                self.close_connection = True
+                return
+            if namespace == 'cas':
+                valid = h.hexdigest() == name
+            else:
+                with open(tmp, 'rb') as f:
+                    digest = f.read().decode('ascii', 'replace').strip()
+                valid = (DIGEST_RE.match(digest) is not None and
+                         os.path.isfile(self.object_path('cas', digest)))
+            if not valid:
+                self.send_empty(400)
+                return
+            os.rename(tmp, self.object_path(namespace, name))
+            tmp = None
+            self.send_empty(201)
+        finally:
+            if tmp is not None:
+                os.unlink(tmp)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class CacheServer(ThreadingMixIn, HTTPServer):
+    """Reference cache server storing objects in directory."""
+
+    daemon_threads = True
+
+    def __init__(self, address, directory, verbose=False):
+        self.directory = directory
+        self.verbose = verbose
+        for d in ('ac', 'cas', 'tmp'):
+            path = os.path.join(directory, d)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+        HTTPServer.__init__(self, address, CacheRequestHandler)
+
+
+def main(argv=None):
+    """Run the reference cache server."""
+    argp = argparse.ArgumentParser(
+        prog='python -m pyproject2setuppy.remotecache',
+        description='Reference server for pyproject2setuppy build cache')
+    argp.add_argument('directory',
+                      help='Directory to store cache objects in')
+    argp.add_argument('--bind', default='127.0.0.1',
+                      help='Address to listen on (default: 127.0.0.1)')
+    argp.add_argument('--port', type=int, default=8765,
+                      help='Port to listen on (default: 8765)')
+    argp.add_argument('-v', '--verbose', action='store_true',
+                      help='Log requests')
+    args = argp.parse_args(argv)
+
+    server = CacheServer((args.bind, args.port), args.directory,
+                         args.verbose)
+    print('Serving cache from {} on http://{}:{}/'.format(
+        args.directory, *server.server_address[:2]))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
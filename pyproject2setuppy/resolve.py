@@ -0,0 +1,49 @@
+# pyproject2setup.py -- bulk metadata resolution
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+from pyproject2setuppy.__main__ import get_backend, get_resolvers
+from pyproject2setuppy.common import ResolveCache
+
+
+def resolve(data, cache=None, resolvers=None, root='.', sys_path=None,
+            dynamic_metadata=None, with_packages=True):
+    """
+    Resolve pyproject.toml unserialized into data into setup()
+    arguments, using the resolver matching its build-backend.
+    The project is located in root.  Paths in the returned arguments
+    are relative to root.  If with_packages is False, only metadata
+    is resolved and the package tree is not scanned.
+    """
+
+    if resolvers is None:
+        resolvers = get_resolvers()
+    backend = get_backend(data)
+    resolver = resolvers.get(backend)
+    if resolver is None:
+        raise NotImplementedError(
+                'Build backend {} can not be resolved'.format(backend))
+    return resolver(data, cache=cache, root=root, sys_path=sys_path,
+                    dynamic_metadata=dynamic_metadata,
+                    with_packages=with_packages)
+
+
+def resolve_many(projects, cache=None):
+    """
+    Resolve metadata for an iterable of (root, data) pairs, where root
+    is the project directory and data is its unserialized
+    pyproject.toml.  Yields (root, setup() arguments) pairs as they
+    are resolved.  The caches are shared between all projects.
+
+    The process working directory and sys.path are not altered,
+    so multiple generators can be run concurrently in threads.
+    """
+
+    if cache is None:
+        cache = ResolveCache()
+    resolvers = get_resolvers()
+    for root, data in projects:
+        yield root, resolve(data, cache, resolvers, root)
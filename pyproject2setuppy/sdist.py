@@ -0,0 +1,281 @@
+# pyproject2setup.py -- streaming sdist builder
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import argparse
+import fnmatch
+import glob
+import gzip
+import io
+import os
+import os.path
+import stat
+import tarfile
+
+from pyproject2setuppy.common import (follows_symlink, get_follow_symlinks,
+                                      get_module_path, iter_package_data,
+                                      scan_dir)
+from pyproject2setuppy.metadata import (dist_fullname, find_license_files,
+                                        format_metadata)
+from pyproject2setuppy.resolve import resolve
+
+
+def is_ignored(name):
+    """Check whether file or directory name is excluded from sdists."""
+    return (name.startswith('.') or name == '__pycache__'
+            or name.endswith(('.pyc', '.pyo')))
+
+
+def walk_files(path, root='.', follow_symlinks='never',
+               ancestors=frozenset()):
+    """
+    Yield paths of files in path (relative to root), recursively
+    if it is a directory.  Symlinked directories are followed according
+    to follow_symlinks policy (see follows_symlink()), skipping
+    the ones looping back to their ancestors.
+    """
+    full = os.path.join(root, path)
+    if not os.path.isdir(full):
+        if os.path.isfile(full):
+            yield os.path.normpath(path)
+        return
+    if follow_symlinks != 'never':
+        st = os.stat(full)
+        key = (st.st_dev, st.st_ino)
+        if key in ancestors:
+            return
+        ancestors = ancestors | frozenset([key])
+    dirs, files, links = scan_dir(full)
+    for f in files:
+        if not is_ignored(f):
+            yield os.path.normpath(os.path.join(path, f))
+    for d in dirs:
+        if is_ignored(d) or (d in links and not follows_symlink(
+                os.path.join(full, d), follow_symlinks, root)):
+            continue
+        for f in walk_files(os.path.join(path, d), root, follow_symlinks,
+                            ancestors):
+            yield f
+
+
+def glob_files(patterns, root='.', follow_symlinks='never'):
+    """Yield files matching glob patterns (relative to root)."""
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern)):
+            for f in walk_files(os.path.relpath(path, root), root,
+                                follow_symlinks):
+                yield f
+
+
+def get_readme_files(data):
+    """Get the readme and license files declared in data."""
+    ret = []
+    project = data.get('project', {})
+    readme = project.get('readme')
+    if isinstance(readme, dict):
+        readme = readme.get('file')
+    if readme is not None:
+        ret.append(readme)
+    if 'file' in project.get('license', {}):
+        ret.append(project['license']['file'])
+
+    flit = data.get('tool', {}).get('flit', {}).get('metadata', {})
+    if 'description-file' in flit:
+        ret.append(flit['description-file'])
+
+    readme = data.get('tool', {}).get('poetry', {}).get('readme', [])
+    if not isinstance(readme, list):
+        readme = [readme]
+    ret.extend(readme)
+    return ret
+
+
+def get_include_rules(data):
+    """
+    Get additional sdist include and exclude globs from flit
+    or poetry configuration in data.  Returns a tuple of two lists.
+    """
+    include = get_readme_files(data)
+    exclude = []
+
+    flit = data.get('tool', {}).get('flit', {}).get('sdist', {})
+    include.extend(flit.get('include', []))
+    exclude.extend(flit.get('exclude', []))
+
+    poetry = data.get('tool', {}).get('poetry', {})
+    for p in poetry.get('include', []):
+        if isinstance(p, dict):
+            fmt = p.get('format', 'sdist')
+            if 'sdist' not in ([fmt] if not isinstance(fmt, list) else fmt):
+                continue
+            p = p['path']
+        include.append(p)
+    for p in poetry.get('packages', []):
+        if p.get('format', '') == 'sdist':
+            include.append(os.path.join(p.get('from', '.'), p['include']))
+
+    return include, exclude
+
+
+def list_files(path, root='.'):
+    """
+    Yield paths of files directly in directory path (relative
+    to root), skipping the ones excluded from sdists.
+    """
+    for f in scan_dir(os.path.join(root, path))[1]:
+        if not is_ignored(f):
+            yield os.path.normpath(os.path.join(path, f))
+
+
+def iter_package_sources(spec, root='.', follow_symlinks='never'):
+    """
+    Yield files belonging to the packages and modules in setup()
+    arguments spec (relative to root).  The package directories
+    are walked using iter_package_data(), so that the same files
+    are found as when building, and symlinked directories are followed
+    according to follow_symlinks policy.
+    """
+    package_dirs = spec.get('package_dir', {})
+    base = package_dirs.get('', '')
+    for m in spec.get('py_modules', []):
+        yield os.path.normpath(os.path.join(base, get_module_path(m)))
+
+    packages = spec.get('packages', [])
+    pkgdirs = {}
+    for p in packages:
+        pkgdirs[p] = package_dirs.get(p, os.path.join(base,
+                                                      p.replace('.', '/')))
+        for f in list_files(pkgdirs[p], root):
+            yield f
+    for pd in iter_package_data(packages, package_dirs, root,
+                                follow_symlinks=follow_symlinks):
+        # the package directory is listed above
+        if pd.path != '.':
+            for f in list_files(os.path.join(pkgdirs[pd.package], pd.path),
+                                root):
+                yield f
+
+
+def iter_sdist_files(data, spec, root='.'):
+    """
+    Return a sorted list of files to include in the sdist
+    for pyproject.toml unserialized into data and setup() arguments
+    in spec (relative to root).
+    """
+    follow_symlinks = get_follow_symlinks(data)
+    include, exclude = get_include_rules(data)
+    files = set(['pyproject.toml'])
+    # referenced by License-File in PKG-INFO
+    files.update(find_license_files(root))
+    files.update(iter_package_sources(spec, root, follow_symlinks))
+    files.update(glob_files(include, root, follow_symlinks))
+    excluded = set(glob_files(exclude, root, follow_symlinks))
+    return sorted(f for f in files if f not in excluded
+                  and not any(fnmatch.fnmatch(f, x) for x in exclude))
+
+
+def get_mtime():
+    """Get the mtime override from SOURCE_DATE_EPOCH, or None."""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    return int(epoch) if epoch else None
+
+
+def normalize_tarinfo(ti, mtime=None):
+    """Normalize ownership, mode and mtime of TarInfo ti."""
+    ti.uid = ti.gid = 0
+    ti.uname = ti.gname = ''
+    ti.mode = 0o755 if ti.mode & stat.S_IXUSR else 0o644
+    if mtime is not None:
+        ti.mtime = mtime
+    return ti
+
+
+def write_sdist(fileobj, data, spec, root='.'):
+    """
+    Write a gzipped sdist tarball into fileobj, streaming the project
+    files straight from root in a single pass.  Returns the list
+    of files added (relative to the top directory).
+    """
+    mtime = get_mtime()
+    topdir = dist_fullname(spec)
+    files = iter_sdist_files(data, spec, root)
+
+    gz = gzip.GzipFile(filename='', mode='wb', fileobj=fileobj,
+                       mtime=mtime or 0)
+    try:
+        # symlinked files are stored as regular files, like in wheels
+        tf = tarfile.open(fileobj=gz, mode='w|', format=tarfile.PAX_FORMAT,
+                          dereference=True)
+        try:
+            for f in files:
+                path = os.path.join(root, f)
+                ti = normalize_tarinfo(
+                    tf.gettarinfo(path, '/'.join((topdir,) + tuple(
+                        f.split(os.path.sep)))), mtime)
+                with open(path, 'rb') as src:
+                    tf.addfile(ti, src)
+
+            pkg_info = format_metadata(spec, root).encode('utf8')
+            ti = tarfile.TarInfo(topdir + '/PKG-INFO')
+            ti.size = len(pkg_info)
+            ti.mtime = os.stat(os.path.join(root, 'pyproject.toml')).st_mtime
+            tf.addfile(normalize_tarinfo(ti, mtime), io.BytesIO(pkg_info))
+        finally:
+            tf.close()
+    finally:
+        gz.close()
+    return files + ['PKG-INFO']
+
+
+def build_sdist(sdist_directory, data, root='.'):
+    """
+    Build an sdist for pyproject.toml unserialized into data
+    in sdist_directory.  Returns the basename of the file.
+    """
+    spec = resolve(data, root=root)
+    fn = dist_fullname(spec) + '.tar.gz'
+    path = os.path.join(sdist_directory, fn)
+    if not os.path.isdir(sdist_directory):
+        os.makedirs(sdist_directory)
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            write_sdist(f, data, spec, root)
+        os.rename(tmp, path)
+        tmp = None
+    finally:
+        if tmp is not None and os.path.lexists(tmp):
+            os.unlink(tmp)
+    return fn
+
+
+def sdist_command(data, args):
+    """
+    Native 'sdist' command, replacing the setuptools one.
+    Unsupported options, formats other than gztar and additional
+    commands are passed to setuptools.
+    """
+    argp = argparse.ArgumentParser(prog='setup.py sdist')
+    argp.add_argument('-d', '--dist-dir', default='dist',
+                      help='Directory to put the source distribution in')
+    argp.add_argument('--formats', default='gztar',
+                      help='Archive format (only gztar is supported)')
+    opts, unknown = argp.parse_known_args(args)
+    if unknown or opts.formats != 'gztar':
+        from pyproject2setuppy.__main__ import get_backend, get_handlers
+        get_handlers()[get_backend(data)](data)
+        return
+
+    print('writing {}'.format(
+        os.path.join(opts.dist_dir, build_sdist(opts.dist_dir, data))))
+
+
+def get_commands():
+    """
+    Return native command mapping for sdist.
+    """
+
+    return {'sdist': sdist_command}
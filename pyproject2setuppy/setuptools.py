@@ -9,6 +9,8 @@ import os
 import subprocess
 import sys
 
+from pyproject2setuppy.timings import phase
+
 
 def handle_setuptools(data):
     """
@@ -20,13 +22,15 @@ def handle_setuptools(data):
     """
     # TODO: shouldn't we be ignoring it with non-legacy backend?
     if os.path.exists('setup.py'):
-        ret = (subprocess.Popen([sys.executable, 'setup.py'] + sys.argv[1:])
-               .wait())
+        with phase('setup'):
+            ret = (subprocess.Popen([sys.executable, 'setup.py']
+                                    + sys.argv[1:]).wait())
         if ret != 0:
             sys.exit(ret)
     else:
         from setuptools import setup
-        setup()
+        with phase('setup'):
+            setup()
 
 
 def get_handlers():
@@ -36,3 +40,13 @@ def get_handlers():
 
     return {'setuptools.build_meta': handle_setuptools,
             'setuptools.build_meta:__legacy__': handle_setuptools}
+
+
+def get_resolvers():
+    """
+    Return build-backend mapping of metadata resolvers for setuptools.
+    The metadata is provided by setup.py, so it can not be resolved
+    statically.
+    """
+
+    return {}
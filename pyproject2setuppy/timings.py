@@ -0,0 +1,206 @@
+# pyproject2setup.py -- phase timing instrumentation
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+from pyproject2setuppy.counters import (counted_copies, diff_counters,
+                                        get_counters)
+
+
+# timings are enabled by setting the output file ('-' for stderr)
+TIMINGS_ENV = 'PYPROJECT2SETUPPY_TIMINGS'
+
+if hasattr(time, 'perf_counter'):
+    wall_clock = time.perf_counter
+    cpu_clock = time.process_time
+else:
+    wall_clock = time.time
+    cpu_clock = time.clock
+
+# objects notified about phases, see phase()
+RECORDERS = []
+
+_local = threading.local()
+
+
+def get_phase_stack():
+    """Get the stack of phases currently running in this thread."""
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Mark the code run in the context as phase name.  Phases can be
+    nested.  Each recorder in RECORDERS has its enter(name) method
+    called when the phase starts, and exit(name, parent, depth, state)
+    when it finishes, where state is the value returned by enter().
+    If there are no recorders, this is a no-op.
+    """
+    if not RECORDERS:
+        yield
+        return
+
+    stack = get_phase_stack()
+    parent = stack[-1] if stack else None
+    states = [(r, r.enter(name)) for r in list(RECORDERS)]
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+        for r, state in reversed(states):
+            r.exit(name, parent, len(stack), state)
+
+
+def timed(name):
+    """Decorator running the function as phase name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Timings(object):
+    """
+    Recorder of wall clock and CPU time spent in each phase, and I/O
+    counters increased in it.  CPU time and counters cover the whole
+    process, including other threads.
+    """
+
+    def __init__(self):
+        self.root = os.getcwd()
+        self.start = wall_clock()
+        self.records = []
+
+    def enter(self, name):
+        return wall_clock(), cpu_clock(), get_counters()
+
+    def exit(self, name, parent, depth, state):
+        wall, cpu, counters = state
+        self.records.append({
+            'project': self.root,
+            'phase': name,
+            'parent': parent,
+            'depth': depth,
+            'start': wall - self.start,
+            'wall': wall_clock() - wall,
+            'cpu': cpu_clock() - cpu,
+            'io': diff_counters(counters, get_counters()),
+        })
+
+    def write(self, f):
+        """Write the records to file f as JSON lines."""
+        for r in self.records:
+            f.write(json.dumps(r, sort_keys=True) + '\n')
+
+
+@contextlib.contextmanager
+def timed_commands():
+    """
+    Record each setuptools command run in the context as a separate
+    'command:<name>' phase.
+    """
+    from setuptools.dist import Distribution
+
+    run_command = Distribution.run_command
+
+    def timed_run_command(self, command):
+        with phase('command:' + command):
+            return run_command(self, command)
+
+    Distribution.run_command = timed_run_command
+    try:
+        yield
+    finally:
+        Distribution.run_command = run_command
+
+
+@contextlib.contextmanager
+def instrumented():
+    """
+    Run the context as the 'main' phase, with setuptools commands
+    recorded as separate phases and files copied by them counted.
+    If there are no recorders, this is a no-op.
+    """
+    if not RECORDERS:
+        yield
+        return
+
+    with timed_commands():
+        with counted_copies():
+            with phase('main'):
+                yield
+
+
+@contextlib.contextmanager
+def record_timings(output):
+    """
+    Record timings of phases run in the context, and append them
+    to file at path output ('-' for stderr) afterwards.  Yields
+    the Timings instance, or None if output is None.  The instrumented
+    code needs to be run in instrumented() context.
+    """
+    if output is None:
+        yield None
+        return
+
+    timings = Timings()
+    RECORDERS.append(timings)
+    try:
+        yield timings
+    finally:
+        RECORDERS.remove(timings)
+        if output == '-':
+            timings.write(sys.stderr)
+        else:
+            with open(output, 'a') as f:
+                timings.write(f)
+
+
+def pop_output_option(args, option, env):
+    """
+    Remove option (e.g. '--timings') with an optional output path
+    value from command-line args.  Returns the output path ('-'
+    for stderr if no value was specified), falling back to the value
+    of environment variable env, or None if neither is set.
+    """
+    ret = None
+    out = []
+    for x in args:
+        if x == option:
+            ret = '-'
+        elif x.startswith(option + '='):
+            ret = x.split('=', 1)[1]
+        else:
+            out.append(x)
+    args[:] = out
+    if ret is None:
+        ret = os.environ.get(env) or None
+    return ret
+
+
+def pop_timings_option(args):
+    """
+    Remove --timings or --timings=PATH option from command-line
+    args.  Returns the output path ('-' for stderr), falling back
+    to the value of TIMINGS_ENV, or None if timings are not enabled.
+    """
+    return pop_output_option(args, '--timings', TIMINGS_ENV)
@@ -0,0 +1,443 @@
+# pyproject2setup.py -- incremental rebuilds on source changes
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import os
+import os.path
+import select
+import shutil
+import struct
+import sys
+import time
+
+from pyproject2setuppy.__main__ import load_pyproject
+from pyproject2setuppy.common import ResolveCache, scan_dir
+from pyproject2setuppy.counters import count
+from pyproject2setuppy.install import get_package_dir, iter_build_files
+from pyproject2setuppy.resolve import resolve
+
+
+# from linux/inotify.h
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+              | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+if sys.version_info >= (3,):
+    fsencode = os.fsencode
+    fsdecode = os.fsdecode
+else:
+    def fsencode(path):
+        return path
+
+    def fsdecode(path):
+        return path
+
+# time to wait for more events after the first one, in seconds
+DEBOUNCE_DELAY = 0.1
+
+
+def get_watch_dirs(spec, root='.'):
+    """
+    Get directories to watch for changes to project with setup()
+    arguments spec in root.  Returns a sorted list of (absolute path,
+    recursive) tuples.  Package directories are watched recursively,
+    the top directory (for pyproject.toml) and the top-level module
+    directory non-recursively.
+    """
+    dirs = {os.path.abspath(root): False}
+    if spec.get('py_modules'):
+        path = os.path.abspath(os.path.join(
+            root, spec.get('package_dir', {}).get('', '')))
+        dirs.setdefault(path, False)
+    pkgdirs = sorted(set(os.path.abspath(os.path.join(
+        root, get_package_dir(spec, p))) for p in spec.get('packages', [])))
+    for path in pkgdirs:
+        # subpackages are covered by the parent directory
+        if not any(path.startswith(os.path.join(x, ''))
+                   for x, recursive in dirs.items() if recursive):
+            dirs[path] = True
+    return sorted(dirs.items())
+
+
+def inotify_supported():
+    """Check whether inotify can be used via ctypes."""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return False
+    return hasattr(libc, 'inotify_init1')
+
+
+class InotifyWatcher(object):
+    """
+    Watch directories for changes using Linux inotify API, called
+    via ctypes.  Recursive watches are extended to subdirectories
+    created while watching.
+    """
+
+    def __init__(self, dirs):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'),
+                                use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        self.watches = {}
+        try:
+            for path, recursive in dirs:
+                self.add(path, recursive)
+        except OSError:
+            self.close()
+            raise
+
+    def add(self, path, recursive=False, found=None):
+        """
+        Start watching directory at path.  If found is not None,
+        paths of files already present in the watched directories
+        are added to it, as they could have been created before
+        the watch.
+        """
+        wd = self.libc.inotify_add_watch(self.fd, fsencode(path),
+                                         WATCH_MASK)
+        if wd < 0:
+            e = ctypes.get_errno()
+            # the directory could have been removed in the meantime
+            if e in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(e, os.strerror(e), path)
+        self.watches[wd] = (path, recursive)
+        if recursive:
+            try:
+                dirs, files, _ = scan_dir(path)
+            except OSError:
+                return
+            if found is not None:
+                found.update(os.path.join(path, f) for f in files)
+            for d in dirs:
+                self.add(os.path.join(path, d), True, found)
+
+    def wait(self, timeout=None):
+        """
+        Wait up to timeout seconds (indefinitely if None) for changes.
+        Returns a set of changed paths (empty on timeout), or None
+        if events were lost and everything needs to be rescanned.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        buf = os.read(self.fd, 65536)
+        ret = set()
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, pos)
+            pos += EVENT_HEADER.size
+            name = buf[pos:pos + length].rstrip(b'\0')
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches:
+                continue
+            dirpath, recursive = self.watches[wd]
+            if not name:
+                ret.add(dirpath)
+                continue
+            path = os.path.join(dirpath, fsdecode(name))
+            ret.add(path)
+            if (recursive and mask & IN_ISDIR
+                    and mask & (IN_CREATE | IN_MOVED_TO)):
+                self.add(path, True, ret)
+        return ret
+
+    def close(self):
+        """Stop watching and close the inotify descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher(object):
+    """
+    Watch directories for changes by comparing modification times
+    and sizes of their contents every interval seconds.  Used where
+    inotify is not available.
+    """
+
+    def __init__(self, dirs, interval=1.0):
+        self.dirs = list(dirs)
+        self.interval = interval
+        self.state = self.snapshot()
+
+    def snapshot(self):
+        """
+        Get a dict mapping paths of all files in watched directories
+        to their (mtime, size) tuples.
+        """
+        ret = {}
+        stack = list(self.dirs)
+        while stack:
+            path, recursive = stack.pop()
+            try:
+                dirs, files, _ = scan_dir(path)
+            except OSError:
+                continue
+            for name in files:
+                full = os.path.join(path, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                ret[full] = (st.st_mtime, st.st_size)
+            if recursive:
+                stack.extend((os.path.join(path, d), True) for d in dirs)
+        return ret
+
+    def wait(self, timeout=None):
+        """
+        Wait up to timeout seconds (indefinitely if None) for changes.
+        Returns a set of changed paths (empty on timeout).
+        """
+        start = time.time()
+        while True:
+            time.sleep(self.interval if timeout is None
+                       else min(self.interval, timeout))
+            state = self.snapshot()
+            ret = set(k for k in set(state) | set(self.state)
+                      if state.get(k) != self.state.get(k))
+            self.state = state
+            if ret or (timeout is not None
+                       and time.time() - start >= timeout):
+                return ret
+
+    def close(self):
+        """Stop watching."""
+        pass
+
+
+def is_ignored(path):
+    """
+    Check whether changes to path can be ignored, as it is hidden
+    or a bytecode cache, and therefore not matched by package_data.
+    """
+    return any(x.startswith('.') or x == '__pycache__'
+               for x in path.split(os.path.sep))
+
+
+def open_watcher(dirs, poll=False, interval=1.0):
+    """
+    Start watching directories in dirs, as returned by get_watch_dirs().
+    Uses inotify if supported and poll is False, falling back
+    to polling every interval seconds.
+    """
+    if not poll and inotify_supported():
+        try:
+            return InotifyWatcher(dirs)
+        except OSError:
+            # e.g. out of watches
+            pass
+    return PollingWatcher(dirs, interval)
+
+
+class WatchBuild(object):
+    """
+    Incremental build of the project in root into build_lib.
+    The resolved setup() arguments are kept in memory, and only
+    the files that changed are copied.  The project is resolved again
+    only if pyproject.toml changes, or files are added to or removed
+    from the package directories.
+    """
+
+    def __init__(self, root='.', build_lib=os.path.join('build', 'lib')):
+        self.root = root
+        self.build_lib = build_lib
+        self.data = None
+        self.spec = None
+        # absolute source path -> destination relative to build_lib
+        self.files = {}
+        self.built = set()
+
+    def resolve(self, data=None):
+        """
+        Resolve the project, using pyproject.toml unserialized into data
+        if specified, or reloading it otherwise.
+        """
+        if data is None:
+            data = load_pyproject(self.root)
+        self.data = data
+        # directory listings are not valid after changes
+        self.spec = resolve(data, ResolveCache(), root=self.root)
+        self.files = dict((os.path.abspath(os.path.join(self.root, src)),
+                           dest)
+                          for src, dest in iter_build_files(self.spec,
+                                                            self.root))
+
+    def copy(self, src):
+        """
+        Copy source file src into the build directory, unless
+        the built copy is up-to-date.  Returns True if it was copied.
+        """
+        dest = os.path.join(self.build_lib, self.files[src])
+        count('stat_calls', 2)
+        try:
+            st = os.stat(src)
+        except OSError:
+            return False
+        try:
+            dst = os.stat(dest)
+        except OSError:
+            pass
+        else:
+            if (dst.st_mtime, dst.st_size) == (st.st_mtime, st.st_size):
+                return False
+        if not os.path.isdir(os.path.dirname(dest)):
+            os.makedirs(os.path.dirname(dest))
+        shutil.copy2(src, dest)
+        count('files_copied')
+        count('bytes_copied', st.st_size)
+        return True
+
+    def sync(self):
+        """
+        Update the build directory to match the resolved files,
+        removing files that are no longer part of the build.
+        Returns the sorted list of copied destination paths.
+        """
+        copied = sorted(self.files[src] for src in self.files
+                        if self.copy(src))
+        built = set(self.files.values())
+        for dest in sorted(self.built - built):
+            path = os.path.join(self.build_lib, dest)
+            if os.path.lexists(path):
+                os.unlink(path)
+        self.built = built
+        return copied
+
+    def needs_resolve(self, changed):
+        """
+        Check whether changed paths (as returned by the watcher) require
+        resolving the project again.
+        """
+        if changed is None:
+            return True
+        pyproject = os.path.abspath(os.path.join(self.root,
+                                                 'pyproject.toml'))
+        pkgdirs = [os.path.join(path, '')
+                   for path, recursive in get_watch_dirs(self.spec,
+                                                         self.root)
+                   if recursive]
+        for path in changed:
+            if path == pyproject:
+                return True
+            if path in self.files:
+                # removed or replaced by a directory
+                if not os.path.isfile(path):
+                    return True
+            elif any(path.startswith(x) for x in pkgdirs):
+                # new file, or directory with files; paths that are
+                # already gone are temporary files
+                if is_ignored(os.path.relpath(path, self.root)):
+                    continue
+                if (os.path.isfile(path)
+                        or (os.path.isdir(path) and os.listdir(path))):
+                    return True
+        return False
+
+    def update(self, changed):
+        """
+        Update the build directory after changes to paths in changed
+        (None meaning unknown).  Returns a tuple of (sorted list
+        of copied destination paths, whether the project was resolved
+        again).
+        """
+        if self.needs_resolve(changed):
+            self.resolve()
+            return self.sync(), True
+        return sorted(self.files[src] for src in changed
+                      if src in self.files and self.copy(src)), False
+
+
+def watch_command(data, args):
+    """
+    Native 'watch' command, repeating a command whenever the project
+    sources change.  Currently only 'build' is supported.
+    """
+    argp = argparse.ArgumentParser(prog='setup.py watch')
+    argp.add_argument('-b', '--build-lib',
+                      default=os.path.join('build', 'lib'),
+                      help='Build directory (default: build/lib)')
+    argp.add_argument('--poll', action='store_true',
+                      help='Poll for changes instead of using inotify')
+    argp.add_argument('--interval', type=float, default=1.0,
+                      help='Polling interval in seconds (default: 1)')
+    argp.add_argument('command', choices=('build',),
+                      help='Command to repeat')
+    opts = argp.parse_args(args)
+
+    builder = WatchBuild(build_lib=opts.build_lib)
+    builder.resolve(data)
+    print('built {} files in {}'.format(len(builder.sync()),
+                                        opts.build_lib))
+    sys.stdout.flush()
+
+    watcher = open_watcher(get_watch_dirs(builder.spec), opts.poll,
+                           opts.interval)
+    try:
+        while True:
+            changed = watcher.wait()
+            if changed is not None and not changed:
+                continue
+            # editors often produce a burst of events for one save
+            while changed is not None:
+                more = watcher.wait(DEBOUNCE_DELAY)
+                if more is None:
+                    changed = None
+                elif not more:
+                    break
+                else:
+                    changed.update(more)
+            copied, resolved = builder.update(changed)
+            if resolved:
+                watcher.close()
+                watcher = open_watcher(get_watch_dirs(builder.spec),
+                                       opts.poll, opts.interval)
+            for dest in copied:
+                print('copying {}'.format(dest))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def get_commands():
+    """
+    Return native command mapping for watch mode.
+    """
+
+    return {'watch': watch_command}
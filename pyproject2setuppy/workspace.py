@@ -0,0 +1,279 @@
+# pyproject2setup.py -- monorepo workspace builds
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+from __future__ import absolute_import
+
+import argparse
+import multiprocessing
+import os
+import os.path
+import re
+import subprocess
+import sys
+import threading
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+import pyproject2setuppy
+from pyproject2setuppy.__main__ import load_pyproject
+from pyproject2setuppy.launcher import is_supported, Launcher
+
+
+REQUIREMENT_NAME_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+# directories never containing workspace projects
+SKIP_DIRS = frozenset(('__pycache__', 'build', 'dist', 'node_modules'))
+
+
+def canonical_name(name):
+    """Normalize project name, per PEP 503."""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def discover_projects(topdir='.'):
+    """
+    Find all directories containing pyproject.toml under topdir.
+    Hidden directories, and build and cache directories are skipped.
+    Returns a sorted list of paths relative to topdir.
+    """
+    ret = []
+    for dirpath, dirs, files in os.walk(topdir):
+        dirs[:] = [x for x in dirs if not x.startswith('.')
+                   and x not in SKIP_DIRS and not x.endswith('.egg-info')]
+        if 'pyproject.toml' in files:
+            ret.append(os.path.normpath(os.path.relpath(dirpath, topdir)))
+    return sorted(ret)
+
+
+def get_project_name(data):
+    """
+    Get the name of the project in pyproject.toml unserialized into
+    data, or None if it can not be determined statically.
+    """
+    tool = data.get('tool', {})
+    if 'name' in data.get('project', {}):
+        return data['project']['name']
+    if 'name' in tool.get('poetry', {}):
+        return tool['poetry']['name']
+    flit = tool.get('flit', {}).get('metadata', {})
+    return flit.get('dist-name', flit.get('module'))
+
+
+def get_requirements(data):
+    """
+    Get names of all build and runtime requirements of the project
+    in pyproject.toml unserialized into data.
+    """
+    reqs = list(data.get('build-system', {}).get('requires', []))
+    project = data.get('project', {})
+    reqs.extend(project.get('dependencies', []))
+    for extra in project.get('optional-dependencies', {}).values():
+        reqs.extend(extra)
+    flit = data.get('tool', {}).get('flit', {}).get('metadata', {})
+    reqs.extend(flit.get('requires', []))
+    for extra in flit.get('requires-extra', {}).values():
+        reqs.extend(extra)
+
+    ret = set()
+    for r in reqs:
+        m = REQUIREMENT_NAME_RE.match(r)
+        if m is not None:
+            ret.add(m.group(1))
+    poetry = data.get('tool', {}).get('poetry', {})
+    for key in ('dependencies', 'dev-dependencies'):
+        ret.update(x for x in poetry.get(key, {}) if x != 'python')
+    return ret
+
+
+def get_dependency_graph(topdir, projects):
+    """
+    Get internal dependencies between projects (paths relative
+    to topdir).  Returns a dict mapping each project to the set
+    of projects it depends on.
+    """
+    data = dict((p, load_pyproject(os.path.join(topdir, p)))
+                for p in projects)
+    names = {}
+    for p in projects:
+        name = get_project_name(data[p])
+        if name is None:
+            continue
+        name = canonical_name(name)
+        if name in names:
+            raise ValueError('Project {} found in both {} and {}'
+                             .format(name, names[name], p))
+        names[name] = p
+
+    return dict((p, set(names[canonical_name(r)]
+                        for r in get_requirements(data[p])
+                        if canonical_name(r) in names) - set([p]))
+                for p in projects)
+
+
+def get_build_order(graph):
+    """
+    Sort projects in graph (as returned by get_dependency_graph())
+    topologically.  Returns a list of lists, each listing projects that
+    can be built in parallel once the preceding ones are built.
+    Raises ValueError on dependency cycles.
+    """
+    pending = dict((p, set(deps)) for p, deps in graph.items())
+    ret = []
+    while pending:
+        ready = sorted(p for p, deps in pending.items() if not deps)
+        if not ready:
+            raise ValueError('Dependency cycle between projects: {}'
+                             .format(', '.join(sorted(pending))))
+        for p in ready:
+            del pending[p]
+        for deps in pending.values():
+            deps.difference_update(ready)
+        ret.append(ready)
+    return ret
+
+
+def run_project(root, args):
+    """
+    Run pyproject2setuppy with command-line args in project directory
+    root in a subprocess.  Returns a tuple of (exit status, output).
+    """
+    env = dict(os.environ)
+    # make sure the children use the same pyproject2setuppy
+    pkgroot = os.path.dirname(os.path.dirname(os.path.abspath(
+        pyproject2setuppy.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [pkgroot] + [x for x in [env.get('PYTHONPATH')] if x])
+    p = subprocess.Popen([sys.executable, '-m', 'pyproject2setuppy'] + args,
+                         cwd=root, env=env, stdout=subprocess.PIPE,
+                         stderr=subprocess.STDOUT)
+    output, _ = p.communicate()
+    return p.returncode, output.decode('utf8', 'replace')
+
+
+def run_workspace(topdir, graph, args, jobs=None, runner=run_project,
+                  callback=None):
+    """
+    Run command-line args for all projects in graph (as returned
+    by get_dependency_graph()) using runner, up to jobs at a time
+    (defaulting to the CPU count).  Each project is started as soon
+    as all its dependencies have finished successfully.  Projects
+    depending on failed ones are skipped.  callback is called with
+    (project, exit status, output) as each project finishes.  Returns
+    a dict mapping projects to their exit statuses, or None if they
+    were skipped.
+    """
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    get_build_order(graph)  # check for cycles
+    pending = dict((p, set(deps)) for p, deps in graph.items())
+    dependents = dict((p, set()) for p in graph)
+    for p, deps in graph.items():
+        for d in deps:
+            dependents[d].add(p)
+
+    results = {}
+    done = Queue()
+    running = 0
+    ready = sorted(p for p, deps in pending.items() if not deps)
+
+    def worker(project):
+        try:
+            status, output = runner(os.path.join(topdir, project), args)
+        except Exception as e:
+            status, output = 1, str(e)
+        done.put((project, status, output))
+
+    while ready or running:
+        while ready and running < jobs:
+            t = threading.Thread(target=worker, args=(ready.pop(0),))
+            t.daemon = True
+            t.start()
+            running += 1
+
+        project, status, output = done.get()
+        running -= 1
+        results[project] = status
+        if callback is not None:
+            callback(project, status, output)
+        if status != 0:
+            # skip all projects depending on the failed one
+            skipped = list(dependents[project])
+            while skipped:
+                p = skipped.pop()
+                if p not in results:
+                    results[p] = None
+                    skipped.extend(dependents[p])
+            continue
+        for p in sorted(dependents[project]):
+            pending[p].discard(project)
+            if not pending[p] and p not in results:
+                ready.append(p)
+
+    return results
+
+
+def workspace_command(args):
+    """
+    Global 'workspace' command, running a command for all projects
+    in a directory tree in dependency order.
+    """
+    argp = argparse.ArgumentParser(prog='setup.py workspace')
+    argp.add_argument('-d', '--directory', default='.',
+                      help='Top directory of the workspace (default: .)')
+    argp.add_argument('-j', '--jobs', type=int,
+                      help='Number of projects to process in parallel '
+                           '(default: CPU count)')
+    argp.add_argument('--launcher', choices=('forkserver', 'subprocess'),
+                      default=('forkserver' if is_supported()
+                               else 'subprocess'),
+                      help='How to start per-project processes: fork '
+                           'them from a template process with preloaded '
+                           'modules, or start a new interpreter for each '
+                           '(default: forkserver if supported)')
+    argp.add_argument('--list', action='store_true',
+                      help='Print the build order and exit')
+    argp.add_argument('command', nargs=argparse.REMAINDER,
+                      help='Command to run for every project '
+                           '(default: build)')
+    opts = argp.parse_args(args)
+
+    graph = get_dependency_graph(opts.directory,
+                                 discover_projects(opts.directory))
+    if opts.list:
+        for i, batch in enumerate(get_build_order(graph)):
+            for p in batch:
+                print('{}\t{}'.format(i, p))
+        return
+
+    def report(project, status, output):
+        print('=== {} ({}) ==='.format(
+            project, 'ok' if status == 0 else 'failed'))
+        sys.stdout.write(output)
+        sys.stdout.flush()
+
+    runner = run_project
+    if opts.launcher == 'forkserver':
+        launcher = Launcher()
+        launcher.start()
+        runner = launcher.run
+    results = run_workspace(opts.directory, graph,
+                            opts.command or ['build'], opts.jobs,
+                            runner=runner, callback=report)
+    failed = sorted(p for p, status in results.items() if status != 0)
+    for p in failed:
+        print('{}: {}'.format(p, 'skipped' if results[p] is None
+                              else 'failed'))
+    if failed:
+        sys.exit(1)
+
+
+def get_global_commands():
+    """
+    Return global command mapping for workspaces.
+    """
+
+    return {'workspace': workspace_command}
@@ -199,7 +199,7 @@ class BuildSystemTestCase(object):
         """
 
         metadata = toml.loads(self.toml_base + self.toml_extra)
-        with patch(self.handler.__module__ + '.setup') as mock_setup:
+        with patch('setuptools.setup') as mock_setup:
             with self.make_package():
                 if self.run_handler(metadata):
                     expected = self.expected_base.copy()
@@ -222,10 +222,49 @@ class BuildSystemTestCase(object):
                 self.assertEqual(sorted(find_all_pkg_files(build_dir)),
                                  sorted(self.make_expected(expected)))
 
+    def test_plan(self):
+        """
+        Test the install plan.  Verifies that it lists the same .py
+        files as built by 'setup.py build', and that the 'install --link'
+        layout contains them along with .dist-info metadata.
+        """
+
+        from pyproject2setuppy.__main__ import get_resolvers
+        from pyproject2setuppy.install import get_install_paths
+        from pyproject2setuppy.metadata import dist_info_name
+        from pyproject2setuppy.plan import get_plan
+
+        metadata = toml.loads(self.toml_base + self.toml_extra)
+        if metadata['build-system']['build-backend'] not in get_resolvers():
+            self.skipTest('plan is not supported for this build system')
+        with self.make_package():
+            if self.expect_exception is not None:
+                with self.assertRaises(self.expect_exception):
+                    get_plan(metadata)
+                return
+
+            expected = self.expected_base.copy()
+            expected.update(self.expected_extra)
+            plan = get_plan(metadata, build_lib='', root='root')
+            self.assertEqual(sorted(x['destination'] for x in plan['build']),
+                             sorted(self.make_expected(expected)))
+
+            purelib, _ = get_install_paths('root')
+            installed = [x['destination'] for x in plan['install_link']]
+            self.assertEqual(
+                sorted(os.path.relpath(x['destination'], purelib)
+                       for x in plan['install_link']
+                       if x['source'] is not None),
+                sorted(self.make_expected(expected)))
+            distinfo = os.path.join(purelib, dist_info_name(expected))
+            for fn in ('METADATA', 'INSTALLER', 'RECORD'):
+                self.assertIn(os.path.join(distinfo, fn), installed)
+
     def test_install(self):
         """
         Test the handler with 'setup.py install' command.  Verifies that
-        correct .py files and .egg-info directory are installed.
+        correct .py files and .egg-info directory are installed,
+        and that they match the 'install' section of the plan.
         """
 
         metadata = toml.loads(self.toml_base + self.toml_extra)
@@ -245,6 +284,20 @@ class BuildSystemTestCase(object):
                          tag))
                     self.assertEqual(sorted(find_eggs(inst_dir)), [eggname])
 
+                    from pyproject2setuppy.__main__ import get_resolvers
+                    from pyproject2setuppy.plan import get_plan
+
+                    backend = metadata['build-system']['build-backend']
+                    if backend in get_resolvers():
+                        installed = []
+                        for dirpath, _, files in os.walk(dest):
+                            installed.extend(os.path.join(dirpath, x)
+                                             for x in files)
+                        plan = get_plan(metadata, root=dest)
+                        self.assertEqual(
+                            sorted(x['destination'] for x in plan['install']),
+                            sorted(installed))
+
     def test_real_build_system(self):
         """
         Perform a self-test using the upstream build backend.  Builds
@@ -0,0 +1,119 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import sys
+import unittest
+
+if sys.hexversion >= 0x03060000:
+    import asyncio
+    from pyproject2setuppy.aio import resolve_async, resolve_many_async
+
+from tests.base import TestDirectory
+
+
+FLIT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[tool.flit.metadata]
+module = "test_module"
+author = "Some Guy"
+author-email = "guy@example.com"
+'''
+
+
+def make_project(root, version):
+    """
+    Create a flit project in root, with version given as Python
+    expression.
+    """
+
+    os.mkdir(root)
+    with open(os.path.join(root, 'pyproject.toml'), 'w') as f:
+        f.write(FLIT_TOML)
+    with open(os.path.join(root, 'test_module.py'), 'w') as f:
+        f.write('''
+""" documentation. """
+__version__ = {}
+'''.format(version))
+
+
+def run(coro):
+    """Run coroutine coro in a new event loop."""
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def collect(agen):
+    """Collect all values from asynchronous generator agen."""
+
+    loop = asyncio.new_event_loop()
+    ret = []
+    try:
+        while True:
+            try:
+                ret.append(loop.run_until_complete(agen.__anext__()))
+            except StopAsyncIteration:
+                return ret
+    finally:
+        loop.close()
+
+
+@unittest.skipIf(sys.hexversion < 0x03060000, 'Python 3.6+ required')
+class ResolveAsyncTest(unittest.TestCase):
+    """
+    Test cases for the asyncio interface.
+    """
+
+    def test_static(self):
+        """Test resolving a project with static metadata."""
+
+        with TestDirectory():
+            make_project('project', "'1'")
+            spec = run(resolve_async('project'))
+            self.assertEqual(spec['version'], '1')
+            self.assertEqual(spec['description'], 'documentation.')
+            self.assertEqual(spec['py_modules'], ['test_module'])
+            self.assertNotIn('test_module', sys.modules)
+
+    def test_subprocess(self):
+        """Test resolving a project needing module import."""
+
+        with TestDirectory():
+            make_project('project', "str(2)")
+            spec = run(resolve_async('project'))
+            self.assertEqual(spec['version'], '2')
+            self.assertEqual(spec['description'], 'documentation.')
+            self.assertNotIn('test_module', sys.modules)
+
+    def test_many(self):
+        """Test resolving multiple projects concurrently."""
+
+        with TestDirectory():
+            roots = ['project{}'.format(i) for i in range(5)]
+            for i, root in enumerate(roots):
+                make_project(root, 'str({})'.format(i))
+            results = collect(resolve_many_async(iter(roots), jobs=2))
+            self.assertEqual(
+                sorted((root, spec['version']) for root, spec in results),
+                [(root, str(i)) for i, root in enumerate(roots)])
+
+    def test_many_exceptions(self):
+        """Test returning exceptions from the batch driver."""
+
+        with TestDirectory():
+            make_project('good', "'1'")
+            results = dict(collect(resolve_many_async(
+                ['good', 'missing'], return_exceptions=True)))
+            self.assertEqual(results['good']['version'], '1')
+            self.assertIsInstance(results['missing'], EnvironmentError)
+            self.assertRaises(EnvironmentError, collect,
+                              resolve_many_async(['missing']))
@@ -0,0 +1,202 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import email.parser
+import glob
+import importlib
+import os
+import os.path
+import sys
+import tarfile
+import unittest
+import zipfile
+
+from pyproject2setuppy.buildapi import (build_sdist, build_wheel,
+                                        prepare_metadata_for_build_wheel)
+from pyproject2setuppy.main import main
+
+from tests.base import TestDirectory
+
+
+POETRY_TOML = '''
+[build-system]
+requires = ["pyproject2setuppy"]
+build-backend = "pyproject2setuppy.buildapi"
+
+[tool.poetry]
+name = "test-package"
+version = "1.0"
+description = "description."
+authors = ["Some Guy <guy@example.com>"]
+homepage = "https://example.com"
+classifiers = [
+    "License :: OSI Approved :: MIT License",
+]
+
+[tool.poetry.scripts]
+test-tool = "test_package:main"
+'''
+
+
+FLIT_TOML = '''
+[build-system]
+requires = ["pyproject2setuppy"]
+build-backend = "pyproject2setuppy.buildapi"
+
+[tool.pyproject2setuppy]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "test_module"
+version = "1.0.0-RC1"
+description = "description."
+authors = [{email = "guy@example.com"}]
+'''
+
+
+def make_project():
+    """Create a poetry project using pyproject2setuppy backend."""
+
+    d = TestDirectory()
+    with open('pyproject.toml', 'w') as f:
+        f.write(POETRY_TOML)
+    os.mkdir('test_package')
+    with open('test_package/__init__.py', 'w'):
+        pass
+    return d
+
+
+def parse_metadata(content):
+    """Parse core metadata into a list of headers and the body."""
+
+    msg = email.parser.Parser().parsestr(content)
+    return msg.items(), msg.get_payload()
+
+
+class BuildAPITest(unittest.TestCase):
+    """
+    Tests for the PEP 517 backend.
+    """
+
+    def test_prepare_metadata(self):
+        """Test writing metadata without scanning the tree."""
+
+        with TestDirectory() as d:
+            with open('pyproject.toml', 'w') as f:
+                f.write(POETRY_TOML)
+            # the package is missing, so scanning would fail
+            distinfo = prepare_metadata_for_build_wheel(d)
+            self.assertEqual(distinfo, 'test_package-1.0.dist-info')
+            with open(os.path.join(distinfo, 'METADATA')) as f:
+                self.assertEqual(f.read(), '''Metadata-Version: 2.1
+Name: test-package
+Version: 1.0
+Summary: description.
+Home-page: https://example.com
+Author: Some Guy
+Author-email: guy@example.com
+Classifier: License :: OSI Approved :: MIT License
+''')
+            with open(os.path.join(distinfo, 'entry_points.txt')) as f:
+                self.assertEqual(f.read(), '''[console_scripts]
+test-tool = test_package:main
+''')
+
+    def assert_egg_info_metadata(self, d):
+        """
+        Assert that prepared metadata for project in d matches PKG-INFO
+        written by setuptools, and PKG-INFO in the native sdist.
+        """
+
+        distinfo = prepare_metadata_for_build_wheel(d)
+        with open(os.path.join(distinfo, 'METADATA')) as f:
+            metadata = f.read()
+        os.mkdir('egg-base')
+        sys.argv = ['setup.py', 'egg_info', '--egg-base', 'egg-base']
+        main()
+        pkg_info, = glob.glob('egg-base/*.egg-info/PKG-INFO')
+        with open(pkg_info) as f:
+            self.assertEqual(parse_metadata(metadata),
+                             parse_metadata(f.read()))
+
+        os.mkdir('dist')
+        fn = build_sdist('dist')
+        self.assertEqual(fn[:-len('.tar.gz')] + '.dist-info', distinfo)
+        with tarfile.open(os.path.join('dist', fn)) as tf:
+            self.assertEqual(
+                tf.extractfile(fn[:-len('.tar.gz')] + '/PKG-INFO').read()
+                .decode('utf8'), metadata)
+
+    def test_prepare_metadata_egg_info(self):
+        """Test that the metadata matches PKG-INFO from setuptools."""
+
+        with make_project() as d:
+            self.assert_egg_info_metadata(d)
+
+    def test_prepare_metadata_normalized(self):
+        """Test version normalization, empty fields and license files."""
+
+        with TestDirectory() as d:
+            with open('pyproject.toml', 'w') as f:
+                f.write(FLIT_TOML)
+            with open('test_module.py', 'w'):
+                pass
+            for fn in ('LICENSE', 'LICENSE.txt', 'LICENSE~'):
+                with open(fn, 'w'):
+                    pass
+            self.assert_egg_info_metadata(d)
+            self.assertTrue(os.path.isdir(os.path.join(
+                d, 'test_module-1.0.0rc1.dist-info')))
+
+    def test_prepare_metadata_wheel(self):
+        """Test that the metadata matches the one in the wheel."""
+
+        try:
+            importlib.import_module('wheel')
+        except ImportError:
+            self.skipTest('wheel package missing')
+        with make_project() as d:
+            os.mkdir('metadata')
+            distinfo = prepare_metadata_for_build_wheel('metadata')
+            os.mkdir('dist')
+            fn = build_wheel('dist', metadata_directory=os.path.join(
+                'metadata', distinfo))
+            with zipfile.ZipFile(os.path.join(d, 'dist', fn)) as zf:
+                for name in ('METADATA', 'entry_points.txt'):
+                    with open(os.path.join('metadata', distinfo,
+                                           name)) as f:
+                        prepared = f.read()
+                    built = zf.read(distinfo + '/' + name).decode('utf8')
+                    if name == 'METADATA':
+                        prepared = parse_metadata(prepared)
+                        built = parse_metadata(built)
+                    else:
+                        prepared = prepared.strip()
+                        built = built.strip()
+                    self.assertEqual(prepared, built)
+
+    def test_build_sdist(self):
+        """Test building a source distribution."""
+
+        with make_project() as d:
+            os.mkdir('dist')
+            fn = build_sdist('dist')
+            self.assertEqual(fn, 'test_package-1.0.tar.gz')
+            with tarfile.open(os.path.join(d, 'dist', fn)) as tf:
+                self.assertIn('test_package-1.0/test_package/__init__.py',
+                              tf.getnames())
+
+    def test_build_wheel(self):
+        """Test building a wheel."""
+
+        try:
+            importlib.import_module('wheel')
+        except ImportError:
+            self.skipTest('wheel package missing')
+        with make_project() as d:
+            os.mkdir('dist')
+            fn = build_wheel('dist')
+            self.assertTrue(fn.startswith('test_package-1.0-'))
+            with zipfile.ZipFile(os.path.join(d, 'dist', fn)) as zf:
+                self.assertIn('test_package/__init__.py', zf.namelist())
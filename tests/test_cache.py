@@ -0,0 +1,189 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import subprocess
+import sys
+import unittest
+
+try:
+    import tomli as toml
+except ImportError:
+    import toml
+
+from pyproject2setuppy.cache import BuildCache, get_cache_key
+from pyproject2setuppy.main import main
+
+from tests.base import find_all_pkg_files, patch, TestDirectory
+
+
+POETRY_TOML = '''
+[build-system]
+requires = ["poetry-core"]
+build-backend = "poetry.core.masonry.api"
+
+[tool.poetry]
+name = "test_package"
+version = "0"
+description = "description."
+authors = ["Some Guy <guy@example.com>"]
+'''
+
+
+def write_file(path, content=''):
+    """Write content to file at path, creating directories."""
+
+    if os.path.dirname(path) and not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class BuildCacheTest(unittest.TestCase):
+    """
+    Tests for the build cache.
+    """
+
+    def test_roundtrip(self):
+        """Test storing and retrieving an entry."""
+
+        with TestDirectory():
+            cache = BuildCache('cache')
+            write_file('src/a/b', 'data')
+            self.assertFalse(cache.get('key', 'dest'))
+            cache.put('key', 'src')
+            # storing the same key again is a no-op
+            cache.put('key', 'src')
+            self.assertTrue(cache.get('key', 'dest'))
+            self.assertEqual(list(find_all_pkg_files('dest')),
+                             [os.path.join('a', 'b')])
+            self.assertEqual(os.listdir('cache/tmp'), [])
+
+    def test_eviction(self):
+        """Test that least recently used entries are evicted."""
+
+        with TestDirectory():
+            cache = BuildCache('cache', max_size=25)
+            for key in ('a', 'b', 'c'):
+                write_file(os.path.join('src', key), 'x' * 10)
+                cache.put(key, 'src')
+                os.utime(cache.entry_path(key),
+                         (ord(key) * 1000, ord(key) * 1000))
+                os.unlink(os.path.join('src', key))
+            # the oldest entry was evicted once the third one was added
+            self.assertEqual(sorted(os.listdir('cache/entries')),
+                             ['b', 'c'])
+            # refresh 'b', so that 'c' is evicted next
+            self.assertTrue(cache.get('b', 'dest'))
+            write_file('src/d', 'x' * 10)
+            cache.put('d', 'src')
+            self.assertEqual(sorted(os.listdir('cache/entries')),
+                             ['b', 'd'])
+
+    def test_key(self):
+        """Test that the key depends on file contents."""
+
+        with TestDirectory():
+            data = toml.loads(POETRY_TOML)
+            spec = {'packages': ['test_package']}
+            write_file('test_package/__init__.py')
+            key = get_cache_key(data, spec, ['build'])
+            self.assertEqual(get_cache_key(data, spec, ['build']), key)
+            self.assertNotEqual(get_cache_key(data, spec, ['bdist_wheel']),
+                                key)
+            write_file('test_package/__init__.py', 'changed')
+            self.assertNotEqual(get_cache_key(data, spec, ['build']), key)
+
+    def test_no_setuptools(self):
+        """Test that the key is computed without importing setuptools."""
+
+        with TestDirectory():
+            write_file('pyproject.toml', POETRY_TOML)
+            write_file('test_package/__init__.py')
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(
+                [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+                + env.get('PYTHONPATH', '').split(os.pathsep))
+            out = subprocess.check_output([sys.executable, '-c', '''
+import sys
+import pyproject2setuppy.buildapi
+from pyproject2setuppy.__main__ import get_commands, load_pyproject
+from pyproject2setuppy.cache import get_cache_key
+from pyproject2setuppy.resolve import resolve
+get_commands()
+data = load_pyproject()
+get_cache_key(data, resolve(data), ['build'])
+print(' '.join(sorted(m for m in sys.modules
+                      if m.split('.')[0] in ('distutils', 'setuptools'))))
+'''], env=env)
+
+        self.assertEqual(out.strip(), b'')
+
+    def test_key_namespace(self):
+        """Test the key of a module inside a namespace package."""
+
+        with TestDirectory():
+            data = toml.loads(POETRY_TOML)
+            spec = {'py_modules': ['ns.mod']}
+            write_file('ns/mod.py')
+            key = get_cache_key(data, spec, ['build'])
+            write_file('ns/mod.py', 'changed')
+            self.assertNotEqual(get_cache_key(data, spec, ['build']), key)
+
+    def test_key_symlinked_data(self):
+        """Test the key of package data in a symlinked directory."""
+
+        with TestDirectory():
+            data = toml.loads(POETRY_TOML + '''
+[tool.pyproject2setuppy]
+follow-symlinks = "always"
+''')
+            spec = {'packages': ['test_package']}
+            write_file('test_package/__init__.py')
+            write_file('shared/d/y.txt')
+            os.symlink('../shared/d', 'test_package/data')
+            key = get_cache_key(data, spec, ['build'])
+            write_file('test_package/data/y.txt', 'changed')
+            self.assertNotEqual(get_cache_key(data, spec, ['build']), key)
+
+    def test_build_command(self):
+        """Test that cached build/lib is reused by 'build' command."""
+
+        with TestDirectory() as d:
+            write_file('pyproject.toml', POETRY_TOML)
+            write_file('test_package/__init__.py')
+            write_file('test_package/data.txt')
+            environ = {'PYPROJECT2SETUPPY_CACHE_DIR':
+                       os.path.join(d, 'cache')}
+            with patch.dict(os.environ, environ):
+                sys.argv = ['setup.py', 'build', '--build-lib', 'out1']
+                main()
+                with patch('setuptools.setup') as mock_setup:
+                    sys.argv = ['setup.py', 'build', '--build-lib=out2']
+                    main()
+                    self.assertFalse(mock_setup.called)
+            self.assertEqual(sorted(find_all_pkg_files('out2')),
+                             [os.path.join('test_package', '__init__.py'),
+                              os.path.join('test_package', 'data.txt')])
+
+    def test_build_stale(self):
+        """Test that stale files in build/lib are not cached."""
+
+        with TestDirectory() as d:
+            write_file('pyproject.toml', POETRY_TOML)
+            write_file('test_package/__init__.py')
+            write_file('build/lib/stale.py')
+            environ = {'PYPROJECT2SETUPPY_CACHE_DIR':
+                       os.path.join(d, 'cache')}
+            with patch.dict(os.environ, environ):
+                sys.argv = ['setup.py', 'build']
+                main()
+                self.assertEqual(sorted(find_all_pkg_files('build/lib')),
+                                 ['stale.py',
+                                  os.path.join('test_package', '__init__.py')])
+                sys.argv = ['setup.py', 'build', '--build-lib=out']
+                main()
+            self.assertEqual(sorted(find_all_pkg_files('out')),
+                             [os.path.join('test_package', '__init__.py')])
@@ -3,11 +3,18 @@
 # 2-clause BSD license
 
 import os
+import sys
 import unittest
 
-from pyproject2setuppy.common import auto_find_packages
+from pyproject2setuppy.common import (auto_find_packages, collapse_data_dirs,
+                                      find_package_data, find_packages,
+                                      get_dynamic_metadata,
+                                      get_follow_symlinks,
+                                      iter_package_data, PackageDataDir,
+                                      ResolveCache, supports_recursive_globs)
+from pyproject2setuppy.install import iter_build_files
 
-from tests.base import TestDirectory
+from tests.base import TestDirectory, patch
 
 
 class AutoFindPackagesTest(unittest.TestCase):
@@ -47,3 +54,432 @@ class AutoFindPackagesTest(unittest.TestCase):
             self.assertEqual(
                     auto_find_packages('test_package'),
                     {'packages': ['test_package', 'test_package.subpackage']})
+
+    def test_package_root(self):
+        """ Test finding a package in another directory. """
+
+        with TestDirectory():
+            os.makedirs('project/src/test_package')
+            with open('project/src/test_package/__init__.py', 'w'):
+                pass
+            self.assertEqual(
+                    auto_find_packages('test_package', 'src',
+                                       root='project'),
+                    {'packages': ['test_package'],
+                     'package_dir': {'': 'src'}})
+            self.assertRaises(RuntimeError, auto_find_packages,
+                              'test_package', root='project')
+            self.assertEqual(
+                    auto_find_packages('test_package', ('.', 'src'),
+                                       root='project'),
+                    {'packages': ['test_package'],
+                     'package_dir': {'': 'src'}})
+
+    def test_namespace(self):
+        """ Test finding packages inside a PEP 420 namespace. """
+
+        with TestDirectory():
+            for subdir in ('ns/test_package', 'ns/test_package/sub'):
+                os.makedirs(subdir)
+                with open('{}/__init__.py'.format(subdir), 'w'):
+                    pass
+            with open('ns/test_module.py', 'w'):
+                pass
+            self.assertEqual(
+                    auto_find_packages('ns.test_package'),
+                    {'packages': ['ns.test_package',
+                                  'ns.test_package.sub']})
+            self.assertEqual(
+                    auto_find_packages('ns.test_module'),
+                    {'py_modules': ['ns.test_module']})
+            self.assertRaises(RuntimeError, auto_find_packages,
+                              'ns.missing')
+
+
+class FindPackagesTest(unittest.TestCase):
+    """
+    Test cases for find_packages() function.
+    """
+
+    def make_tree(self):
+        for subdir in ('pkg', 'pkg/b', 'pkg/a', 'pkg/a/x', 'pkg/data/c',
+                       'pkg/no.pkg', 'pkg_other', 'other'):
+            os.makedirs(subdir)
+            if subdir != 'pkg/data':
+                with open('{}/__init__.py'.format(subdir), 'w'):
+                    pass
+
+    def test_find_packages(self):
+        """ Test finding a package in depth-first order. """
+
+        with TestDirectory():
+            self.make_tree()
+            self.assertEqual(find_packages('.', 'pkg'),
+                             ['pkg', 'pkg.a', 'pkg.a.x', 'pkg.b'])
+
+    def test_glob(self):
+        """ Test finding packages matching a glob. """
+
+        with TestDirectory():
+            self.make_tree()
+            self.assertEqual(find_packages('.', 'pkg*'),
+                             ['pkg', 'pkg.a', 'pkg.a.x', 'pkg.b',
+                              'pkg_other'])
+
+    def test_missing(self):
+        """ Test that missing packages are not reported. """
+
+        with TestDirectory():
+            self.make_tree()
+            self.assertEqual(find_packages('.', 'missing'), [])
+            self.assertEqual(find_packages('pkg', 'data'), [])
+
+    def test_namespace(self):
+        """ Test finding packages in a namespace path. """
+
+        with TestDirectory():
+            self.make_tree()
+            os.makedirs('ns/sub/unrelated')
+            os.rename('pkg', 'ns/sub/pkg')
+            cache = ResolveCache()
+            self.assertEqual(find_packages('.', 'ns/sub/pkg', cache),
+                             ['ns.sub.pkg', 'ns.sub.pkg.a', 'ns.sub.pkg.a.x',
+                              'ns.sub.pkg.b'])
+            self.assertEqual(find_packages('.', 'ns/sub/p*', cache),
+                             ['ns.sub.pkg', 'ns.sub.pkg.a', 'ns.sub.pkg.a.x',
+                              'ns.sub.pkg.b'])
+            self.assertEqual(find_packages('.', 'ns/missing/pkg', cache), [])
+            # only the declared namespace path is listed
+            self.assertNotIn(os.path.abspath('.'), cache.listings)
+            self.assertNotIn(os.path.abspath('ns/sub/unrelated'),
+                             cache.listings)
+
+    def test_no_setuptools(self):
+        """ Test that resolving packages does not import setuptools. """
+
+        with TestDirectory():
+            self.make_tree()
+            for k in list(sys.modules):
+                if (k.split('.')[0] in ('setuptools', 'pyproject2setuppy')
+                        and k != 'pyproject2setuppy'):
+                    del sys.modules[k]
+            from pyproject2setuppy.common import auto_find_packages
+            auto_find_packages('pkg')
+            self.assertNotIn('setuptools', sys.modules)
+
+
+class FindPackageDataTest(unittest.TestCase):
+    """
+    Test cases for find_package_data() function.
+    """
+
+    def test_root(self):
+        """ Test finding data in another directory. """
+
+        with TestDirectory():
+            os.makedirs('project/test_package/data/sub')
+            with open('project/test_package/__init__.py', 'w'):
+                pass
+            self.assertEqual(
+                    find_package_data(['test_package'], root='project'),
+                    {'': ['*'],
+                     'test_package': ['data/*', 'data/sub/*']})
+
+    def test_listings_not_kept(self):
+        """ Test that listings of walked directories are not cached. """
+
+        with TestDirectory():
+            os.makedirs('test_package/data/sub')
+            os.makedirs('test_package/sub/data')
+            with open('test_package/__init__.py', 'w'):
+                pass
+            with open('test_package/sub/__init__.py', 'w'):
+                pass
+            cache = ResolveCache()
+            self.assertEqual(
+                    find_packages('.', 'test_package', cache),
+                    ['test_package', 'test_package.sub'])
+            self.assertEqual(
+                    find_package_data(['test_package', 'test_package.sub'],
+                                      cache=cache),
+                    {'': ['*'],
+                     'test_package': ['data/*', 'data/sub/*', 'sub/data/*'],
+                     'test_package.sub': ['data/*']})
+            self.assertEqual(cache.listings, {})
+
+    def test_duplicate_package(self):
+        """ Test that the globs are not duplicated. """
+
+        with TestDirectory():
+            os.makedirs('test_package/data')
+            with open('test_package/__init__.py', 'w'):
+                pass
+            for collapse in (False, True):
+                with patch('pyproject2setuppy.common.supports_recursive_globs',
+                           return_value=collapse):
+                    self.assertEqual(
+                            find_package_data(['test_package',
+                                               'test_package']),
+                            {'': ['*'],
+                             'test_package': ['data/*']})
+
+
+class GetDynamicMetadataTest(unittest.TestCase):
+    """
+    Test cases for get_dynamic_metadata() function.
+    """
+
+    def test_static(self):
+        """ Test getting metadata without importing the module. """
+
+        with TestDirectory():
+            os.makedirs('project/src')
+            with open('project/src/test_module.py', 'w') as f:
+                f.write('''
+"""
+Multiline
+documentation.
+"""
+__version__ = '1.2'
+raise RuntimeError('module must not be imported')
+''')
+            self.assertEqual(
+                    get_dynamic_metadata('test_module', 'project'),
+                    {'version': '1.2',
+                     'description': 'Multiline documentation.'})
+
+    def test_import(self):
+        """ Test getting metadata by importing the module. """
+
+        with TestDirectory():
+            os.makedirs('project/test_module')
+            with open('project/test_module/__init__.py', 'w') as f:
+                f.write('''
+""" documentation. """
+from test_module.version import __version__
+''')
+            with open('project/test_module/version.py', 'w') as f:
+                f.write('''
+__version__ = '.'.join(['1', '3'])
+''')
+            saved_path = list(sys.path)
+            self.assertEqual(
+                    get_dynamic_metadata('test_module', 'project'),
+                    {'version': '1.3',
+                     'description': 'documentation.'})
+            self.assertEqual(sys.path, saved_path)
+            self.assertNotIn('test_module', sys.modules)
+            self.assertNotIn('test_module.version', sys.modules)
+
+    def test_import_keeps_other_modules(self):
+        """ Test that only modules from the project are removed. """
+
+        with TestDirectory():
+            os.makedirs('project/test_module')
+            with open('project/test_module/__init__.py', 'w') as f:
+                f.write('''
+import colorsys
+from _test_module_version import __version__
+''')
+            with open('project/_test_module_version.py', 'w') as f:
+                f.write('''
+__version__ = '.'.join(['1', '5'])
+''')
+            sys.modules.pop('colorsys', None)
+            self.assertEqual(
+                    get_dynamic_metadata('test_module', 'project'),
+                    {'version': '1.5',
+                     'description': None})
+            self.assertIn('colorsys', sys.modules)
+            self.assertNotIn('test_module', sys.modules)
+            self.assertNotIn('_test_module_version', sys.modules)
+
+    def test_import_no_docstring(self):
+        """ Test importing only for the values not found statically. """
+
+        with TestDirectory():
+            os.makedirs('project')
+            with open('project/test_module.py', 'w') as f:
+                f.write('''
+__version__ = '.'.join(['1', '4'])
+''')
+            self.assertEqual(
+                    get_dynamic_metadata('test_module', 'project'),
+                    {'version': '1.4',
+                     'description': None})
+
+
+class IterPackageDataTest(unittest.TestCase):
+    """
+    Test cases for iter_package_data() function.
+    """
+
+    def test_order(self):
+        """ Test that records are yielded in deterministic order. """
+
+        with TestDirectory():
+            for subdir in ('b', 'a', 'a/y', 'a/x', 'sub', 'sub/data'):
+                os.makedirs(os.path.join('test_package', subdir))
+            for pkg in ('test_package', 'test_package/sub'):
+                with open(os.path.join(pkg, '__init__.py'), 'w'):
+                    pass
+            records = iter_package_data(['test_package.sub',
+                                         'test_package'])
+            self.assertEqual(next(records),
+                             PackageDataDir('test_package.sub', 'data',
+                                            True))
+            self.assertEqual(list(records), [
+                PackageDataDir('test_package', os.path.join('a', 'x'),
+                               True),
+                PackageDataDir('test_package', os.path.join('a', 'y'),
+                               True),
+                PackageDataDir('test_package', 'a', True),
+                PackageDataDir('test_package', 'b', True),
+                PackageDataDir('test_package', os.path.join('sub', 'data'),
+                               True),
+            ])
+
+
+@unittest.skipIf(not hasattr(os, 'symlink'), 'symlinks are not supported')
+class FindPackageDataSymlinkTest(unittest.TestCase):
+    """
+    Test cases for following symlinks in find_package_data().
+    """
+
+    def make_tree(self):
+        for subdir in ('project/test_package/sub', 'project/data/a',
+                       'shared/b'):
+            os.makedirs(subdir)
+        with open('project/test_package/__init__.py', 'w'):
+            pass
+        with open('project/test_package/sub/__init__.py', 'w'):
+            pass
+        os.symlink('../../data', 'project/test_package/sub/data')
+        os.symlink('../data', 'project/test_package/data')
+        os.symlink('../../shared', 'project/test_package/shared')
+        # a loop back to the package
+        os.symlink('..', 'project/data/a/loop')
+
+    def find(self, follow_symlinks):
+        return find_package_data(['test_package', 'test_package.sub'],
+                                 root='project',
+                                 follow_symlinks=follow_symlinks)
+
+    def test_never(self):
+        """ Test that symlinks are not followed by default. """
+
+        with TestDirectory():
+            self.make_tree()
+            self.assertEqual(self.find('never'), {'': ['*']})
+
+    def test_always(self):
+        """ Test following all symlinks, skipping loops. """
+
+        with TestDirectory():
+            self.make_tree()
+            self.assertEqual(self.find('always'), {
+                '': ['*'],
+                'test_package': [
+                    'data/*', 'data/a/*', 'shared/*', 'shared/b/*',
+                    'sub/data/*', 'sub/data/a/*',
+                ],
+                'test_package.sub': ['data/*', 'data/a/*'],
+            })
+
+    def test_within_root(self):
+        """ Test following symlinks within the project only. """
+
+        with TestDirectory():
+            self.make_tree()
+            self.assertEqual(self.find('within-root'), {
+                '': ['*'],
+                'test_package': [
+                    'data/*', 'data/a/*', 'sub/data/*', 'sub/data/a/*',
+                ],
+                'test_package.sub': ['data/*', 'data/a/*'],
+            })
+
+    def test_aliases_listed_once(self):
+        """ Test that aliased directories are listed only once. """
+
+        import pyproject2setuppy.common
+
+        with TestDirectory():
+            self.make_tree()
+            with patch('pyproject2setuppy.common.scan_dir',
+                       wraps=pyproject2setuppy.common.scan_dir) as mock_scan:
+                # disable the listing cache to catch repeated walks
+                with patch.object(ResolveCache, 'scan_dir',
+                                  lambda self, path: mock_scan(path)):
+                    self.find('always')
+            listed = [os.path.realpath(x[0][0])
+                      for x in mock_scan.call_args_list]
+            self.assertEqual(sorted(listed), sorted(set(listed)))
+
+    def test_policy(self):
+        """ Test reading the policy from pyproject.toml. """
+
+        self.assertEqual(get_follow_symlinks({}), 'never')
+        self.assertEqual(get_follow_symlinks(
+            {'tool': {'pyproject2setuppy': {'follow-symlinks': True}}}),
+            'always')
+        self.assertRaises(ValueError, get_follow_symlinks,
+                          {'tool': {'pyproject2setuppy':
+                                    {'follow-symlinks': 'maybe'}}})
+
+
+class CollapseDataDirsTest(unittest.TestCase):
+    """
+    Test cases for collapsing package_data globs.
+    """
+
+    def test_collapse(self):
+        """ Test collapsing complete subtrees. """
+
+        dirs = [
+            ('a', True),
+            (os.path.join('a', 'b'), True),
+            (os.path.join('a', 'b', 'c'), True),
+            ('d', False),
+            (os.path.join('d', 'e'), True),
+            (os.path.join('d', 'e', 'f'), True),
+            ('g', True),
+        ]
+        self.assertEqual(collapse_data_dirs(dirs, 2),
+                         ['a/**/*', 'd/*', 'd/e/**/*', 'g/*'])
+        self.assertEqual(collapse_data_dirs(dirs, 3),
+                         ['a/**/*', 'd/*', 'd/e/*', 'd/e/f/*', 'g/*'])
+
+    @unittest.skipIf(not supports_recursive_globs(),
+                     'setuptools does not support recursive globs')
+    def test_find_package_data(self):
+        """ Test that collapsed globs match the same files. """
+
+        with TestDirectory():
+            os.makedirs('test_package/sub/__pycache__')
+            for path in ['test_package/__init__.py',
+                         'test_package/sub/__init__.py',
+                         'test_package/sub/data/x',
+                         'test_package/tree/x'] + [
+                             'test_package/tree/{}/{}/x'.format(i, j)
+                             for i in range(4) for j in range(4)]:
+                if not os.path.isdir(os.path.dirname(path)):
+                    os.makedirs(os.path.dirname(path))
+                with open(path, 'w'):
+                    pass
+            packages = ['test_package', 'test_package.sub']
+            package_data = find_package_data(packages)
+            self.assertEqual(package_data, {
+                '': ['*'],
+                'test_package': ['sub/data/*', 'tree/**/*'],
+                'test_package.sub': ['data/*'],
+            })
+
+            with patch('pyproject2setuppy.common.COLLAPSE_MIN_DIRS', 10000):
+                expected = find_package_data(packages)
+            self.assertEqual(len(expected['test_package']), 22)
+            self.assertEqual(
+                sorted(iter_build_files({'packages': packages,
+                                         'package_data': package_data})),
+                sorted(iter_build_files({'packages': packages,
+                                         'package_data': expected})))
@@ -0,0 +1,130 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import errno
+import json
+import os
+import os.path
+import sys
+import unittest
+
+from pyproject2setuppy.__main__ import load_pyproject
+from pyproject2setuppy.common import find_package_data, ResolveCache
+from pyproject2setuppy.counters import (COUNTERS, count, counting,
+                                        get_counters, reset_counters)
+from pyproject2setuppy.install import link_file
+from pyproject2setuppy.main import main
+from pyproject2setuppy.record import hash_file
+
+from tests.base import TestDirectory, patch
+from tests.test_install import make_project
+
+
+class CountersTest(unittest.TestCase):
+    """
+    Tests for filesystem and I/O counters.
+    """
+
+    def test_reset(self):
+        """Test the counter API."""
+
+        count('stat_calls', 3)
+        self.assertEqual(sorted(get_counters()), sorted(COUNTERS))
+        reset_counters()
+        self.assertEqual(set(get_counters().values()), set([0]))
+
+    def test_package_data(self):
+        """Test counting directories listed during package data walk."""
+
+        with TestDirectory():
+            for subdir in ('a', 'a/x', 'b'):
+                os.makedirs(os.path.join('test_package', subdir))
+            with open('test_package/__init__.py', 'w'):
+                pass
+            with counting() as io:
+                find_package_data(['test_package'], cache=ResolveCache())
+
+        self.assertEqual(io['dirs_listed'], 4)
+        self.assertEqual(io['files_copied'], 0)
+
+    def test_copy(self):
+        """Test counting copied and hashed bytes."""
+
+        with TestDirectory():
+            with open('src', 'wb') as f:
+                f.write(b'x' * 1000)
+            with counting() as io:
+                link_file('src', 'dst', 'copy')
+                hash_file('src')
+
+        self.assertEqual(io['files_copied'], 1)
+        self.assertEqual(io['bytes_copied'], 1000)
+        self.assertEqual(io['bytes_hashed'], 2000)
+
+    def test_copy_range_fallback(self):
+        """Test that bytes of a failed copy_file_range() are not counted."""
+
+        with TestDirectory():
+            with open('src', 'wb') as f:
+                f.write(b'x' * 1000)
+            with patch('os.link', side_effect=OSError(errno.EXDEV, 'link')):
+                with patch('pyproject2setuppy.install.reflink',
+                           side_effect=OSError(errno.EOPNOTSUPP, 'reflink')):
+                    with patch('os.copy_file_range', create=True,
+                               side_effect=[500,
+                                            OSError(errno.EXDEV, 'copy')]):
+                        with counting() as io:
+                            method, _, _ = link_file('src', 'dst')
+
+        self.assertEqual(method, 'copy')
+        self.assertEqual(io['files_copied'], 1)
+        self.assertEqual(io['bytes_copied'], 1000)
+
+    def test_toml(self):
+        """Test counting bytes of pyproject.toml parsed."""
+
+        with TestDirectory():
+            make_project()
+            with counting() as io:
+                load_pyproject()
+            self.assertEqual(io['toml_bytes'],
+                             os.path.getsize('pyproject.toml'))
+
+    def test_timings(self):
+        """Test that the counters are included in the timings report."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup'):
+                sys.argv = ['setup.py', '--timings=timings.json',
+                            'install', '--link=copy', '--root=root']
+                main()
+            with open('timings.json') as f:
+                records = [json.loads(line) for line in f]
+
+        phases = dict((r['phase'], r) for r in records)
+        self.assertGreater(phases['toml-parse']['io']['toml_bytes'], 0)
+        self.assertGreater(phases['package-data']['io']['dirs_listed'], 0)
+        self.assertNotIn('files_copied', phases['package-data']['io'])
+        self.assertEqual(phases['main']['io']['files_copied'], 5)
+
+    def test_setuptools_copies(self):
+        """Test counting files copied by setuptools commands."""
+
+        with TestDirectory():
+            make_project()
+            sys.argv = ['setup.py', '--timings=timings.json', 'build']
+            main()
+            with open('timings.json') as f:
+                records = [json.loads(line) for line in f]
+            built = [os.path.join(topdir, f)
+                     for topdir, _, files in os.walk('build/lib')
+                     for f in files]
+            size = sum(os.path.getsize(f) for f in built)
+
+        phases = dict((r['phase'], r) for r in records)
+        self.assertEqual(phases['main']['io']['files_copied'], len(built))
+        self.assertEqual(phases['main']['io']['bytes_copied'], size)
+        self.assertEqual(phases['command:build_py']['io']['files_copied'],
+                         len(built))
@@ -0,0 +1,130 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import json
+import os
+import os.path
+import sys
+import unittest
+
+try:
+    import tomli as toml
+except ImportError:
+    import toml
+
+from pyproject2setuppy.develop import (get_source_roots, install_editable,
+                                       uninstall_editable)
+from pyproject2setuppy.main import main
+
+from tests.base import TestDirectory, patch
+
+
+POETRY_TOML = '''
+[build-system]
+requires = ["poetry-core"]
+build-backend = "poetry.core.masonry.api"
+
+[tool.poetry]
+name = "test_package"
+version = "1"
+description = "description."
+authors = ["Some Guy <guy@example.com>"]
+packages = [
+    {include = "test_package", from = "src"},
+    {include = "other_package"},
+]
+
+[tool.poetry.scripts]
+test-tool = "test_package:main"
+'''
+
+
+def make_project():
+    """Create a test project in the current directory."""
+
+    with open('pyproject.toml', 'w') as f:
+        f.write(POETRY_TOML)
+    for fn in ['src/test_package/__init__.py',
+               'src/test_package/sub/__init__.py',
+               'other_package/__init__.py']:
+        if not os.path.isdir(os.path.dirname(fn)):
+            os.makedirs(os.path.dirname(fn))
+        with open(fn, 'w'):
+            pass
+
+
+class DevelopTest(unittest.TestCase):
+    """
+    Tests for editable installs.
+    """
+
+    def test_get_source_roots(self):
+        """Test getting sys.path entries for packages."""
+
+        spec = {
+            'packages': ['foo', 'foo.bar', 'baz'],
+            'package_dir': {'foo': 'src/foo', 'foo.bar': 'src/foo/bar'},
+            'py_modules': ['mod'],
+        }
+        with TestDirectory() as d:
+            self.assertEqual(get_source_roots(spec),
+                             [d, os.path.join(d, 'src')])
+            spec['package_dir']['foo.bar'] = 'other'
+            self.assertIsNone(get_source_roots(spec))
+
+    def test_install_editable(self):
+        """Test installing and uninstalling in editable mode."""
+
+        with TestDirectory() as d:
+            make_project()
+            data = toml.loads(POETRY_TOML)
+            install_editable(data, install_dir='site',
+                             script_dir='bin')
+            self.assertEqual(sorted(os.listdir('site')),
+                             ['__editable__.test_package-1.pth',
+                              'test_package-1.dist-info'])
+            with open('site/__editable__.test_package-1.pth') as f:
+                self.assertEqual(sorted(f.read().splitlines()),
+                                 [d, os.path.join(d, 'src')])
+            with open('site/test_package-1.dist-info/direct_url.json') as f:
+                self.assertEqual(json.load(f)['dir_info'],
+                                 {'editable': True})
+            self.assertTrue(os.path.isfile('bin/test-tool'))
+
+            self.assertTrue(uninstall_editable(data, install_dir='site'))
+            self.assertEqual(os.listdir('site'), [])
+            self.assertEqual(os.listdir('bin'), [])
+            self.assertFalse(uninstall_editable(data, install_dir='site'))
+
+    def test_command(self):
+        """Test that main() uses the native develop command."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                sys.argv = ['setup.py', 'develop', '-d', 'site']
+                main()
+                self.assertFalse(mock_setup.called)
+                self.assertTrue(os.path.isfile(
+                    'site/__editable__.test_package-1.pth'))
+
+                sys.argv = ['setup.py', 'develop', '--no-deps']
+                main()
+                self.assertTrue(mock_setup.called)
+
+    def test_command_fallback(self):
+        """Test passing packages that cannot be installed to setuptools."""
+
+        spec = {'name': 'test_package', 'version': '1',
+                'packages': ['test_package'],
+                'package_dir': {'test_package': 'src/other'}}
+        with TestDirectory():
+            make_project()
+            with patch('pyproject2setuppy.develop.resolve',
+                       return_value=spec):
+                with patch('setuptools.setup') as mock_setup:
+                    sys.argv = ['setup.py', 'develop', '-d', 'site']
+                    main()
+                    self.assertTrue(mock_setup.called)
+            self.assertFalse(os.path.exists('site'))
@@ -115,6 +115,29 @@ dynamic = ["version"]
     }
 
 
+class FlitDescriptionNoDocstringTest(unittest.TestCase, FlitTestCase):
+    """
+    Test handling a package with non-dynamic description, whose module
+    has no docstring and needs to be imported to get the version.
+    """
+
+    toml_base = FlitDescriptionTest.toml_base
+
+    expected_extra = {
+        'py_modules': ['test_module'],
+    }
+
+    def make_package(self):
+        """Make a module without docstring and with computed version."""
+
+        d = super(FlitDescriptionNoDocstringTest, self).make_package()
+        with open(self.package_files[0], 'w') as f:
+            f.write('''
+__version__ = str(0)
+''')
+        return d
+
+
 class FlitVersionDescriptionTest(unittest.TestCase, FlitTestCase):
     """
     Test handling a package with non-dynamic version and description.
@@ -329,6 +352,28 @@ name = "subdir_package"
     }
 
 
+class FlitNamespacePackageTest(unittest.TestCase, FlitTestCase):
+    """Test handling a package inside a PEP 420 namespace package."""
+
+    package_files = [
+        'ns/test_module/__init__.py',
+        'ns/test_module/sub/__init__.py',
+        'ns/other_module/__init__.py',
+    ]
+
+    toml_extra = '''
+[tool.flit.module]
+name = "ns.test_module"
+'''
+
+    expected_extra = {
+        'packages': [
+            'ns.test_module',
+            'ns.test_module.sub',
+        ],
+    }
+
+
 class FlitIrrelevantToolFlitSectionTest(unittest.TestCase, FlitTestCase):
     """Test ignoring tool.flit with no relevant keys"""
 
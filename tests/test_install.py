@@ -0,0 +1,280 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import csv
+import os
+import os.path
+import sys
+import unittest
+
+try:
+    import tomli as toml
+except ImportError:
+    import toml
+
+from pyproject2setuppy.install import (compile_files, get_install_paths,
+                                       get_pyc_path, install_linked,
+                                       iter_build_files, link_file,
+                                       pop_option)
+from pyproject2setuppy.main import main
+
+from tests.base import TestDirectory, patch
+
+
+FLIT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "test-module"
+version = "1"
+description = "description."
+authors = [{name = "Some Guy", email = "guy@example.com"}]
+
+[project.scripts]
+test-tool = "test_module:main"
+
+[tool.flit.module]
+name = "test_module"
+'''
+
+FILES = [
+    'test_module/__init__.py',
+    'test_module/data/foo.txt',
+    'test_module/data/sub/bar.txt',
+    'test_module/sub/__init__.py',
+    'test_module/sub/data.txt',
+]
+
+
+def make_project():
+    """Create a test project in the current directory."""
+
+    with open('pyproject.toml', 'w') as f:
+        f.write(FLIT_TOML)
+    for fn in FILES:
+        if not os.path.isdir(os.path.dirname(fn)):
+            os.makedirs(os.path.dirname(fn))
+        with open(fn, 'w') as f:
+            f.write(fn)
+
+
+class InstallTest(unittest.TestCase):
+    """
+    Tests for the link-based native installation.
+    """
+
+    def test_iter_build_files(self):
+        """Test that the files match build_py results."""
+
+        spec = {
+            'packages': ['test_module', 'test_module.sub'],
+            'package_data': {'test_module': ['data/*', 'data/sub/*']},
+            'package_dir': {'': 'src'},
+            'py_modules': ['other'],
+        }
+        with TestDirectory():
+            for fn in FILES:
+                fn = os.path.join('src', fn)
+                if not os.path.isdir(os.path.dirname(fn)):
+                    os.makedirs(os.path.dirname(fn))
+                with open(fn, 'w'):
+                    pass
+            self.assertEqual(
+                list(iter_build_files(spec)),
+                [(os.path.join('src', 'other.py'), 'other.py')] +
+                [(os.path.join('src', *x.split('/')),
+                  os.path.join(*x.split('/'))) for x in [
+                    'test_module/__init__.py',
+                    'test_module/data/foo.txt',
+                    'test_module/data/sub/bar.txt',
+                    'test_module/sub/__init__.py',
+                ]])
+
+    def test_iter_build_files_namespace(self):
+        """Test modules inside a namespace package."""
+
+        self.assertEqual(
+            list(iter_build_files({'py_modules': ['ns.other']})),
+            [(os.path.join('ns', 'other.py'), os.path.join('ns', 'other.py'))])
+
+    def test_link_file(self):
+        """Test that all link modes produce identical files."""
+
+        with TestDirectory():
+            with open('src', 'w') as f:
+                f.write('data')
+            for mode in ('auto', 'hardlink', 'copy'):
+                method, _, _ = link_file('src', mode, mode)
+                if mode != 'auto':
+                    self.assertEqual(method, mode)
+                with open(mode) as f:
+                    self.assertEqual(f.read(), 'data')
+            self.assertTrue(os.path.samefile('src', 'hardlink'))
+            self.assertFalse(os.path.samefile('src', 'copy'))
+
+    def test_install_linked(self):
+        """Test installing into a root."""
+
+        with TestDirectory():
+            make_project()
+            record = install_linked(toml.loads(FLIT_TOML), root='root',
+                                    mode='hardlink')
+            purelib, scripts = get_install_paths('root')
+            self.assertTrue(os.path.samefile(
+                os.path.join(purelib, 'test_module', 'sub', '__init__.py'),
+                os.path.join('test_module', 'sub', '__init__.py')))
+            self.assertTrue(os.path.isfile(os.path.join(scripts,
+                                                        'test-tool')))
+
+            with open(os.path.join(purelib, 'test_module-1.dist-info',
+                                   'RECORD')) as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(len(rows), len(record.entries) + 1)
+            self.assertIn('test_module/__init__.py', [x[0] for x in rows])
+            self.assertIn('test_module-1.dist-info/INSTALLER',
+                          [x[0] for x in rows])
+            self.assertEqual(rows[-1],
+                             ['test_module-1.dist-info/RECORD', '', ''])
+
+    def test_command(self):
+        """Test that main() uses the native install with --link."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                sys.argv = ['setup.py', 'install', '--root', 'root',
+                            '--link=copy']
+                main()
+                self.assertFalse(mock_setup.called)
+            purelib, _ = get_install_paths('root')
+            self.assertTrue(os.path.isfile(
+                os.path.join(purelib, 'test_module', '__init__.py')))
+
+    def test_command_fallback(self):
+        """Test that main() runs setuptools without --link."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                sys.argv = ['setup.py', 'install', '--root', 'root']
+                main()
+                self.assertTrue(mock_setup.called)
+
+
+class CompileTest(unittest.TestCase):
+    """
+    Tests for parallel byte-compilation.
+    """
+
+    def test_pop_option(self):
+        """Test removing options from command-line arguments."""
+
+        args = ['--root', 'r', '-O2', '--compile-jobs=4', '--force']
+        self.assertEqual(pop_option(args, ('--compile-jobs',)), '4')
+        self.assertEqual(pop_option(args, ('--optimize',), '-O'), '2')
+        self.assertEqual(pop_option(args, ('--root',)), 'r')
+        self.assertEqual(pop_option(args, ('--record',)), None)
+        self.assertEqual(args, ['--force'])
+
+    @unittest.skipIf(sys.version_info < (3,),
+                     'optimization levels require Python 3')
+    def test_compile_files(self):
+        """Test compiling for multiple levels, skipping up-to-date files."""
+
+        with TestDirectory():
+            files = []
+            for i in range(4):
+                fn = os.path.abspath('m{}.py'.format(i))
+                with open(fn, 'w') as f:
+                    f.write('x = {}\n'.format(i))
+                files.append((fn, '/usr/lib'))
+
+            pycs = compile_files(files, 2, [0, 2])
+            self.assertEqual(sorted(pycs), sorted(
+                get_pyc_path(fn, level) for fn, _ in files
+                for level in (0, 2)))
+
+            stale = [get_pyc_path(files[0][0], level) for level in (0, 2)]
+            for pyc in pycs:
+                os.utime(pyc, (0, 0))
+            os.utime(files[0][0], (1, 1))
+            compile_files(files, 2, [0, 2])
+            for pyc in pycs:
+                self.assertEqual(os.stat(pyc).st_mtime != 0, pyc in stale)
+
+    @unittest.skipIf(sys.version_info < (3,),
+                     'optimization levels require Python 3')
+    def test_install_linked(self):
+        """Test byte-compiling modules installed natively."""
+
+        with TestDirectory():
+            make_project()
+            record = install_linked(toml.loads(FLIT_TOML), root='root',
+                                    jobs=2, compile_levels=[0, 1])
+            purelib, _ = get_install_paths('root')
+            init = os.path.join(purelib, 'test_module', '__init__.py')
+            for level in (0, 1):
+                pyc = os.path.relpath(get_pyc_path(init, level), purelib)
+                self.assertIn(pyc.replace(os.path.sep, '/'), record.entries)
+
+    def test_setuptools(self):
+        """Test that setuptools compilation is replaced."""
+
+        def fake_setup(**kwargs):
+            args = sys.argv[1:]
+            self.assertEqual(args[:2], ['install', '--no-compile'])
+            self.assertIn('--optimize=0', args)
+            self.assertEqual(args[args.index('--root') + 1], 'root')
+            init = os.path.join(os.path.sep, 'lib', 'test_module',
+                                '__init__.py')
+            os.makedirs(os.path.join('root', 'lib', 'test_module'))
+            with open(os.path.join('root', init.lstrip(os.path.sep)),
+                      'w') as f:
+                f.write('x = 1\n')
+            with open(args[args.index('--record') + 1], 'w') as f:
+                f.write(init + '\n')
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                mock_setup.side_effect = fake_setup
+                sys.argv = ['setup.py', 'install', '--root=root',
+                            '--no-compile', '--compile-jobs', '2',
+                            '--record', 'files.txt']
+                main()
+                self.assertTrue(mock_setup.called)
+                with open('files.txt') as f:
+                    self.assertEqual(len(f.readlines()), 1)
+
+                sys.argv = ['setup.py', 'install', '--root=root',
+                            '--compile-jobs', '2', '--record', 'files.txt']
+                os.unlink(os.path.join('root', 'lib', 'test_module',
+                                       '__init__.py'))
+                os.rmdir(os.path.join('root', 'lib', 'test_module'))
+                main()
+                with open('files.txt') as f:
+                    files = [x.rstrip('\n') for x in f]
+            self.assertEqual(len(files), 2)
+            self.assertTrue(files[1].startswith(os.path.sep))
+            self.assertTrue(os.path.isfile(
+                os.path.join('root', files[1].lstrip(os.path.sep))))
+
+    def test_setuptools_invalid(self):
+        """Test that invalid --compile-jobs values are usage errors."""
+
+        for args in (['--compile-jobs'],
+                     ['--compile-jobs', '--force'],
+                     ['--compile-jobs=x'],
+                     ['--compile-jobs=2', '-O3']):
+            with TestDirectory():
+                make_project()
+                with patch('setuptools.setup') as mock_setup:
+                    with patch('sys.stderr'):
+                        sys.argv = ['setup.py', 'install'] + args
+                        with self.assertRaises(SystemExit) as cm:
+                            main()
+                    self.assertEqual(cm.exception.code, 2)
+                    self.assertFalse(mock_setup.called)
@@ -0,0 +1,67 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import sys
+import unittest
+
+from pyproject2setuppy.launcher import (get_preparation_data, is_supported,
+                                        Launcher)
+from pyproject2setuppy.main import main
+
+from tests.base import TestDirectory
+from tests.test_workspace import make_workspace, PROJECTS
+
+
+@unittest.skipIf(not is_supported(), 'forkserver is not supported')
+class LauncherTest(unittest.TestCase):
+    """
+    Tests for the forkserver-based launcher.
+    """
+
+    def test_run(self):
+        """Test running projects in forked children."""
+
+        with TestDirectory():
+            make_workspace()
+            launcher = Launcher()
+            status, output = launcher.run(os.path.join('libs', 'core'),
+                                          ['build'])
+            self.assertEqual(status, 0)
+            self.assertIn('running build', output)
+            self.assertTrue(os.path.isfile(os.path.join(
+                'libs', 'core', 'build', 'lib', 'core_lib', '__init__.py')))
+
+            os.unlink(os.path.join('libs', 'util', 'pyproject.toml'))
+            status, output = launcher.run(os.path.join('libs', 'util'),
+                                          ['build'])
+            self.assertNotEqual(status, 0)
+            self.assertIn('pyproject.toml', output)
+
+    def test_hidden_main(self):
+        """Test that __main__ is not passed to children."""
+
+        from multiprocessing import spawn
+
+        data = get_preparation_data('test')
+        self.assertNotIn('init_main_from_name', data)
+        self.assertNotIn('init_main_from_path', data)
+        # other children are not affected
+        extra = set(spawn.get_preparation_data('test')) - set(data)
+        self.assertTrue(extra)
+        self.assertLessEqual(extra, set(['init_main_from_name',
+                                         'init_main_from_path']))
+
+    def test_workspace(self):
+        """Test building a workspace using the launcher."""
+
+        with TestDirectory():
+            make_workspace()
+            sys.argv = ['setup.py', 'workspace', '--launcher=forkserver',
+                        'build']
+            main()
+            for path, (name, _) in PROJECTS.items():
+                self.assertTrue(os.path.isfile(os.path.join(
+                    path, 'build', 'lib', name.lower(), '__init__.py')))
@@ -117,6 +117,47 @@ build-backend = "setuptools.build_meta"
 [build-system]
 requires = ["setuptools"]
 build-backend = "setuptools.build_meta:__legacy__"
+'''
+        with make_pyproject_toml(data):
+            main()
+            self.assertTrue(handler_mock.called)
+
+    @patch('pyproject2setuppy.poetry.handle_poetry')
+    def test_pyproject2setuppy_poetry(self, handler_mock):
+        """
+        Test that poetry handler is triggered for pyproject2setuppy
+        backend with [tool.poetry].
+        """
+
+        data = '''
+[build-system]
+requires = ["pyproject2setuppy"]
+build-backend = "pyproject2setuppy.buildapi"
+
+[tool.poetry]
+name = "test"
+'''
+        with make_pyproject_toml(data):
+            main()
+            self.assertTrue(handler_mock.called)
+
+    @patch('pyproject2setuppy.setuptools.handle_setuptools')
+    def test_pyproject2setuppy_explicit(self, handler_mock):
+        """
+        Test that the backend specified in [tool.pyproject2setuppy]
+        is used.
+        """
+
+        data = '''
+[build-system]
+requires = ["pyproject2setuppy"]
+build-backend = "pyproject2setuppy.buildapi"
+
+[tool.pyproject2setuppy]
+build-backend = "setuptools.build_meta"
+
+[tool.poetry]
+name = "test"
 '''
         with make_pyproject_toml(data):
             main()
@@ -0,0 +1,71 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import json
+import os
+import sys
+import unittest
+
+from pyproject2setuppy.main import main
+from pyproject2setuppy.memory import (MEMORY_REPORT_ENV,
+                                      pop_memory_report_option)
+
+from tests.base import TestDirectory, patch
+from tests.test_install import make_project
+
+
+RETAINED = []
+
+
+def allocate(**kwargs):
+    """Fake setup() allocating about 1 MiB, and retaining half of it."""
+
+    transient = [bytearray(1024) for i in range(512)]
+    RETAINED.extend(bytearray(1024) for i in range(512))
+    return transient
+
+
+@unittest.skipIf(sys.version_info < (3, 4), 'tracemalloc is not available')
+class MemoryReportTest(unittest.TestCase):
+    """
+    Tests for the tracemalloc memory report.
+    """
+
+    def test_pop_option(self):
+        """Test getting the output from options and environment."""
+
+        args = ['setup.py', 'build', '--memory-report=mem.json']
+        self.assertEqual(pop_memory_report_option(args), 'mem.json')
+        self.assertEqual(args, ['setup.py', 'build'])
+        with patch.dict(os.environ, {MEMORY_REPORT_ENV: '-'}):
+            self.assertEqual(pop_memory_report_option(args), '-')
+
+    def test_main(self):
+        """Test reporting memory used in each phase."""
+
+        del RETAINED[:]
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup',
+                       side_effect=allocate):
+                sys.argv = ['setup.py', '--memory-report=mem.json',
+                            'egg_info']
+                main()
+            with open('mem.json') as f:
+                records = [json.loads(line) for line in f]
+        del RETAINED[:]
+
+        phases = dict((r['phase'], r) for r in records)
+        for name in ('main', 'toml-parse', 'resolve', 'package-data',
+                     'setup'):
+            self.assertIn(name, phases)
+        setup = phases['setup']
+        self.assertEqual(setup['parent'], 'handler')
+        self.assertGreaterEqual(setup['peak_increase'], 1024 * 1024)
+        self.assertGreaterEqual(setup['retained'], 512 * 1024)
+        self.assertLess(setup['retained'], 1024 * 1024)
+        self.assertTrue(setup['top'])
+        self.assertIn(os.path.basename(__file__).rstrip('c'),
+                      setup['top'][0]['site'])
+        self.assertGreaterEqual(phases['main']['peak'], setup['peak'])
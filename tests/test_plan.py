@@ -0,0 +1,94 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import json
+import os
+import os.path
+import sys
+import unittest
+
+try:
+    import tomli as toml
+except ImportError:
+    import toml
+
+from pyproject2setuppy.install import get_install_paths, get_pyc_path
+from pyproject2setuppy.main import main
+from pyproject2setuppy.metadata import egg_info_name
+from pyproject2setuppy.plan import get_plan
+
+from tests.base import TestDirectory, patch
+from tests.test_install import FLIT_TOML, make_project
+
+
+class PlanTest(unittest.TestCase):
+    """
+    Tests for the dry-run install plan.
+    """
+
+    def test_command(self):
+        """Test that main() writes the plan without installing."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                sys.argv = ['setup.py', 'plan', '--root', 'root',
+                            '-o', 'plan.json']
+                main()
+                self.assertFalse(mock_setup.called)
+            self.assertFalse(os.path.exists('root'))
+            self.assertFalse(os.path.exists('build'))
+            with open('plan.json') as f:
+                plan = json.load(f)
+
+        purelib, scripts = get_install_paths('root')
+        self.assertEqual((plan['name'], plan['version']),
+                         ('test-module', '1'))
+        self.assertIn({
+            'source': os.path.join('test_module', 'data', 'foo.txt'),
+            'destination': os.path.join('build', 'lib', 'test_module',
+                                        'data', 'foo.txt'),
+            'size': len('test_module/data/foo.txt'),
+        }, plan['build'])
+        self.assertIn({
+            'source': os.path.join('test_module', '__init__.py'),
+            'destination': os.path.join(purelib, 'test_module',
+                                        '__init__.py'),
+            'size': len('test_module/__init__.py'),
+        }, plan['install_link'])
+        self.assertIn({
+            'source': None,
+            'destination': os.path.join(scripts, 'test-tool'),
+            'size': None,
+        }, plan['install_link'])
+        self.assertEqual(len(plan['install_link']), len(plan['build']) + 5)
+        self.assertIn({
+            'source': None,
+            'destination': os.path.join(scripts, 'test-tool'),
+            'size': None,
+        }, plan['install'])
+
+    def test_install_bytecode(self):
+        """Test that the install layout includes bytecode."""
+
+        with TestDirectory():
+            make_project()
+            data = toml.loads(FLIT_TOML)
+            with patch.object(sys, 'dont_write_bytecode', False):
+                plan = get_plan(data, root='root', optimize=2)
+            with patch.object(sys, 'dont_write_bytecode', True):
+                plan_no_pyc = get_plan(data, root='root', optimize=2)
+
+        purelib, _ = get_install_paths('root')
+        init = os.path.join(purelib, 'test_module', '__init__.py')
+        installed = [x['destination'] for x in plan['install']]
+        for level in (0, 2):
+            self.assertIn(get_pyc_path(init, level), installed)
+        self.assertNotIn(get_pyc_path(init, 1), installed)
+        self.assertEqual(
+            [x for x in installed if '.pyc' in x or '.pyo' in x],
+            [x for x in installed
+             if x not in [y['destination'] for y in plan_no_pyc['install']]])
+        self.assertIn(os.path.join(purelib, egg_info_name(plan),
+                                   'PKG-INFO'), installed)
@@ -229,6 +229,35 @@ packages = [
     }
 
 
+class PoetryPackagesNamespaceTest(unittest.TestCase, PoetryTestCase):
+    """
+    Test handling packages inside a PEP 420 namespace package.
+    """
+
+    package_files = PoetryTestCase.package_files + [
+        'src/ns/ns_package/__init__.py',
+        'src/ns/ns_package/sub/__init__.py',
+        'src/ns/other_package/__init__.py',
+    ]
+
+    toml_extra = '''
+packages = [
+    { include = "ns/ns_package", from = "src" },
+]
+'''
+
+    expected_extra = {
+        'package_dir': {
+            'ns.ns_package': 'src/ns/ns_package',
+            'ns.ns_package.sub': 'src/ns/ns_package/sub',
+        },
+        'packages': [
+            'ns.ns_package',
+            'ns.ns_package.sub',
+        ],
+    }
+
+
 class PoetryPackagesSubdirTest(unittest.TestCase, PoetryTestCase):
     """
     Test handling packages in a subdirectory ("from").
@@ -0,0 +1,99 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os.path
+import pstats
+import signal
+import sys
+import unittest
+
+from pyproject2setuppy.main import main
+from pyproject2setuppy.profiling import (pop_profile_options, profiled,
+                                         Sampler)
+
+from tests.base import TestDirectory, patch
+from tests.test_install import make_project
+
+
+def busy_loop():
+    """Burn some CPU time."""
+
+    ret = 0
+    for i in range(1000000):
+        ret += i * i
+    return ret
+
+
+class ProfilingTest(unittest.TestCase):
+    """
+    Tests for the built-in profilers.
+    """
+
+    def test_pop_options(self):
+        """Test removing profiling options from args."""
+
+        args = ['setup.py', '--profile=sample', 'build',
+                '--profile-output', 'out.folded']
+        self.assertEqual(pop_profile_options(args),
+                         ('sample', 'out.folded'))
+        self.assertEqual(args, ['setup.py', 'build'])
+        self.assertEqual(pop_profile_options(args), (None, None))
+
+    def test_invalid(self):
+        """Test that invalid modes are rejected."""
+
+        with self.assertRaises(ValueError):
+            with profiled('invalid'):
+                pass
+
+    def test_cprofile(self):
+        """Test writing pstats for the whole main() run."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup'):
+                sys.argv = ['setup.py', '--profile=cprofile', 'egg_info']
+                main()
+            self.assertNotIn('--profile=cprofile', sys.argv)
+            stats = pstats.Stats('pyproject2setuppy.pstats')
+
+        self.assertIn('run_main',
+                      [func[2] for func in stats.stats])
+
+    @unittest.skipIf(not hasattr(signal, 'setitimer'),
+                     'setitimer() is not supported')
+    def test_sampler(self):
+        """Test that the sampler collects stacks."""
+
+        sampler = Sampler(0.001)
+        sampler.start()
+        try:
+            while not sampler.counts:
+                busy_loop()
+        finally:
+            sampler.stop()
+        self.assertTrue(any('busy_loop' in stack
+                            for stack in sampler.counts))
+
+    @unittest.skipIf(not hasattr(signal, 'setitimer'),
+                     'setitimer() is not supported')
+    def test_sample_main(self):
+        """Test writing collapsed stacks for the whole main() run."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup',
+                       side_effect=lambda **kwargs: busy_loop()):
+                sys.argv = ['setup.py', '--profile', 'sample',
+                            '--profile-output=out.folded', 'egg_info']
+                main()
+            self.assertFalse(os.path.exists('pyproject2setuppy.folded'))
+            with open('out.folded') as f:
+                lines = f.read().splitlines()
+
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+            self.assertIn(';', stack)
@@ -0,0 +1,76 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import hashlib
+import os
+import unittest
+
+from pyproject2setuppy import record
+from pyproject2setuppy.record import (copy_and_hash, format_hash, hash_file,
+                                      Record)
+
+from tests.base import patch, TestDirectory
+
+
+class RecordTest(unittest.TestCase):
+    """
+    Tests for RECORD hashing.
+    """
+
+    def test_hash_file(self):
+        """Test that chunked and mmap hashing agree."""
+
+        with TestDirectory():
+            with open('data', 'wb') as f:
+                f.write(b'x' * 100000)
+            with patch.object(record, 'CHUNK_SIZE', 4096):
+                chunked = hash_file('data')
+            with patch.object(record, 'MMAP_THRESHOLD', 1):
+                mapped = hash_file('data')
+            self.assertEqual(chunked, mapped)
+            self.assertEqual(
+                chunked, (hashlib.sha256(b'x' * 100000).digest(), 100000))
+
+    def test_copy_and_hash(self):
+        """Test copying a file while hashing it."""
+
+        with TestDirectory():
+            with open('src', 'wb') as f:
+                f.write(b'data')
+            os.chmod('src', 0o755)
+            self.assertEqual(copy_and_hash('src', 'dst'), hash_file('src'))
+            with open('dst', 'rb') as f:
+                self.assertEqual(f.read(), b'data')
+            self.assertEqual(os.stat('dst').st_mode & 0o777, 0o755)
+
+    def test_write(self):
+        """Test writing RECORD, reusing known digests."""
+
+        with TestDirectory():
+            for fn in ('a', 'b', 'c'):
+                with open(fn, 'wb') as f:
+                    f.write(fn.encode('ascii'))
+            rec = Record()
+            rec.add('pkg/a', 'a')
+            rec.add('pkg/b', 'b', *hash_file('b'))
+            rec.add('pkg/c', 'c')
+            with patch.object(record, 'hash_file',
+                              wraps=hash_file) as mock_hash:
+                rec.write('RECORD', 'pkg.dist-info/RECORD', jobs=2)
+                self.assertEqual(sorted(x[0][0] for x
+                                        in mock_hash.call_args_list),
+                                 ['a', 'c'])
+            with open('RECORD') as f:
+                self.assertEqual(f.read().splitlines(), [
+                    'pkg/a,{},1'.format(format_hash(hashlib.sha256(b'a')
+                                                    .digest())),
+                    'pkg/b,{},1'.format(format_hash(hashlib.sha256(b'b')
+                                                    .digest())),
+                    'pkg/c,{},1'.format(format_hash(hashlib.sha256(b'c')
+                                                    .digest())),
+                    'pkg.dist-info/RECORD,,',
+                ])
+            self.assertEqual(format_hash(hashlib.sha256(b'a').digest()),
+                             'sha256=ypeBEsobvcr6wjGzmiPcTaeG7_gUfE5yuYB3ha'
+                             '_uSLs')
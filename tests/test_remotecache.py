@@ -0,0 +1,140 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import hashlib
+import os
+import os.path
+import socket
+import threading
+import unittest
+import warnings
+
+from pyproject2setuppy.cache import BuildCache, CacheChain
+from pyproject2setuppy.remotecache import (CacheServer, RemoteCache,
+                                           RemoteCacheError)
+
+from tests.base import find_all_pkg_files, TestDirectory
+
+
+def write_file(path, content=''):
+    """Write content to file at path, creating directories."""
+
+    if os.path.dirname(path) and not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+KEY = 'a' * 64
+
+
+class RemoteCacheTest(unittest.TestCase):
+    """
+    Tests for the remote cache client and the reference server.
+    """
+
+    def setUp(self):
+        self.testdir = TestDirectory()
+        self.server = CacheServer(('127.0.0.1', 0), 'server')
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}/'.format(
+            self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.testdir.__exit__(None, None, None)
+
+    def test_roundtrip(self):
+        """Test uploading and fetching an entry."""
+
+        client = RemoteCache(self.url)
+        write_file('src/a/b', 'data')
+        self.assertFalse(client.get(KEY, 'dest'))
+        client.put(KEY, 'src')
+        self.assertTrue(client.get(KEY, 'dest'))
+        self.assertEqual(list(find_all_pkg_files('dest')),
+                         [os.path.join('a', 'b')])
+        # keep-alive connection is reused
+        self.assertEqual(len(client.pool), 1)
+
+    def test_corrupted(self):
+        """Test that corrupted artifacts are rejected."""
+
+        client = RemoteCache(self.url)
+        write_file('src/a', 'data')
+        client.put(KEY, 'src')
+        casdir = os.path.join('server', 'cas')
+        path = os.path.join(casdir, os.listdir(casdir)[0])
+        with open(path, 'r+b') as f:
+            f.seek(-1, 2)
+            f.write(b'X')
+        self.assertRaises(RemoteCacheError, client.get, KEY, 'dest')
+        self.assertFalse(os.path.exists('dest'))
+
+    def test_put_verification(self):
+        """Test that the server verifies uploads."""
+
+        client = RemoteCache(self.url)
+        digest = hashlib.sha256(b'data').hexdigest()
+        self.assertEqual(client.request('PUT', '/cas/' + 'b' * 64,
+                                        b'data')[0], 400)
+        self.assertEqual(client.request('PUT', '/ac/' + KEY,
+                                        digest.encode('ascii'))[0], 400)
+        self.assertEqual(client.request('PUT', '/cas/' + digest,
+                                        b'data')[0], 201)
+        self.assertEqual(client.request('PUT', '/ac/' + KEY,
+                                        digest.encode('ascii'))[0], 201)
+        self.assertEqual(client.request('GET', '/ac/' + KEY),
+                         (200, digest.encode('ascii')))
+
+    def test_partial_upload(self):
+        """Test that partial uploads are discarded."""
+
+        digest = hashlib.sha256(b'data').hexdigest()
+        sock = socket.create_connection(self.server.server_address)
+        sock.sendall('PUT /cas/{} HTTP/1.1\r\nHost: x\r\n'
+                     'Content-Length: 4\r\n\r\nda'.format(digest)
+                     .encode('ascii'))
+        sock.close()
+        client = RemoteCache(self.url)
+        # wait for the server to process the connection
+        for i in range(100):
+            if not os.listdir(os.path.join('server', 'tmp')):
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(client.request('HEAD', '/cas/' + digest)[0], 404)
+        self.assertEqual(os.listdir(os.path.join('server', 'tmp')), [])
+
+    def test_chain(self):
+        """Test that remote hits are stored in the local cache."""
+
+        write_file('src/a', 'data')
+        RemoteCache(self.url).put(KEY, 'src')
+        local = BuildCache('local')
+        chain = CacheChain([local, RemoteCache(self.url)])
+        write_file('dest/stale')
+        self.assertTrue(chain.get(KEY, 'dest'))
+        self.assertEqual(sorted(find_all_pkg_files('dest')), ['a', 'stale'])
+        self.assertTrue(local.get(KEY, 'dest2'))
+        # other files in dest are not stored in the local cache
+        self.assertEqual(list(find_all_pkg_files('dest2')), ['a'])
+
+    def test_unreachable(self):
+        """Test that remote errors are treated as misses."""
+
+        # grab a free port and close it
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        chain = CacheChain([RemoteCache('http://127.0.0.1:{}/'.format(port),
+                                        timeout=1)])
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            self.assertFalse(chain.get(KEY, 'dest'))
+            self.assertEqual(len(w), 1)
@@ -0,0 +1,204 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import subprocess
+import sys
+import threading
+import unittest
+
+try:
+    import tomli as toml
+except ImportError:
+    import toml
+
+from pyproject2setuppy import resolve_many
+from pyproject2setuppy.common import ResolveCache
+from pyproject2setuppy.resolve import resolve
+
+from tests.base import TestDirectory, patch
+
+
+FLIT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "flit_module"
+version = "1"
+description = "flit description."
+authors = [{name = "Some Guy", email = "guy@example.com"}]
+'''
+
+POETRY_TOML = '''
+[build-system]
+requires = ["poetry-core"]
+build-backend = "poetry.core.masonry.api"
+
+[tool.poetry]
+name = "poetry-package"
+version = "2"
+description = "poetry description."
+authors = ["Some Guy <guy@example.com>"]
+'''
+
+
+def make_files(files):
+    """Create specified (empty) files, along with their directories."""
+
+    for fn in files:
+        dn = os.path.dirname(fn)
+        if dn and not os.path.isdir(dn):
+            os.makedirs(dn)
+        with open(fn, 'w'):
+            pass
+
+
+class ResolveManyTest(unittest.TestCase):
+    """
+    Test cases for resolve_many() function.
+    """
+
+    def test_resolve_many(self):
+        """Test resolving multiple projects with a shared cache."""
+
+        with TestDirectory():
+            make_files(['flit/flit_module.py',
+                        'poetry/poetry_package/__init__.py',
+                        'poetry/poetry_package/data/foo.txt'])
+            cwd = os.getcwd()
+            cache = ResolveCache()
+            projects = [('flit', toml.loads(FLIT_TOML)),
+                        ('poetry', toml.loads(POETRY_TOML))]
+
+            results = resolve_many(projects, cache)
+            root, spec = next(results)
+            self.assertEqual(os.getcwd(), cwd)
+            self.assertEqual(root, 'flit')
+            self.assertEqual(spec['name'], 'flit_module')
+            self.assertEqual(spec['py_modules'], ['flit_module'])
+
+            root, spec = next(results)
+            self.assertEqual(root, 'poetry')
+            self.assertEqual(spec['name'], 'poetry-package')
+            self.assertEqual(spec['packages'], ['poetry_package'])
+            self.assertEqual(spec['package_data'],
+                             {'': ['*'], 'poetry_package': ['data/*']})
+            self.assertEqual(list(results), [])
+
+            self.assertEqual(cache.addresses,
+                             {'Some Guy <guy@example.com>':
+                              ('Some Guy', 'guy@example.com')})
+            self.assertEqual(os.getcwd(), cwd)
+
+    def test_listings(self):
+        """Test that each directory is listed at most once."""
+
+        import pyproject2setuppy.common
+
+        with TestDirectory():
+            make_files(['poetry/src/poetry_package/__init__.py',
+                        'poetry/src/poetry_package/sub/__init__.py',
+                        'poetry/src/poetry_package/sub/data/foo.txt',
+                        'poetry/src/poetry_package/data/foo.txt'])
+            with patch('pyproject2setuppy.common.scan_dir',
+                       wraps=pyproject2setuppy.common.scan_dir) as mock_scan:
+                spec = resolve(toml.loads(POETRY_TOML), root='poetry')
+                listed = [os.path.relpath(x[0][0])
+                          for x in mock_scan.call_args_list]
+
+            self.assertEqual(spec['package_dir'], {'': 'src'})
+            self.assertEqual(spec['packages'], ['poetry_package',
+                                                'poetry_package.sub'])
+            self.assertEqual(spec['package_data'], {
+                '': ['*'],
+                'poetry_package': ['data/*', 'sub/data/*'],
+                'poetry_package.sub': ['data/*'],
+            })
+            self.assertEqual(sorted(listed), sorted(set(listed)))
+
+    def test_no_setuptools(self):
+        """Test that resolution does not import setuptools."""
+
+        with TestDirectory():
+            make_files(['flit/flit_module.py',
+                        'poetry/poetry_package/__init__.py',
+                        'poetry/poetry_package/data/foo.txt'])
+            for root, content in (('flit', FLIT_TOML),
+                                  ('poetry', POETRY_TOML)):
+                with open(os.path.join(root, 'pyproject.toml'), 'w') as f:
+                    f.write(content)
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(
+                [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+                + env.get('PYTHONPATH', '').split(os.pathsep))
+            out = subprocess.check_output([sys.executable, '-c', '''
+import sys
+from pyproject2setuppy.__main__ import load_pyproject
+from pyproject2setuppy.resolve import resolve
+for root in ('flit', 'poetry'):
+    resolve(load_pyproject(root), root=root)
+print(' '.join(sorted(m for m in sys.modules
+                      if m.split('.')[0] in ('distutils', 'setuptools'))))
+'''], env=env)
+
+        self.assertEqual(out.strip(), b'')
+
+    def test_unknown_backend(self):
+        """Test that unresolvable backend results in an exception."""
+
+        data = toml.loads('''
+[build-system]
+build-backend = "setuptools.build_meta"
+''')
+        self.assertRaises(NotImplementedError, resolve, data)
+
+    def test_threads(self):
+        """
+        Test resolving projects with identically named modules
+        concurrently.
+        """
+
+        data = toml.loads('''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[tool.flit.metadata]
+module = "test_module"
+author = "Some Guy"
+author-email = "guy@example.com"
+''')
+
+        with TestDirectory():
+            roots = ['project{}'.format(i) for i in range(8)]
+            for i, root in enumerate(roots):
+                os.mkdir(root)
+                with open(os.path.join(root, 'test_module.py'), 'w') as f:
+                    f.write('''
+""" documentation. """
+__version__ = str({})
+'''.format(i))
+
+            cwd = os.getcwd()
+            results = {}
+
+            def worker(root):
+                for root, spec in resolve_many([(root, data)]):
+                    results[root] = spec
+
+            threads = [threading.Thread(target=worker, args=(root,))
+                       for root in roots]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            self.assertEqual(os.getcwd(), cwd)
+            self.assertEqual(
+                    dict((root, spec['version'])
+                         for root, spec in results.items()),
+                    dict((root, str(i)) for i, root in enumerate(roots)))
@@ -0,0 +1,203 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import sys
+import tarfile
+import unittest
+
+try:
+    import tomli as toml
+except ImportError:
+    import toml
+
+from pyproject2setuppy.main import main
+from pyproject2setuppy.sdist import build_sdist
+
+from tests.base import TestDirectory, patch
+
+
+FLIT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "test-module"
+version = "1"
+description = "description."
+authors = [{name = "Some Guy", email = "guy@example.com"}]
+readme = "README.rst"
+
+[tool.flit.module]
+name = "test_module"
+
+[tool.flit.sdist]
+include = ["docs/"]
+exclude = ["docs/*.tmp"]
+'''
+
+FILES = [
+    'README.rst',
+    'docs/index.rst',
+    'docs/junk.tmp',
+    'other/file',
+    'test_module/__init__.py',
+    'test_module/data/foo.txt',
+    'test_module/sub/__init__.py',
+    'test_module/__pycache__/__init__.cpython-39.pyc',
+]
+
+
+def make_project(root='.'):
+    """Create a test project in root."""
+
+    with open(os.path.join(root, 'pyproject.toml'), 'w') as f:
+        f.write(FLIT_TOML)
+    for fn in FILES:
+        fn = os.path.join(root, fn)
+        if not os.path.isdir(os.path.dirname(fn)):
+            os.makedirs(os.path.dirname(fn))
+        with open(fn, 'w') as f:
+            f.write(fn)
+
+
+class SdistTest(unittest.TestCase):
+    """
+    Tests for the streaming sdist builder.
+    """
+
+    def test_build_sdist(self):
+        """Test that the correct files are included."""
+
+        with TestDirectory():
+            os.mkdir('project')
+            make_project('project')
+            fn = build_sdist('dist', toml.loads(FLIT_TOML), 'project')
+            self.assertEqual(fn, 'test_module-1.tar.gz')
+            with tarfile.open(os.path.join('dist', fn)) as tf:
+                self.assertEqual(
+                    sorted(tf.getnames()),
+                    ['test_module-1/' + x for x in [
+                        'PKG-INFO',
+                        'README.rst',
+                        'docs/index.rst',
+                        'pyproject.toml',
+                        'test_module/__init__.py',
+                        'test_module/data/foo.txt',
+                        'test_module/sub/__init__.py',
+                    ]])
+                for ti in tf.getmembers():
+                    self.assertEqual((ti.uid, ti.gid, ti.uname, ti.gname),
+                                     (0, 0, '', ''))
+                    self.assertEqual(ti.mode, 0o644)
+
+    def test_build_sdist_namespace(self):
+        """Test including a module inside a namespace package."""
+
+        with TestDirectory():
+            os.mkdir('ns')
+            with open('ns/mod.py', 'w') as f:
+                f.write('"""description."""\n__version__ = "1"\n')
+            pyproject = (FLIT_TOML.replace('test-module', 'ns.mod')
+                         .split('[tool.flit.module]')[0])
+            with open('pyproject.toml', 'w') as f:
+                f.write(pyproject)
+            fn = build_sdist('dist', toml.loads(pyproject))
+            with tarfile.open(os.path.join('dist', fn)) as tf:
+                self.assertEqual(
+                    sorted(tf.getnames()),
+                    [fn[:-len('.tar.gz')] + '/' + x for x in [
+                        'PKG-INFO',
+                        'ns/mod.py',
+                        'pyproject.toml',
+                    ]])
+
+    def test_build_sdist_symlinks(self):
+        """Test that symlinks are followed according to the policy."""
+
+        for policy, expected in (('never', []),
+                                 ('always', ['test_module/data2/y.txt'])):
+            with TestDirectory():
+                os.makedirs('shared/d')
+                with open('shared/file.txt', 'w') as f:
+                    f.write('file')
+                with open('shared/d/y.txt', 'w') as f:
+                    f.write('y')
+                os.mkdir('project')
+                make_project('project')
+                os.symlink(os.path.abspath('shared/file.txt'),
+                           'project/test_module/file.txt')
+                os.symlink('../../shared/d', 'project/test_module/data2')
+                data = toml.loads(FLIT_TOML)
+                data['tool']['pyproject2setuppy'] = {
+                    'follow-symlinks': policy}
+                fn = build_sdist('dist', data, 'project')
+                with tarfile.open(os.path.join('dist', fn)) as tf:
+                    top = fn[:-len('.tar.gz')] + '/'
+                    names = [x[len(top):] for x in tf.getnames()]
+                    self.assertEqual(
+                        [x for x in names if 'data/' not in x
+                         and x.startswith('test_module/')],
+                        sorted(['test_module/__init__.py',
+                                'test_module/file.txt',
+                                'test_module/sub/__init__.py']
+                               + expected))
+                    for ti in tf.getmembers():
+                        self.assertTrue(ti.isfile())
+                    self.assertEqual(
+                        tf.extractfile(top + 'test_module/file.txt').read(),
+                        b'file')
+
+    def test_build_sdist_failure(self):
+        """Test that the temporary file is removed on failure."""
+
+        with TestDirectory():
+            make_project()
+            with patch('pyproject2setuppy.sdist.write_sdist',
+                       side_effect=RuntimeError):
+                self.assertRaises(RuntimeError, build_sdist, 'dist',
+                                  toml.loads(FLIT_TOML))
+            self.assertEqual(os.listdir('dist'), [])
+
+    def test_reproducible(self):
+        """Test that the output is reproducible."""
+
+        with TestDirectory():
+            make_project()
+            data = toml.loads(FLIT_TOML)
+            with patch.dict(os.environ, {'SOURCE_DATE_EPOCH': '1000000000'}):
+                fn = build_sdist('dist1', data)
+                os.utime('README.rst', (0, 0))
+                build_sdist('dist2', data)
+            with open(os.path.join('dist1', fn), 'rb') as f1:
+                with open(os.path.join('dist2', fn), 'rb') as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+    def test_command(self):
+        """Test that main() uses the native sdist command."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                sys.argv = ['setup.py', 'sdist', '--dist-dir', 'out']
+                main()
+                self.assertFalse(mock_setup.called)
+            self.assertTrue(os.path.isfile('out/test_module-1.tar.gz'))
+
+    def test_command_fallback(self):
+        """Test that unsupported arguments are passed to setuptools."""
+
+        for args in (['sdist', 'bdist_wheel'],
+                     ['sdist', '--formats=zip'],
+                     ['sdist', '--dist-dir', 'out', '--owner=root']):
+            with TestDirectory():
+                make_project()
+                with patch('setuptools.setup') as mock_setup:
+                    sys.argv = ['setup.py'] + args
+                    main()
+                    self.assertTrue(mock_setup.called)
+                self.assertFalse(os.path.exists('dist'))
+                self.assertFalse(os.path.exists('out'))
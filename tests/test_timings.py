@@ -0,0 +1,107 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import json
+import os
+import sys
+import unittest
+
+from pyproject2setuppy.main import main
+from pyproject2setuppy.timings import (instrumented, phase,
+                                       pop_timings_option, record_timings,
+                                       RECORDERS, TIMINGS_ENV)
+
+from tests.base import TestDirectory, patch
+from tests.test_install import make_project
+
+
+def read_records(path):
+    """Read JSON lines from file at path."""
+
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TimingsTest(unittest.TestCase):
+    """
+    Tests for phase timing instrumentation.
+    """
+
+    def test_disabled(self):
+        """Test that phases are no-op without recorders."""
+
+        self.assertEqual(RECORDERS, [])
+        with phase('test'):
+            pass
+
+    def test_nested(self):
+        """Test recording nested phases."""
+
+        with TestDirectory():
+            with record_timings('timings.json'):
+                with instrumented():
+                    with phase('outer'):
+                        with phase('inner'):
+                            pass
+            self.assertEqual(RECORDERS, [])
+            records = read_records('timings.json')
+
+        self.assertEqual([(r['phase'], r['parent'], r['depth'])
+                          for r in records],
+                         [('inner', 'outer', 2),
+                          ('outer', 'main', 1),
+                          ('main', None, 0)])
+        for r in records:
+            self.assertGreaterEqual(r['wall'], 0)
+            self.assertGreaterEqual(r['cpu'], 0)
+            self.assertGreaterEqual(r['start'], 0)
+
+    def test_pop_option(self):
+        """Test getting the output from options and environment."""
+
+        args = ['setup.py', '--timings', 'build']
+        with patch.dict(os.environ, {TIMINGS_ENV: 'env.json'}):
+            self.assertEqual(pop_timings_option(args), '-')
+            self.assertEqual(args, ['setup.py', 'build'])
+            self.assertEqual(pop_timings_option(args), 'env.json')
+            args.append('--timings=out.json')
+            self.assertEqual(pop_timings_option(args), 'out.json')
+            self.assertEqual(args, ['setup.py', 'build'])
+        with patch.dict(os.environ, {TIMINGS_ENV: ''}):
+            self.assertIsNone(pop_timings_option(args))
+
+    def test_main(self):
+        """Test that main() reports the resolution and setup phases."""
+
+        with TestDirectory():
+            make_project()
+            with patch('setuptools.setup') as mock_setup:
+                sys.argv = ['setup.py', '--timings=timings.json', 'egg_info']
+                main()
+                self.assertTrue(mock_setup.called)
+            records = read_records('timings.json')
+
+        phases = dict((r['phase'], r) for r in records)
+        for name in ('main', 'toml-parse', 'dispatch', 'handler', 'resolve',
+                     'pep621', 'package-discovery', 'package-data',
+                     'setup'):
+            self.assertIn(name, phases)
+        self.assertEqual(phases['package-data']['parent'], 'resolve')
+        self.assertEqual(phases['resolve']['parent'], 'handler')
+        self.assertEqual(records[-1]['phase'], 'main')
+
+    def test_commands(self):
+        """Test that setuptools commands are recorded separately."""
+
+        with TestDirectory():
+            make_project()
+            sys.argv = ['setup.py', 'build']
+            with patch.dict(os.environ, {TIMINGS_ENV: 'timings.json'}):
+                main()
+            records = read_records('timings.json')
+
+        phases = dict((r['phase'], r) for r in records)
+        self.assertEqual(phases['command:build']['parent'], 'setup')
+        self.assertEqual(phases['command:build_py']['parent'],
+                         'command:build')
@@ -0,0 +1,207 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import sys
+import unittest
+
+from pyproject2setuppy.main import main
+from pyproject2setuppy.watch import (get_watch_dirs, inotify_supported,
+                                     InotifyWatcher, PollingWatcher,
+                                     WatchBuild)
+
+from tests.base import TestDirectory, patch
+from tests.test_install import FILES, make_project
+
+
+def write(path, content):
+    """Write content to file at path, creating directories."""
+
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class WatchDirsTest(unittest.TestCase):
+    """
+    Tests for determining the watched directories.
+    """
+
+    def test_get_watch_dirs(self):
+        """Test that subpackage directories are not listed twice."""
+
+        spec = {
+            'packages': ['test_module', 'test_module.sub', 'other'],
+            'package_dir': {'': 'src', 'other': 'lib/other'},
+            'py_modules': ['mod'],
+        }
+        with TestDirectory():
+            self.assertEqual(get_watch_dirs(spec), [
+                (os.path.abspath('.'), False),
+                (os.path.abspath('lib/other'), True),
+                (os.path.abspath('src'), False),
+                (os.path.abspath('src/test_module'), True),
+            ])
+
+
+class WatcherTestCase(object):
+    """
+    Common tests for watcher implementations.
+    """
+
+    def open_watcher(self, dirs):
+        raise NotImplementedError()
+
+    def test_changes(self):
+        """Test reporting modified and new files."""
+
+        with TestDirectory():
+            make_project()
+            watcher = self.open_watcher([(os.path.abspath('.'), False),
+                                         (os.path.abspath('test_module'),
+                                          True)])
+            try:
+                self.assertEqual(watcher.wait(0), set())
+                write('test_module/sub/data.txt', 'changed')
+                write('test_module/new/new.txt', 'new')
+                write('unrelated/file.txt', 'new')
+                changed = set()
+                while True:
+                    more = watcher.wait(0.2)
+                    if not more:
+                        break
+                    changed.update(more)
+                self.assertIn(os.path.abspath('test_module/sub/data.txt'),
+                              changed)
+                self.assertIn(os.path.abspath('test_module/new/new.txt'),
+                              changed)
+                self.assertNotIn(os.path.abspath('unrelated/file.txt'),
+                                 changed)
+            finally:
+                watcher.close()
+
+
+class PollingWatcherTest(unittest.TestCase, WatcherTestCase):
+    """
+    Tests for the polling watcher.
+    """
+
+    def open_watcher(self, dirs):
+        return PollingWatcher(dirs, interval=0.01)
+
+
+@unittest.skipIf(not inotify_supported(), 'inotify is not supported')
+class InotifyWatcherTest(unittest.TestCase, WatcherTestCase):
+    """
+    Tests for the inotify watcher.
+    """
+
+    def open_watcher(self, dirs):
+        return InotifyWatcher(dirs)
+
+
+class WatchBuildTest(unittest.TestCase):
+    """
+    Tests for the incremental build.
+    """
+
+    def test_build(self):
+        """Test that only changed files are copied."""
+
+        with TestDirectory():
+            make_project()
+            builder = WatchBuild()
+            builder.resolve()
+            self.assertEqual(builder.sync(),
+                             sorted(os.path.normpath(x) for x in FILES))
+            self.assertEqual(builder.sync(), [])
+            with open(os.path.join('build', 'lib', 'test_module',
+                                   '__init__.py')) as f:
+                self.assertEqual(f.read(), 'test_module/__init__.py')
+
+            write('test_module/sub/data.txt', 'changed')
+            with patch('pyproject2setuppy.watch.resolve') as mock_resolve:
+                self.assertEqual(
+                    builder.update(set([
+                        os.path.abspath('test_module/sub/data.txt'),
+                        os.path.abspath('test_module/.data.txt.swp'),
+                        os.path.abspath('README'),
+                    ])),
+                    ([os.path.join('test_module', 'sub', 'data.txt')],
+                     False))
+                self.assertFalse(mock_resolve.called)
+            with open(os.path.join('build', 'lib', 'test_module', 'sub',
+                                   'data.txt')) as f:
+                self.assertEqual(f.read(), 'changed')
+
+    def test_new_and_removed_files(self):
+        """Test that adding and removing files resolves the project."""
+
+        with TestDirectory():
+            make_project()
+            builder = WatchBuild()
+            builder.resolve()
+            builder.sync()
+
+            write('test_module/new/new.txt', 'new')
+            os.unlink('test_module/sub/data.txt')
+            self.assertEqual(
+                builder.update(set([
+                    os.path.abspath('test_module/new'),
+                    os.path.abspath('test_module/sub/data.txt'),
+                ])),
+                ([os.path.join('test_module', 'new', 'new.txt')], True))
+            self.assertTrue(os.path.exists(
+                os.path.join('build', 'lib', 'test_module', 'new',
+                             'new.txt')))
+            self.assertFalse(os.path.exists(
+                os.path.join('build', 'lib', 'test_module', 'sub',
+                             'data.txt')))
+
+    def test_pyproject_changed(self):
+        """Test that changing pyproject.toml resolves the project."""
+
+        with TestDirectory():
+            make_project()
+            builder = WatchBuild()
+            builder.resolve()
+            builder.sync()
+            with open('pyproject.toml', 'a') as f:
+                f.write('\n[tool.flit.sdist]\ninclude = ["doc"]\n')
+            self.assertEqual(
+                builder.update(set([os.path.abspath('pyproject.toml')])),
+                ([], True))
+            self.assertIn('sdist', builder.data['tool']['flit'])
+
+    def test_command(self):
+        """Test the watch command until interrupted."""
+
+        class FakeWatcher(object):
+            def __init__(self, events):
+                self.events = list(events)
+
+            def wait(self, timeout=None):
+                if not self.events:
+                    raise KeyboardInterrupt()
+                return self.events.pop(0)
+
+            def close(self):
+                pass
+
+        with TestDirectory():
+            make_project()
+            changed = os.path.abspath('test_module/sub/data.txt')
+            watcher = FakeWatcher([set([changed]), set()])
+            with patch('pyproject2setuppy.watch.open_watcher',
+                       return_value=watcher):
+                with patch('setuptools.setup') as mock_setup:
+                    sys.argv = ['setup.py', 'watch', 'build']
+                    write('test_module/sub/data.txt', 'changed')
+                    main()
+                    self.assertFalse(mock_setup.called)
+            with open(os.path.join('build', 'lib', 'test_module', 'sub',
+                                   'data.txt')) as f:
+                self.assertEqual(f.read(), 'changed')
@@ -0,0 +1,133 @@
+# vim:se fileencoding=utf-8 :
+# (c) 2026 Michał Górny
+# 2-clause BSD license
+
+import os
+import os.path
+import sys
+import threading
+import unittest
+
+from pyproject2setuppy.main import main
+from pyproject2setuppy.workspace import (discover_projects,
+                                         get_build_order,
+                                         get_dependency_graph,
+                                         run_workspace)
+
+from tests.base import TestDirectory
+
+
+PROJECT_TOML = '''
+[build-system]
+requires = ["flit_core"]
+build-backend = "flit_core.buildapi"
+
+[project]
+name = "{name}"
+version = "1"
+description = "description."
+authors = [{{name = "Some Guy", email = "guy@example.com"}}]
+dependencies = [{deps}]
+
+[tool.flit.module]
+name = "{module}"
+'''
+
+PROJECTS = {
+    'libs/core': ('Core_Lib', []),
+    'libs/util': ('util', ['core-lib>=1']),
+    'apps/app': ('app', ['util', 'core.lib', 'requests']),
+    'apps/other': ('other', []),
+}
+
+
+def make_workspace(projects=PROJECTS):
+    """Create a workspace with projects in the current directory."""
+
+    for path, (name, deps) in projects.items():
+        module = name.lower()
+        os.makedirs(os.path.join(path, module))
+        with open(os.path.join(path, 'pyproject.toml'), 'w') as f:
+            f.write(PROJECT_TOML.format(
+                name=name, module=module,
+                deps=', '.join('"{}"'.format(x) for x in deps)))
+        with open(os.path.join(path, module, '__init__.py'), 'w'):
+            pass
+
+
+class WorkspaceTest(unittest.TestCase):
+    """
+    Tests for workspace builds.
+    """
+
+    def test_discover(self):
+        """Test finding projects and their dependencies."""
+
+        with TestDirectory():
+            make_workspace()
+            os.makedirs('.git/x')
+            with open('.git/x/pyproject.toml', 'w'):
+                pass
+            projects = discover_projects()
+            self.assertEqual(projects, [os.path.normpath(x) for x in [
+                'apps/app', 'apps/other', 'libs/core', 'libs/util']])
+            graph = get_dependency_graph('.', projects)
+
+        core, util = (os.path.normpath(x) for x in ('libs/core',
+                                                    'libs/util'))
+        self.assertEqual(graph[os.path.normpath('apps/app')],
+                         set([core, util]))
+        self.assertEqual(graph[util], set([core]))
+        self.assertEqual(get_build_order(graph), [
+            [os.path.normpath('apps/other'), core],
+            [util],
+            [os.path.normpath('apps/app')],
+        ])
+
+    def test_cycle(self):
+        """Test that dependency cycles are reported."""
+
+        self.assertRaises(ValueError, get_build_order,
+                          {'a': set(['b']), 'b': set(['a']), 'c': set()})
+
+    def test_run_workspace(self):
+        """Test scheduling, parallelism and skipping after failures."""
+
+        graph = {
+            'a': set(),
+            'b': set(),
+            'c': set(['a']),
+            'd': set(['b']),
+            'e': set(['c', 'd']),
+        }
+        lock = threading.Lock()
+        started = []
+        running = [0, 0]
+
+        def runner(root, args):
+            with lock:
+                started.append(root)
+                running[0] += 1
+                running[1] = max(running)
+            # make sure that independent projects overlap
+            threading.Event().wait(0.05)
+            with lock:
+                running[0] -= 1
+            return (1 if root == 'd' else 0), ''
+
+        results = run_workspace('', graph, ['build'], jobs=2, runner=runner)
+        self.assertEqual(results, {'a': 0, 'b': 0, 'c': 0, 'd': 1,
+                                   'e': None})
+        self.assertEqual(sorted(started[:2]), ['a', 'b'])
+        self.assertEqual(running[1], 2)
+
+    def test_command(self):
+        """Test building a workspace via main()."""
+
+        with TestDirectory():
+            make_workspace()
+            sys.argv = ['setup.py', 'workspace', '-j', '2', 'build']
+            main()
+            for path, (name, _) in PROJECTS.items():
+                self.assertTrue(os.path.isfile(os.path.join(
+                    path, 'build', 'lib', name.lower(), '__init__.py')))